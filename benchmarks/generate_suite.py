@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Author:   Lorenzo Furcas (TopFirmino)
+# License:  MIT – see the LICENSE file in the repository root for details.
+# ---------------------------------------------------------------------------
+"""Generator of synthetic tzen suites used by the framework-overhead benchmarks.
+Every generated module declares a constant, a fixture and a configurable number of testcases with steps that consume both."""
+
+from __future__ import annotations
+import argparse
+import shutil
+from pathlib import Path
+
+MODULE_TEMPLATE = '''"""Synthetic benchmark module {module}"""
+from tzen import tz_testcase, tz_step, tz_fixture
+from tzen.tz_constants import tz_add_constant
+
+tz_add_constant("CONST_{module}", {value})
+
+@tz_fixture
+class Fixture{module}:
+    """@description: Synthetic fixture {module}"""
+    def setup(self):
+        self.value = {value}
+
+    def teardown(self):
+        self.value = None
+{tests}'''
+
+TEST_TEMPLATE = '''
+@tz_testcase
+class TC_{module}_{test}:
+    """@description: Synthetic test {module}.{test}"""
+    def __init__(self, CONST_{module}):
+        self.const = CONST_{module}
+{steps}'''
+
+STEP_TEMPLATE = '''
+    @tz_step
+    def step_{step}(self, fixture: Fixture{module}):
+        """@description: Synthetic step {step}"""
+        return fixture.value == self.const
+'''
+
+def generate_suite(path:str, tests:int, tests_per_module:int = 100, steps:int = 3) -> Path:
+    """Write a synthetic suite with the given number of tests inside the package folder `path`."""
+    root = Path(path)
+    if root.exists():
+        shutil.rmtree(root)
+    root.mkdir(parents=True)
+    (root / "__init__.py").write_text('"""Synthetic benchmark suite"""\n')
+
+    modules = (tests + tests_per_module - 1) // tests_per_module
+    for m in range(modules):
+        count = min(tests_per_module, tests - m * tests_per_module)
+        module = f"{m:05d}"
+        _steps = "".join(STEP_TEMPLATE.format(module=module, step=s) for s in range(steps))
+        _tests = "".join(TEST_TEMPLATE.format(module=module, test=f"{t:04d}", steps=_steps) for t in range(count))
+        (root / f"mod_{module}.py").write_text(MODULE_TEMPLATE.format(module=module, value=m, tests=_tests))
+
+    return root
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", help="Folder of the generated package")
+    parser.add_argument("--tests", type=int, default=1000)
+    parser.add_argument("--tests-per-module", type=int, default=100)
+    parser.add_argument("--steps", type=int, default=3)
+    args = parser.parse_args()
+    generate_suite(args.path, args.tests, args.tests_per_module, args.steps)
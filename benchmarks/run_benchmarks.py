@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Author:   Lorenzo Furcas (TopFirmino)
+# License:  MIT – see the LICENSE file in the repository root for details.
+# ---------------------------------------------------------------------------
+"""Framework-overhead benchmarks for tzen.
+
+For every requested size a synthetic suite is generated and measured in a fresh interpreter, since the tzen
+registries are process-wide singletons. The measured stages are:
+    - collection: import_all_modules_in_directory, which also builds the TzTree
+    - tree: TzTree operations (find, get_by_name, resolve)
+    - injection: per-call overhead of an injected step compared with the bare function
+    - dispatch: per-step cost of TZSession.start with trivial steps
+    - report / doc: HTML report and Markdown documentation generation
+
+Results are written as JSON so that they can be compared across commits:
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 100000 --output bench.json
+"""
+
+from __future__ import annotations
+import argparse
+import inspect
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).absolute().parent
+REPO = HERE.parent
+sys.path.insert(0, str(HERE))
+sys.path.insert(0, str(REPO))
+
+from generate_suite import generate_suite
+
+
+def _timed(func, *args, **kwargs):
+    _start = time.perf_counter()
+    res = func(*args, **kwargs)
+    return time.perf_counter() - _start, res
+
+
+def run_worker(suite:str, calls:int) -> dict:
+    """Measure all the stages on an already generated suite. Runs inside the child interpreter."""
+    from tzen._tz_loader import import_all_modules_in_directory
+    from tzen._tz_logging import TZEN_ROOT_LOGGER_NAME, TZEN_ROOT_TEST_LOGGER_NAME, TZEN_ROOT_FIXTURE_LOGGER_NAME
+    from tzen.tz_tree import TzTree
+    from tzen.tz_session import TZSession
+    from tzen.tz_doc import tz_build_documentation
+    from tzen.tz_test import _TZEN_STEPS_
+
+    # Console rendering would dominate every measure, only the framework is benchmarked. The loggers of the tests
+    # inherit the level of these loggers and propagate to their handlers, which are silenced as well
+    for name in (TZEN_ROOT_LOGGER_NAME, TZEN_ROOT_TEST_LOGGER_NAME, TZEN_ROOT_FIXTURE_LOGGER_NAME):
+        logging.getLogger(name).setLevel(logging.CRITICAL)
+        for handler in logging.getLogger(name).handlers:
+            handler.setLevel(logging.CRITICAL)
+    logging.getLogger(TZEN_ROOT_TEST_LOGGER_NAME).disabled = True
+    logging.getLogger(TZEN_ROOT_FIXTURE_LOGGER_NAME).disabled = True
+
+    results = {}
+    results["collection"], _ = _timed(import_all_modules_in_directory, suite)
+
+    tree = TzTree()
+    organizer = tree.resolve(suite)
+    find_time, tests = _timed(organizer.find, "test")
+    sample = tests[:: max(len(tests) // 100, 1)]
+    name_time, _ = _timed(lambda: [tree.get_by_name(x.name) for x in sample])
+    resolve_time, _ = _timed(lambda: [tree.resolve(x.get_selector()) for x in sample])
+    results["tree"] = {
+        "nodes": sum(1 for _ in _iter_nodes(tree)),
+        "find_test": find_time,
+        "get_by_name_per_call": name_time / len(sample),
+        "resolve_per_call": resolve_time / len(sample),
+    }
+
+    step = next(iter(_TZEN_STEPS_.values()))
+    owner = tree.resolve(step.get_selector()).parent.get_object()
+    instance = owner.test_class()
+    bare = inspect.unwrap(step.func)
+    fixture = tree.resolve(step.get_selector()).find("fixture")[0].get_object().get_fixture()
+    injected_time, _ = _timed(lambda: [step.func(instance) for _ in range(calls)])
+    bare_time, _ = _timed(lambda: [bare(instance, fixture) for _ in range(calls)])
+    results["injection"] = {
+        "injected_per_call": injected_time / calls,
+        "bare_per_call": bare_time / calls,
+        "overhead_per_call": (injected_time - bare_time) / calls,
+    }
+
+    session = TZSession(organizer)
+    dispatch_time, _ = _timed(session.start)
+    total_steps = sum(len(x.get_object().steps) for x in tests)
+    results["dispatch"] = {
+        "session": dispatch_time,
+        "tests": len(tests),
+        "steps": total_steps,
+        "per_step": dispatch_time / max(total_steps, 1),
+    }
+
+    with tempfile.TemporaryDirectory() as out:
+        results["report"], _ = _timed(session.build_report, os.path.join(out, "report.html"))
+        results["doc"], _ = _timed(tz_build_documentation, tree, "docs.md", out)
+
+    return results
+
+def _iter_nodes(node):
+    stack = [node]
+    while stack:
+        _node = stack.pop()
+        yield _node
+        stack.extend(_node.children)
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO, text=True).strip()
+    except Exception:
+        return "unknown"
+
+def run(sizes, output:str, workdir:str, timeout:float, calls:int, tests_per_module:int, steps:int) -> dict:
+    report = {
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "results": {},
+    }
+
+    for size in sizes:
+        suite = Path(workdir) / f"tzbench_{size}"
+        gen_time, _ = _timed(generate_suite, str(suite), size, tests_per_module, steps)
+        print(f"[{size}] generated in {gen_time:.2f}s, measuring...", flush=True)
+        cmd = [sys.executable, __file__, "--worker", str(suite), "--calls", str(calls)]
+        try:
+            proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, cwd=workdir)
+        except subprocess.TimeoutExpired:
+            report["results"][str(size)] = {"error": f"timeout after {timeout}s"}
+            print(f"[{size}] timeout", flush=True)
+            continue
+
+        if proc.returncode != 0:
+            report["results"][str(size)] = {"error": proc.stderr.strip().splitlines()[-1:]}
+            print(f"[{size}] failed:\n{proc.stderr}", flush=True)
+            continue
+
+        report["results"][str(size)] = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"[{size}] {json.dumps(report['results'][str(size)])}", flush=True)
+
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="tzen framework-overhead benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Number of tests of the generated suites")
+    parser.add_argument("--output", default="bench.json", help="JSON file with the results")
+    parser.add_argument("--workdir", default=None, help="Folder where the suites are generated (default: a temporary folder)")
+    parser.add_argument("--timeout", type=float, default=3600, help="Seconds allowed for every size")
+    parser.add_argument("--calls", type=int, default=10000, help="Calls used to measure the injection overhead")
+    parser.add_argument("--tests-per-module", type=int, default=100)
+    parser.add_argument("--steps", type=int, default=3, help="Steps of every generated test")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.calls)))
+    elif args.workdir:
+        run(args.sizes, os.path.abspath(args.output), args.workdir, args.timeout, args.calls, args.tests_per_module, args.steps)
+    else:
+        with tempfile.TemporaryDirectory() as workdir:
+            run(args.sizes, os.path.abspath(args.output), workdir, args.timeout, args.calls, args.tests_per_module, args.steps)
@@ -0,0 +1,103 @@
+"""Helpers shared by the tests of tzen.
+The registries of tzen are global to the process, so every suite is written in a temporary folder and run by a new
+interpreter; the results of a session are read back from its results file."""
+
+from __future__ import annotations
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class TZSuiteResult:
+    """Outcome of a session run by `run_session`."""
+
+    def __init__(self, process:subprocess.CompletedProcess, results_file:Path) -> None:
+        self.process = process
+        self.session: Dict[str, Any] = {}
+        self.tests: Dict[str, Dict[str, Any]] = {}
+        if results_file.exists():
+            for line in results_file.read_text().splitlines():
+                record = json.loads(line)
+                if record.pop("kind") == "session":
+                    self.session = record
+                else:
+                    self.tests[record["name"]] = record
+
+    @property
+    def output(self) -> str:
+        return self.process.stdout + self.process.stderr
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(x for x in (str(ROOT), env.get("PYTHONPATH")) if x)
+    return env
+
+
+@pytest.fixture
+def write_suite(tmp_path):
+    """Write the modules of a suite, given as {relative path: source}, and return its folder."""
+    def _write(files:Dict[str, str], name:str = "suite") -> Path:
+        folder = tmp_path / name
+        folder.mkdir(exist_ok=True)
+        (folder / "__init__.py").touch()
+        for path, source in files.items():
+            (folder / path).parent.mkdir(parents=True, exist_ok=True)
+            (folder / path).write_text(textwrap.dedent(source))
+        return folder
+    return _write
+
+
+@pytest.fixture
+def run_tzen(tmp_path):
+    """Run a tzen command in the temporary folder and return the completed process."""
+    def _run(*args:str, timeout:float = 120) -> subprocess.CompletedProcess:
+        return subprocess.run([sys.executable, "-m", "tzen", *args], cwd=tmp_path, env=_env(), capture_output=True,
+                              text=True, timeout=timeout)
+    return _run
+
+
+@pytest.fixture
+def spawn_tzen(tmp_path):
+    """Start a tzen command in the background; the processes still running at the end of the test are killed."""
+    processes = []
+    def _spawn(*args:str) -> subprocess.Popen:
+        processes.append(subprocess.Popen([sys.executable, "-m", "tzen", *args], cwd=tmp_path, env=_env(),
+                                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True))
+        return processes[-1]
+    yield _spawn
+    for process in processes:
+        if process.poll() is None:
+            process.kill()
+        process.communicate()
+
+
+@pytest.fixture
+def run_session(tmp_path, run_tzen):
+    """Run `tzen start-session` on a folder with the given options and return a TZSuiteResult."""
+    def _run(folder:Path, *args:str, timeout:float = 120) -> TZSuiteResult:
+        results_file = tmp_path / "results.jsonl"
+        if results_file.exists():
+            results_file.unlink()
+        process = run_tzen("start-session", str(folder), "--results-file", str(results_file), *args, timeout=timeout)
+        return TZSuiteResult(process, results_file)
+    return _run
+
+
+@pytest.fixture
+def run_python(tmp_path):
+    """Run a script using tzen in a new interpreter and return the completed process."""
+    def _run(source:str, timeout:float = 120) -> subprocess.CompletedProcess:
+        script = tmp_path / "script.py"
+        script.write_text(textwrap.dedent(source))
+        return subprocess.run([sys.executable, str(script)], cwd=tmp_path, env=_env(), capture_output=True,
+                              text=True, timeout=timeout)
+    return _run
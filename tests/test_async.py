@@ -0,0 +1,49 @@
+"""Tests of asynchronous steps and fixtures on the event loop engine."""
+
+SUITE = '''
+import asyncio
+from tzen import tz_fixture, tz_testcase, tz_step
+from tzen.tz_fixture import TZFixtureScope
+
+@tz_fixture(scope=TZFixtureScope.SESSION)
+class Port:
+    async def setup(self):
+        await asyncio.sleep(0)
+        self.opened = True
+    async def teardown(self):
+        with open("events.txt", "a") as f: f.write("Port closed\\n")
+
+@tz_fixture
+async def socket():
+    yield "socket"
+    with open("events.txt", "a") as f: f.write("socket closed\\n")
+
+@tz_testcase
+class TC_Async_1:
+    @tz_step
+    async def step1(self, port: Port, sock: socket):
+        await asyncio.sleep(1)
+        return port.opened and sock == "socket"
+
+@tz_testcase
+class TC_Async_2:
+    @tz_step
+    async def step1(self, port: Port):
+        await asyncio.sleep(1)
+        return port.opened
+'''
+
+
+def test_async_steps_and_fixtures(write_suite, run_session, tmp_path):
+    folder = write_suite({"test_async.py": SUITE})
+    result = run_session(folder)
+    assert result.session["status"] == "PASSED", result.output
+    assert sorted((tmp_path / "events.txt").read_text().splitlines()) == ["Port closed", "socket closed"]
+
+
+def test_concurrency_overlaps_independent_tests(write_suite, run_session):
+    folder = write_suite({"test_async.py": SUITE})
+    result = run_session(folder, "--concurrency", "2")
+    assert result.session["passed_tests"] == 2, result.output
+    first, second = result.tests["TC_Async_1"], result.tests["TC_Async_2"]
+    assert first["start"] < second["end"] and second["start"] < first["end"]
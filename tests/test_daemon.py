@@ -0,0 +1,78 @@
+"""Tests of the daemon keeping a suite loaded between runs."""
+import json
+
+FIXTURES = '''
+from tzen import tz_fixture
+from tzen.tz_fixture import TZFixtureScope
+
+@tz_fixture(scope=TZFixtureScope.SESSION)
+class Board:
+    def setup(self): self.name = "board"
+    def teardown(self): pass
+
+@tz_fixture(scope=TZFixtureScope.SESSION)
+class Link:
+    def __init__(self, board: Board):
+        self.board = board
+    def setup(self): pass
+    def teardown(self): pass
+'''
+
+TESTS = '''
+from tzen import tz_testcase, tz_step
+from .fx import Link
+
+@tz_testcase
+class TC_Link:
+    @tz_step
+    def step1(self, link: Link):
+        return link.board.name == "board"
+'''
+
+
+def test_reload_fixture_module_injects_dependent_fixtures(write_suite, run_python):
+    folder = write_suite({"fx.py": FIXTURES, "test_link.py": TESTS})
+    process = run_python(f'''
+        import json
+        from pathlib import Path
+        from tzen.tz_daemon import TZDaemon
+
+        fixtures = Path({str(folder / "fx.py")!r})
+        daemon = TZDaemon({str(folder)!r})
+        daemon.load()
+        first = daemon.run(report_output_file="report.html")
+        fixtures.write_text(fixtures.read_text().replace('self.name = "board"', 'self.name = "board"; self.rev = 2'))
+        second = daemon.run(report_output_file="report.html")
+        daemon.shutdown()
+        print(json.dumps([first, second]))
+    ''')
+    assert process.returncode == 0, process.stderr
+    first, second = json.loads(process.stdout.strip().splitlines()[-1])
+    assert first["status"] == "PASSED"
+    assert second["status"] == "PASSED", process.stdout
+    assert second["reloaded"] == [str(folder / "fx.py")]
+    assert second["stale"] == ["Board", "Link"]
+    assert second["reused"] == []
+
+
+def test_unchanged_fixtures_are_reused(write_suite, run_python):
+    folder = write_suite({"fx.py": FIXTURES, "test_link.py": TESTS})
+    process = run_python(f'''
+        import json
+        from pathlib import Path
+        from tzen.tz_daemon import TZDaemon
+
+        fixtures = Path({str(folder / "fx.py")!r})
+        daemon = TZDaemon({str(folder)!r})
+        daemon.load()
+        daemon.run(report_output_file="report.html")
+        fixtures.write_text(fixtures.read_text() + "\\n# touched\\n")
+        second = daemon.run(report_output_file="report.html")
+        daemon.shutdown()
+        print(json.dumps(second))
+    ''')
+    assert process.returncode == 0, process.stderr
+    second = json.loads(process.stdout.strip().splitlines()[-1])
+    assert second["status"] == "PASSED", process.stdout
+    assert second["reused"] == ["Board", "Link"]
+    assert second["stale"] == []
@@ -0,0 +1,53 @@
+"""Tests of data-driven tests and steps."""
+
+SUITE = '''
+from tzen import tz_testcase, tz_step
+
+@tz_testcase(data=[{"user": "alice", "ok": True}, {"user": "bob", "ok": False}, {"user": "carol", "ok": True}])
+class TC_Login:
+    @tz_step
+    def login(self, row):
+        return row["ok"] and self.row is row
+
+@tz_testcase(data=[{"base": 0}, {"base": 10}])
+class TC_Nested:
+    @tz_step(data=[{"value": 1}, {"value": 2}, {"value": 3}])
+    def check(self, row):
+        return self.row is row and row["value"] != 2
+
+@tz_testcase
+class TC_Parser:
+    @tz_step(data="samples.jsonl")
+    def parse(self, row):
+        return int(row["input"]) == row["output"]
+'''
+
+SAMPLES = '{"input": "1", "output": 1}\n{"input": "2", "output": 3}\n{"input": "3", "output": 3}\n'
+
+
+def test_test_dataset_runs_every_row_and_keeps_the_failures(write_suite, run_session):
+    folder = write_suite({"test_data.py": SUITE, "samples.jsonl": SAMPLES})
+    result = run_session(folder)
+    cases = result.tests["TC_Login"]["cases"]
+    assert result.tests["TC_Login"]["status"] == "FAILED", result.output
+    assert (cases["total"], cases["passed"], cases["failed"]) == (3, 2, 1)
+    assert [x["index"] for x in cases["failures"]] == [1]
+
+
+def test_step_dataset_is_read_relative_to_the_module(write_suite, run_session):
+    folder = write_suite({"test_data.py": SUITE, "samples.jsonl": SAMPLES})
+    result = run_session(folder)
+    cases = result.tests["TC_Parser"]["steps"][0]["cases"]
+    assert (cases["total"], cases["passed"], cases["failed"]) == (3, 2, 1), result.output
+
+
+def test_step_cases_of_every_test_row_are_appended(write_suite, run_session):
+    folder = write_suite({"test_data.py": SUITE, "samples.jsonl": SAMPLES})
+    result = run_session(folder)
+    nested = result.tests["TC_Nested"]
+    cases = nested["steps"][0]["cases"]
+    assert (cases["total"], cases["passed"], cases["failed"]) == (6, 4, 2), result.output
+    assert [x["index"] for x in cases["failures"]] == [1, 4]
+    # Every row of the test fails on its own second step case
+    assert [x["index"] for x in nested["cases"]["failures"]] == [0, 1]
+    assert "1 of 3 cases failed, first at case 4" in nested["cases"]["failures"][1]["error"]
@@ -0,0 +1,50 @@
+"""Tests of the TCP coordinator and of its agents."""
+import json
+import shutil
+import socket
+import time
+
+SUITE = "from tzen import tz_testcase, tz_step\n" + "".join(f'''
+@tz_testcase
+class TC_Remote_{i}:
+    @tz_step
+    def step1(self): return True
+''' for i in range(6))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _wait_listening(port:int, timeout:float = 30) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Nothing listening on port {port}")
+
+
+def test_agents_run_every_test_served_by_the_coordinator(write_suite, spawn_tzen, tmp_path):
+    folder = write_suite({"test_remote.py": SUITE})
+    copy = tmp_path / "agent_copy"
+    shutil.copytree(folder, copy / folder.name)
+    port = str(_free_port())
+
+    coordinator = spawn_tzen("coordinator", str(folder), "--port", port, "--lease-timeout", "4",
+                             "--report-output-file", str(tmp_path / "report.html"),
+                             "--results-file", str(tmp_path / "results.jsonl"))
+    _wait_listening(int(port))
+    agents = [spawn_tzen("agent", str(x), "--port", port, "--name", f"agent{i}")
+              for i, x in enumerate((folder, copy / folder.name))]
+    output, _ = coordinator.communicate(timeout=120)
+    for agent in agents:
+        agent.communicate(timeout=30)
+
+    assert coordinator.returncode == 0, output
+    records = [json.loads(x) for x in (tmp_path / "results.jsonl").read_text().splitlines()]
+    assert records[0]["passed_tests"] == 6
+    assert sorted(x["name"] for x in records[1:]) == [f"TC_Remote_{i}" for i in range(6)]
@@ -0,0 +1,72 @@
+"""Tests of the parallel setup of SESSION fixtures along their dependency graph."""
+
+SUITE = '''
+import time
+from tzen import tz_fixture, tz_testcase, tz_step
+from tzen.tz_fixture import TZFixtureScope
+
+def _event(name):
+    with open("events.txt", "a") as f: f.write(f"{name} {time.time()}\\n")
+
+@tz_fixture(scope=TZFixtureScope.SESSION)
+class PowerSupply:
+    def setup(self):
+        _event("PowerSupply+"); time.sleep(0.5); _event("PowerSupply-")
+    def teardown(self): _event("PowerSupply~")
+
+@tz_fixture(scope=TZFixtureScope.SESSION)
+class Oscilloscope:
+    def setup(self):
+        _event("Oscilloscope+"); time.sleep(0.5); _event("Oscilloscope-")
+    def teardown(self): _event("Oscilloscope~")
+
+@tz_fixture(scope=TZFixtureScope.SESSION)
+class Rig:
+    def __init__(self, psu: PowerSupply, scope: Oscilloscope):
+        self.psu, self.scope = psu, scope
+    def setup(self): _event("Rig+")
+    def teardown(self): _event("Rig~")
+
+@tz_fixture(scope=TZFixtureScope.SESSION)
+class Broken:
+    def setup(self): raise RuntimeError("no device")
+    def teardown(self): pass
+
+@tz_testcase
+class TC_Rig:
+    @tz_step
+    def step1(self, rig: Rig):
+        return rig.psu is not None
+
+@tz_testcase
+class TC_Broken:
+    @tz_step
+    def step1(self, broken: Broken):
+        return True
+'''
+
+
+def _events(path):
+    events = {}
+    for line in path.read_text().splitlines():
+        name, timestamp = line.split()
+        events[name] = float(timestamp)
+    return events
+
+
+def test_independent_fixtures_are_set_up_in_parallel(write_suite, run_session, tmp_path):
+    folder = write_suite({"test_rig.py": SUITE})
+    result = run_session(folder)
+    assert result.tests["TC_Rig"]["status"] == "PASSED", result.output
+    events = _events(tmp_path / "events.txt")
+    assert events["PowerSupply+"] < events["Oscilloscope-"] and events["Oscilloscope+"] < events["PowerSupply-"]
+    # Dependencies first at setup, last at teardown
+    assert events["Rig+"] >= max(events["PowerSupply-"], events["Oscilloscope-"])
+    assert events["Rig~"] <= min(events["PowerSupply~"], events["Oscilloscope~"])
+
+
+def test_failed_early_setup_is_reported_on_the_consumer(write_suite, run_session):
+    folder = write_suite({"test_rig.py": SUITE})
+    result = run_session(folder)
+    assert result.tests["TC_Broken"]["status"] == "FAILED"
+    assert "no device" in result.tests["TC_Broken"]["error"]
@@ -0,0 +1,103 @@
+"""Tests of tests isolated in forked processes."""
+import sys
+
+import pytest
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="process isolation forks the session")
+
+SUITE = '''
+import os
+import sys
+import time
+from tzen import tz_fixture, tz_testcase, tz_step
+from tzen.tz_fixture import TZFixtureScope
+
+def event(name):
+    with open("events.txt", "a") as f: f.write(f"{name} {os.getpid()}\\n")
+
+@tz_fixture(scope=TZFixtureScope.SESSION)
+class Board:
+    def setup(self): event("Board+")
+    def teardown(self): event("Board-")
+
+@tz_fixture(scope=TZFixtureScope.MODULE)
+class Bench:
+    def setup(self): event("Bench+")
+    def teardown(self): event("Bench-")
+
+GLOBAL = []
+
+@tz_testcase
+class TC_Exit:
+    @tz_step
+    def step1(self):
+        os._exit(7)
+
+@tz_testcase
+class TC_Pollute:
+    @tz_step
+    def step1(self):
+        GLOBAL.append(1)
+        return True
+
+@tz_testcase
+class TC_Clean:
+    @tz_step
+    def step1(self):
+        return GLOBAL == []
+
+@tz_testcase
+class TC_SystemExit:
+    @tz_step
+    def step1(self):
+        sys.exit(4)
+
+@tz_testcase
+class TC_Board_1:
+    @tz_step
+    def step1(self, board: Board, bench: Bench):
+        return True
+
+@tz_testcase
+class TC_Board_2:
+    @tz_step
+    def step1(self, board: Board, bench: Bench):
+        return True
+
+@tz_testcase
+class TC_Hang:
+    @tz_step
+    def step1(self):
+        time.sleep(30)
+'''
+
+
+def test_crashing_and_hanging_tests_fail_alone(write_suite, run_session):
+    folder = write_suite({"test_isolated.py": SUITE})
+    result = run_session(folder, "--isolate", "--timeout", "2")
+    statuses = {k: v["status"] for k, v in result.tests.items() if not k.startswith("TC_Board")}
+    assert statuses == {"TC_Exit": "FAILED", "TC_Pollute": "PASSED", "TC_Clean": "PASSED", "TC_SystemExit": "FAILED",
+                        "TC_Hang": "FAILED"}, result.output
+    assert "7" in result.tests["TC_Exit"]["error"]
+    assert "timed out" in result.tests["TC_Hang"]["error"]
+
+
+def test_child_failure_is_reported_with_its_traceback(write_suite, run_session):
+    folder = write_suite({"test_isolated.py": SUITE})
+    result = run_session(folder, "--isolate", "--selector", "**/TC_SystemExit")
+    error = result.tests["TC_SystemExit"]["error"]
+    assert "Traceback" in error and "SystemExit: 4" in error, result.output
+
+
+def test_children_never_tear_down_the_fixtures_of_the_session(write_suite, run_session, tmp_path):
+    folder = write_suite({"test_isolated.py": SUITE})
+    result = run_session(folder, "--isolate", "--selector", "**/TC_Board_*")
+    assert result.session["passed_tests"] == 2, result.output
+    events = [x.split() for x in (tmp_path / "events.txt").read_text().splitlines()]
+    board = [x for x in events if x[0].startswith("Board")]
+    # Set up and torn down once, by the session process
+    assert [x[0] for x in board] == ["Board+", "Board-"] and board[0][1] == board[1][1]
+    # A MODULE fixture set up by a child is torn down by the same child
+    bench = [x for x in events if x[0].startswith("Bench")]
+    assert [x[0] for x in bench] == ["Bench+", "Bench-", "Bench+", "Bench-"]
+    assert bench[0][1] == bench[1][1] != bench[2][1] == bench[3][1]
@@ -0,0 +1,42 @@
+"""Tests of the session journal and of the resume of a crashed session."""
+import json
+
+SUITE = '''
+import os
+from tzen import tz_testcase, tz_step
+
+def event(name):
+    with open("events.txt", "a") as f: f.write(name + "\\n")
+
+@tz_testcase
+class TC_Journal_1:
+    @tz_step
+    def step1(self):
+        event("TC_Journal_1")
+        return True
+
+@tz_testcase
+class TC_Journal_2:
+    @tz_step
+    def step1(self):
+        event("TC_Journal_2")
+        if os.path.exists("crash"):
+            os._exit(3)
+        return True
+'''
+
+
+def test_resume_skips_the_tests_in_the_journal(write_suite, run_session, tmp_path):
+    folder = write_suite({"test_journal.py": SUITE})
+    journal = str(tmp_path / "session.journal")
+    (tmp_path / "crash").touch()
+    crashed = run_session(folder, "--journal-file", journal)
+    assert crashed.process.returncode == 3
+    assert [json.loads(x)["name"] for x in (tmp_path / "session.journal").read_text().splitlines()
+            if "name" in json.loads(x)] == ["TC_Journal_1"]
+
+    (tmp_path / "crash").unlink()
+    resumed = run_session(folder, "--resume", journal)
+    assert resumed.session["passed_tests"] == 2, resumed.output
+    assert set(resumed.tests) == {"TC_Journal_1", "TC_Journal_2"}
+    assert (tmp_path / "events.txt").read_text().splitlines() == ["TC_Journal_1", "TC_Journal_2", "TC_Journal_2"]
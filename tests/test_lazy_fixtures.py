@@ -0,0 +1,57 @@
+"""Tests of lazy fixtures, set up on their first use by the consumer."""
+
+SUITE = '''
+from pathlib import Path
+from tzen import tz_fixture, tz_testcase, tz_step
+
+@tz_fixture(lazy=True)
+class Device:
+    def setup(self):
+        with open("setups.txt", "a") as f: f.write("Device\\n")
+        self.value = 1
+    def teardown(self): pass
+
+@tz_testcase
+class TC_Truthiness:
+    @tz_step
+    def step1(self, dev: Device):
+        return bool(dev) and isinstance(dev, Device) and dev == dev and dev.value == 1
+
+@tz_testcase
+class TC_Unused:
+    @tz_step
+    def step1(self, dev: Device):
+        return True
+'''
+
+
+def test_lazy_fixture_truthiness_does_not_need_len(write_suite, run_session, tmp_path):
+    folder = write_suite({"test_lazy.py": SUITE})
+    result = run_session(folder)
+    assert result.tests["TC_Truthiness"]["status"] == "PASSED", result.output
+    assert result.tests["TC_Unused"]["status"] == "PASSED", result.output
+    # The test not using the proxy never sets the fixture up
+    assert (tmp_path / "setups.txt").read_text().splitlines() == ["Device"]
+
+
+def test_lazy_fixture_forwards_container_protocols(run_python):
+    process = run_python('''
+        from tzen.tz_fixture import TZLazyFixture
+
+        class Container:
+            name, is_setup = "items", False
+            def __init__(self, fixture): self.fixture = fixture
+            def get_fixture(self): return self.fixture
+
+        items = TZLazyFixture(Container([1, 2]))
+        assert len(items) == 2 and 2 in items and list(items) == [1, 2] and items == [1, 2]
+        assert not TZLazyFixture(Container([]))
+        assert hash(TZLazyFixture(Container("key"))) == hash("key")
+        try:
+            len(TZLazyFixture(Container(object())))
+        except TypeError:
+            pass
+        else:
+            raise AssertionError("len() of a fixture without __len__")
+    ''')
+    assert process.returncode == 0, process.stderr
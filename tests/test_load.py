@@ -0,0 +1,62 @@
+"""Tests of load tests, running a testcase as concurrent virtual users."""
+import json
+
+SUITE = '''
+import asyncio
+import time
+from tzen import tz_testcase, tz_step
+
+@tz_testcase
+class TC_Load:
+    @tz_step
+    def request(self):
+        time.sleep(0.01)
+        return True
+
+    @tz_step
+    def check(self):
+        return True
+
+@tz_testcase
+class TC_LoadAsync:
+    @tz_step
+    async def request(self):
+        await asyncio.sleep(0.01)
+        return True
+'''
+
+
+def test_windows_add_up_to_the_totals(write_suite, run_tzen, tmp_path):
+    folder = write_suite({"test_load.py": SUITE})
+    process = run_tzen("load", str(folder), "test_load/TC_Load", "--users", "3", "--duration", "2", "--window", "0.5",
+                       "--results-file", str(tmp_path / "load.json"))
+    assert process.returncode == 0, process.stdout + process.stderr
+    info = json.loads((tmp_path / "load.json").read_text())
+    assert [x["start"] for x in info["windows"]] == [0.0, 0.5, 1.0, 1.5]
+    assert info["iterations"]["count"] == sum(x["iterations"]["count"] for x in info["windows"]) > 0
+    assert info["steps"]["request"]["count"] == sum(x["steps"]["request"]["count"] for x in info["windows"])
+    request = info["steps"]["request"]
+    assert 0.01 <= request["p50"] <= request["p90"] <= request["p99"] <= request["max"]
+
+
+def test_windows_are_reported_while_the_test_runs(write_suite, run_python):
+    folder = write_suite({"test_load.py": SUITE})
+    process = run_python(f'''
+        import logging
+        import time
+        from tzen.tz_facade import TZFacade
+
+        reported = []
+        class Handler(logging.Handler):
+            def emit(self, record):
+                if record.getMessage().startswith("["):
+                    reported.append(time.perf_counter())
+        logging.getLogger("tzen").addHandler(Handler())
+
+        info = TZFacade().load_test({str(folder)!r}, "test_load/TC_LoadAsync", users=2, duration=1.5, window=0.5)
+        end = time.perf_counter()
+        assert len(info.windows) == 3 and info.iterations.count > 0
+        # The first two windows are logged as they close, the last one at the end
+        assert len(reported) == 3 and end - reported[0] > 0.8, (reported, end)
+    ''')
+    assert process.returncode == 0, process.stdout + process.stderr
@@ -0,0 +1,33 @@
+"""Tests of the loggers of tests and fixtures."""
+
+SUITE = '''
+from tzen import tz_testcase, tz_step
+
+@tz_testcase
+class TC_Logging:
+    @tz_step
+    def step1(self):
+        self.logger.debug("debug record of the step")
+        return True
+'''
+
+
+def test_test_loggers_inherit_the_level_of_their_root(run_python):
+    process = run_python('''
+        import logging
+        from tzen._tz_logging import TZTestLogger, TZFixtureLogger
+
+        for logger in (TZTestLogger("TC_1", 1).logger, TZFixtureLogger("Board").logger):
+            assert logger.level == logging.NOTSET and logger.getEffectiveLevel() == logging.DEBUG
+
+        logging.getLogger("tzen.test").setLevel(logging.WARNING)
+        assert not TZTestLogger("TC_2", 1).logger.isEnabledFor(logging.INFO)
+        assert TZTestLogger("TC_3", 1, level=logging.INFO).logger.isEnabledFor(logging.INFO)
+    ''')
+    assert process.returncode == 0, process.stderr
+
+
+def test_debug_records_of_a_test_are_shown(write_suite, run_session):
+    folder = write_suite({"test_logging.py": SUITE})
+    result = run_session(folder)
+    assert "debug record" in result.output
@@ -0,0 +1,23 @@
+"""Tests of the fail-fast options."""
+
+SUITE = "from tzen import tz_testcase, tz_step\n" + "".join(f'''
+@tz_testcase
+class TC_Fail_{i}:
+    @tz_step
+    def step1(self): return {i not in (1, 2)}
+''' for i in range(5))
+
+
+def test_exitfirst_skips_the_tests_after_the_first_failure(write_suite, run_session):
+    folder = write_suite({"test_fail.py": SUITE})
+    result = run_session(folder, "-x")
+    assert result.session["failed_tests"] == 1, result.output
+    assert result.session["skipped_tests"] == 3
+    assert result.tests["TC_Fail_0"]["status"] == "PASSED"
+
+
+def test_maxfail_stops_after_the_given_failures(write_suite, run_session):
+    folder = write_suite({"test_fail.py": SUITE})
+    result = run_session(folder, "--maxfail", "2")
+    assert result.session["failed_tests"] == 2, result.output
+    assert result.session["skipped_tests"] == 2
@@ -0,0 +1,47 @@
+"""Tests of the memory profiler."""
+import sys
+
+import pytest
+
+SUITE = '''
+from tzen import tz_testcase, tz_step
+
+RETAINED = []
+
+class Node:
+    pass
+
+@tz_testcase
+class TC_1_Transient:
+    @tz_step
+    def step1(self):
+        buffer = b"x" * (64 << 20)
+        return len(buffer) > 0
+
+@tz_testcase
+class TC_2_Retain:
+    @tz_step
+    def step1(self):
+        RETAINED.append(b"x" * (64 << 20))
+        RETAINED.append([Node() for _ in range(1000)])
+        return True
+'''
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="the current RSS is read from /proc")
+def test_rss_growth_is_measured_after_a_previous_peak(write_suite, run_session):
+    folder = write_suite({"test_memory.py": SUITE})
+    result = run_session(folder, "--memory")
+    retain = result.tests["TC_2_Retain"]["memory"]
+    # The max RSS does not grow again after the transient test, the current RSS does
+    assert retain["rss_delta"] >= 32 << 20, result.output
+    assert retain["leak"] and not result.tests["TC_1_Transient"]["memory"]["leak"]
+
+
+def test_object_census_is_recorded_for_tests_only(write_suite, run_session):
+    folder = write_suite({"test_memory.py": SUITE})
+    result = run_session(folder, "--memory")
+    retain = result.tests["TC_2_Retain"]
+    assert retain["memory"]["gc_growth"].get("Node", 0) >= 1000, result.output
+    assert retain["steps"][0]["memory"]["gc_growth"] == {}
+    assert retain["steps"][0]["memory"]["retained"] >= 64 << 20
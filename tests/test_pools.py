@@ -0,0 +1,52 @@
+"""Tests of pooled fixtures."""
+
+SUITE = '''
+import threading
+import time
+from tzen import tz_fixture, tz_testcase, tz_step
+from tzen.tz_fixture import TZFixtureScope
+
+_lock = threading.Lock()
+
+def event(name):
+    with _lock:
+        with open("events.txt", "a") as f: f.write(name + "\\n")
+
+@tz_fixture(scope=TZFixtureScope.SESSION, pool_size=2, pool_recycle=2)
+class Connection:
+    count = 0
+    def setup(self):
+        with _lock:
+            Connection.count += 1
+            self.id = Connection.count
+        event(f"setup {self.id}")
+    def teardown(self): event(f"teardown {self.id}")
+''' + "".join(f'''
+@tz_testcase
+class TC_Pool_{i}:
+    @tz_step
+    def step1(self, conn: Connection):
+        event(f"use {{conn.id}}")
+        time.sleep(0.2)
+        return True
+''' for i in range(4))
+
+
+def test_pool_lends_an_instance_to_every_test_and_recycles_it(write_suite, run_session, tmp_path):
+    folder = write_suite({"test_pool.py": SUITE})
+    result = run_session(folder, "--threads", "4")
+    assert result.session["passed_tests"] == 4, result.output
+    events = (tmp_path / "events.txt").read_text().splitlines()
+    used = [x.split()[1] for x in events if x.startswith("use")]
+    # Two instances lent twice each, then replaced: no instance is used more than pool_recycle times
+    assert len(used) == 4 and all(used.count(x) <= 2 for x in used)
+    setups = {x.split()[1] for x in events if x.startswith("setup")}
+    teardowns = {x.split()[1] for x in events if x.startswith("teardown")}
+    assert setups == teardowns
+
+
+def test_pool_timeout_fails_the_waiting_test(write_suite, run_session):
+    folder = write_suite({"test_pool.py": SUITE.replace("pool_size=2, pool_recycle=2", "pool_size=1, pool_timeout=0.05")})
+    result = run_session(folder, "--threads", "4")
+    failed = [x for x in result.tests.values() if x["status"] == "FAILED"]
+    assert failed and all("No instance of fixture 'Connection'" in x["error"] for x in failed), result.output
@@ -0,0 +1,48 @@
+"""Tests of the reruns of failed tests and of flaky tests."""
+
+SUITE = '''
+import os
+from tzen import tz_fixture, tz_testcase, tz_step
+from tzen.tz_fixture import TZFixtureScope
+
+def event(name):
+    with open("events.txt", "a") as f: f.write(name + "\\n")
+
+@tz_fixture(scope=TZFixtureScope.SESSION)
+class Board:
+    def setup(self): event("Board+")
+    def teardown(self): event("Board-")
+
+@tz_testcase
+class TC_Flaky:
+    @tz_step
+    def step1(self, board: Board):
+        # Fails the first time only
+        if not os.path.exists("flaky"):
+            open("flaky", "w").close()
+            return False
+        return True
+
+@tz_testcase
+class TC_Broken:
+    @tz_step
+    def step1(self):
+        return False
+'''
+
+
+def test_test_passing_on_a_rerun_is_flaky(write_suite, run_session):
+    folder = write_suite({"test_reruns.py": SUITE})
+    result = run_session(folder, "--reruns", "2")
+    flaky, broken = result.tests["TC_Flaky"], result.tests["TC_Broken"]
+    assert flaky["status"] == "FLAKY", result.output
+    assert [x["status"] for x in flaky["attempts"]] == ["FAILED", "PASSED"]
+    assert broken["status"] == "FAILED" and len(broken["attempts"]) == 3
+    assert result.session["flaky_tests"] == 1
+
+
+def test_rerun_fresh_sets_up_the_fixtures_again(write_suite, run_session, tmp_path):
+    folder = write_suite({"test_reruns.py": SUITE})
+    result = run_session(folder, "--reruns", "1", "--rerun-fresh")
+    assert result.tests["TC_Flaky"]["status"] == "FLAKY", result.output
+    assert (tmp_path / "events.txt").read_text().splitlines() == ["Board+", "Board-", "Board+", "Board-"]
@@ -0,0 +1,58 @@
+"""Tests of MODULE and PACKAGE scoped fixtures."""
+
+FIXTURES = '''
+from tzen import tz_fixture
+from tzen.tz_fixture import TZFixtureScope
+
+def event(name):
+    with open("events.txt", "a") as f: f.write(name + "\\n")
+
+@tz_fixture(scope=TZFixtureScope.MODULE)
+class Bench:
+    def setup(self): event("Bench+")
+    def teardown(self): event("Bench-")
+
+@tz_fixture(scope=TZFixtureScope.PACKAGE)
+class Lab:
+    def setup(self): event("Lab+")
+    def teardown(self): event("Lab-")
+'''
+
+def _module(prefix, fixture, package=".."):
+    return f'''
+from tzen import tz_testcase, tz_step
+from {package}fx import {fixture}, event
+
+@tz_testcase
+class TC_{prefix}_1:
+    @tz_step
+    def step1(self, x: {fixture}):
+        event("TC_{prefix}_1")
+
+@tz_testcase
+class TC_{prefix}_2:
+    @tz_step
+    def step1(self, x: {fixture}):
+        event("TC_{prefix}_2")
+'''
+
+
+def test_module_fixture_is_torn_down_after_the_last_test_of_its_module(write_suite, run_session, tmp_path):
+    folder = write_suite({"fx.py": FIXTURES, "test_a.py": _module("A", "Bench", "."),
+                          "test_b.py": _module("B", "Bench", ".")})
+    result = run_session(folder)
+    assert result.session["status"] == "PASSED", result.output
+    events = (tmp_path / "events.txt").read_text().splitlines()
+    # Modules run in any order, each one between a setup and a teardown of its own instance
+    blocks = sorted([events[:4], events[4:]], key=lambda x: x[1])
+    assert blocks == [["Bench+", "TC_A_1", "TC_A_2", "Bench-"], ["Bench+", "TC_B_1", "TC_B_2", "Bench-"]]
+
+
+def test_package_fixture_is_shared_by_the_modules_of_a_folder(write_suite, run_session, tmp_path):
+    folder = write_suite({"fx.py": FIXTURES, "hw/__init__.py": "", "hw/test_a.py": _module("A", "Lab"),
+                          "hw/test_b.py": _module("B", "Lab")})
+    result = run_session(folder)
+    assert result.session["status"] == "PASSED", result.output
+    events = (tmp_path / "events.txt").read_text().splitlines()
+    assert events[0] == "Lab+" and events[-1] == "Lab-"
+    assert sorted(events[1:-1]) == ["TC_A_1", "TC_A_2", "TC_B_1", "TC_B_2"]
@@ -0,0 +1,52 @@
+"""Tests of the selection of tests by paths, globs and kinds."""
+
+SUITE = '''
+from tzen import tz_fixture, tz_testcase, tz_step
+
+@tz_fixture
+class Board:
+    def setup(self): pass
+    def teardown(self): pass
+
+@tz_testcase
+class TC_001:
+    @tz_step
+    def step_init(self): return True
+
+@tz_testcase
+class TC_002:
+    @tz_step
+    def step_run(self, board: Board): return True
+
+@tz_testcase
+class TC_100:
+    @tz_step
+    def step_run(self): return True
+'''
+
+
+def _selected(run_session, folder, *selectors):
+    args = [x for selector in selectors for x in ("--selector", selector)]
+    result = run_session(folder, *args)
+    assert result.process.returncode == 0, result.output
+    return sorted(result.tests)
+
+
+def test_globs(write_suite, run_session):
+    folder = write_suite({"api/__init__.py": "", "api/test_api.py": SUITE})
+    assert _selected(run_session, folder, "**/TC_0*") == ["TC_001", "TC_002"]
+    assert _selected(run_session, folder, "*/step_init") == ["TC_001"]
+    assert _selected(run_session, folder, "TC_[!0]*") == ["TC_100"]
+
+
+def test_anchored_glob_and_union(write_suite, run_session):
+    folder = write_suite({"api/__init__.py": "", "api/test_api.py": SUITE})
+    assert _selected(run_session, folder, "/api/*/TC_00?") == ["TC_001", "TC_002"]
+    assert _selected(run_session, folder, "/*/TC_00?") == []
+    assert _selected(run_session, folder, "**/TC_001", "**/TC_100") == ["TC_001", "TC_100"]
+
+
+def test_kind_and_fixture_selectors(write_suite, run_session):
+    folder = write_suite({"api/__init__.py": "", "api/test_api.py": SUITE})
+    assert _selected(run_session, folder, "kind:test") == ["TC_001", "TC_002", "TC_100"]
+    assert _selected(run_session, folder, "**/Board") == ["TC_002"]
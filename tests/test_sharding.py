@@ -0,0 +1,26 @@
+"""Tests of sharded sessions and of the merge of their results."""
+import json
+
+SUITE = "from tzen import tz_testcase, tz_step\n" + "".join(f'''
+@tz_testcase
+class TC_Shard_{i}:
+    @tz_step
+    def step1(self): return {i != 3}
+''' for i in range(8))
+
+
+def test_shards_partition_the_suite_and_merge_into_one_report(write_suite, run_tzen, tmp_path):
+    folder = write_suite({"test_shards.py": SUITE})
+    shards = []
+    for index in (1, 2):
+        results_file = tmp_path / f"shard{index}.jsonl"
+        run_tzen("start-session", str(folder), "--shard", f"{index}/2", "--results-file", str(results_file))
+        shards.append({json.loads(x)["name"] for x in results_file.read_text().splitlines()[1:]})
+    assert not shards[0] & shards[1]
+    assert shards[0] | shards[1] == {f"TC_Shard_{i}" for i in range(8)}
+
+    process = run_tzen("merge-reports", str(tmp_path / "shard1.jsonl"), str(tmp_path / "shard2.jsonl"),
+                       "--report-output-file", str(tmp_path / "merged.html"))
+    assert (tmp_path / "merged.html").exists(), process.stdout + process.stderr
+    # TC_Shard_3 fails, whatever shard ran it
+    assert process.returncode == 1
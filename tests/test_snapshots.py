@@ -0,0 +1,41 @@
+"""Tests of cached fixtures restored from snapshots."""
+
+SUITE = '''
+from tzen import tz_fixture, tz_testcase, tz_step
+from tzen.tz_fixture import TZFixtureScope
+
+@tz_fixture(scope=TZFixtureScope.SESSION, cache=True)
+class CalibrationTables:
+    def setup(self):
+        with open("setups.txt", "a") as f: f.write("CalibrationTables\\n")
+        self.tables = {"gain": VALUE}
+    def teardown(self): pass
+
+@tz_testcase
+class TC_Calibration:
+    @tz_step
+    def step1(self, cal: CalibrationTables):
+        return cal.tables["gain"] == VALUE
+'''
+
+
+def test_snapshot_is_restored_until_the_fixture_changes(write_suite, run_session, run_tzen, tmp_path):
+    folder = write_suite({"test_cal.py": SUITE.replace("VALUE", "2")})
+    for _ in range(2):
+        result = run_session(folder)
+        assert result.session["status"] == "PASSED", result.output
+    assert (tmp_path / "setups.txt").read_text().splitlines() == ["CalibrationTables"]
+    assert list((tmp_path / ".tzen" / "cache" / "CalibrationTables").glob("*.pickle"))
+
+    write_suite({"test_cal.py": SUITE.replace("VALUE", "3")})
+    result = run_session(folder)
+    assert result.session["status"] == "PASSED", result.output
+    assert len((tmp_path / "setups.txt").read_text().splitlines()) == 2
+
+
+def test_clear_cache_forces_a_new_setup(write_suite, run_session, run_tzen, tmp_path):
+    folder = write_suite({"test_cal.py": SUITE.replace("VALUE", "2")})
+    run_session(folder)
+    assert run_tzen("clear-cache", "--fixture", "CalibrationTables").returncode == 0
+    run_session(folder)
+    assert len((tmp_path / "setups.txt").read_text().splitlines()) == 2
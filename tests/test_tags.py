@@ -0,0 +1,44 @@
+"""Tests of the selection of tests by tag expressions."""
+
+SUITE = '''
+from tzen import tz_testcase, tz_step
+
+@tz_testcase(tags=["smoke"])
+class TC_Smoke:
+    @tz_step
+    def step1(self): return True
+
+@tz_testcase(tags=["smoke", "slow"])
+class TC_SmokeSlow:
+    @tz_step
+    def step1(self): return True
+
+@tz_testcase
+class TC_Board:
+    @tz_step(tags=["hw:boardA"])
+    def step1(self): return True
+
+@tz_testcase
+class TC_Untagged:
+    @tz_step
+    def step1(self): return True
+'''
+
+
+def test_tag_expression(write_suite, run_session):
+    folder = write_suite({"test_tagged.py": SUITE})
+    result = run_session(folder, "--tags", "smoke and not slow or hw:boardA")
+    assert result.process.returncode == 0, result.output
+    assert list(result.tests) == ["TC_Smoke", "TC_Board"]
+
+
+def test_negated_tag_keeps_the_order_of_the_suite(write_suite, run_session):
+    folder = write_suite({"test_tagged.py": SUITE})
+    result = run_session(folder, "--tags", "not slow")
+    assert list(result.tests) == ["TC_Smoke", "TC_Board", "TC_Untagged"]
+
+
+def test_unknown_tag_matches_no_test(write_suite, run_session):
+    folder = write_suite({"test_tagged.py": SUITE})
+    result = run_session(folder, "--tags", "nightly")
+    assert result.tests == {}
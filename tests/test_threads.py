@@ -0,0 +1,49 @@
+"""Tests of the thread-pool engine."""
+
+SUITE = '''
+import time
+from tzen import tz_fixture, tz_testcase, tz_step
+from tzen.tz_fixture import TZFixtureScope
+
+@tz_fixture(scope=TZFixtureScope.SESSION)
+class Server:
+    def setup(self):
+        with open("setups.txt", "a") as f: f.write("Server\\n")
+    def teardown(self): pass
+
+@tz_fixture
+class Board:
+    def setup(self): pass
+    def teardown(self): pass
+''' + "".join(f'''
+@tz_testcase
+class TC_Io_{i}:
+    @tz_step
+    def step1(self, server: Server):
+        time.sleep(1)
+        return True
+''' for i in range(4)) + "".join(f'''
+@tz_testcase
+class TC_Board_{i}:
+    @tz_step
+    def step1(self, board: Board):
+        time.sleep(0.3)
+        return True
+''' for i in range(2))
+
+
+def test_threads_overlap_independent_tests(write_suite, run_session, tmp_path):
+    folder = write_suite({"test_threads.py": SUITE})
+    result = run_session(folder, "--threads", "4")
+    assert result.session["passed_tests"] == 6, result.output
+    io_tests = [result.tests[f"TC_Io_{i}"] for i in range(4)]
+    assert max(x["start"] for x in io_tests) < min(x["end"] for x in io_tests)
+    # The SESSION fixture is set up once for all the threads
+    assert (tmp_path / "setups.txt").read_text().splitlines() == ["Server"]
+
+
+def test_threads_never_overlap_tests_sharing_a_test_fixture(write_suite, run_session):
+    folder = write_suite({"test_threads.py": SUITE})
+    result = run_session(folder, "--threads", "4")
+    first, second = sorted((result.tests["TC_Board_0"], result.tests["TC_Board_1"]), key=lambda x: x["start"])
+    assert first["end"] <= second["start"]
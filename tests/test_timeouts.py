@@ -0,0 +1,45 @@
+"""Tests of step and test timeouts."""
+
+SUITE = '''
+import time
+from tzen import tz_fixture, tz_testcase, tz_step
+
+@tz_fixture
+class Device:
+    def setup(self): pass
+    def teardown(self):
+        with open("events.txt", "a") as f: f.write("Device-\\n")
+
+@tz_testcase
+class TC_StepTimeout:
+    @tz_step(timeout=0.5)
+    def step1(self, dev: Device):
+        time.sleep(10)
+
+@tz_testcase(timeout=0.5)
+class TC_TestTimeout:
+    @tz_step
+    def step1(self):
+        time.sleep(0.3)
+        return True
+    @tz_step
+    def step2(self):
+        time.sleep(10)
+
+@tz_testcase
+class TC_InTime:
+    @tz_step(timeout=5)
+    def step1(self):
+        return True
+'''
+
+
+def test_timeouts_fail_the_stuck_test_and_tear_down_its_fixtures(write_suite, run_session, tmp_path):
+    folder = write_suite({"test_timeouts.py": SUITE})
+    result = run_session(folder, timeout=60)
+    assert result.tests["TC_StepTimeout"]["status"] == "FAILED", result.output
+    assert "Step step1 timed out after 0.5s" in result.tests["TC_StepTimeout"]["error"]
+    assert result.tests["TC_TestTimeout"]["status"] == "FAILED"
+    assert result.tests["TC_InTime"]["status"] == "PASSED"
+    assert result.tests["TC_StepTimeout"]["end"] - result.tests["TC_StepTimeout"]["start"] < 5
+    assert (tmp_path / "events.txt").read_text().splitlines() == ["Device-"]
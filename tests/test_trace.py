@@ -0,0 +1,49 @@
+"""Tests of the Chrome trace of a session."""
+import json
+
+SUITE = '''
+import asyncio
+import time
+from tzen import tz_fixture, tz_testcase, tz_step
+from tzen.tz_fixture import TZFixtureScope
+
+@tz_fixture(scope=TZFixtureScope.SESSION)
+class Psu:
+    async def setup(self): await asyncio.sleep(0.2)
+    async def teardown(self): await asyncio.sleep(0.2)
+
+@tz_fixture(scope=TZFixtureScope.SESSION)
+class Scope:
+    async def setup(self): await asyncio.sleep(0.2)
+    async def teardown(self): await asyncio.sleep(0.2)
+
+@tz_fixture(scope=TZFixtureScope.SESSION)
+class Relay:
+    def setup(self): time.sleep(0.2)
+    def teardown(self): time.sleep(0.2)
+
+@tz_testcase
+class TC_Bench:
+    @tz_step
+    async def step1(self, psu: Psu, scope: Scope, relay: Relay):
+        return True
+'''
+
+
+def test_concurrent_async_setups_have_their_own_track(write_suite, run_session, tmp_path):
+    folder = write_suite({"test_bench.py": SUITE})
+    result = run_session(folder, "--trace-file", str(tmp_path / "trace.json"))
+    assert result.session["status"] == "PASSED", result.output
+    events = json.loads((tmp_path / "trace.json").read_text())
+
+    # Begin and end events are nested on every track
+    stacks = {}
+    for event in events:
+        if event["ph"] == "B":
+            stacks.setdefault(event["tid"], []).append(event["name"])
+        elif event["ph"] == "E":
+            assert stacks[event["tid"]].pop() == event["name"]
+    assert all(not x for x in stacks.values())
+
+    setups = {x["name"]: x["tid"] for x in events if x["ph"] == "B" and x["name"].startswith("setup ")}
+    assert len({setups["setup Psu"], setups["setup Scope"], setups["setup Relay"]}) == 3
@@ -14,19 +14,24 @@ __version__ = "0.2.0"
 
 from .tz_test import tz_add_test, tz_add_step
 from .tz_fixture import tz_add_fixture, TZFixtureScope
+from .tz_tags import tz_add_tags
 from .tz_tree import TzTree
 from pathlib import Path
 from typing import List
 
 
-def tz_testcase(*args, requirements:List[str] = [], **kwargs):
-    """This method is used to declare a testcase. This decorator can only be used for classes"""
+def tz_testcase(*args, requirements:List[str] = [], timeout:float|None = None, data=None, tags:List[str] = [], **kwargs):
+    """This method is used to declare a testcase. This decorator can only be used for classes.
+    A test running for more than timeout seconds is interrupted and fails, its fixtures are torn down as usual.
+    A test with data runs its steps for every row of the dataset: a .csv or .jsonl path, relative to the module, an iterable or a callable.
+    Tags are used to select the tests with an expression, see tz_tags."""
     def decorator(test_class):
-        test = tz_add_test(test_class.__name__, test_class)
+        test = tz_add_test(test_class.__name__, test_class, timeout, data)
         test.test_class.__init__ = TzTree().inject(test_class.__init__, test.get_selector())
 
         for r in requirements:
             TzTree().add_object( r, str((Path(test.get_selector()) / r)), kind='requirement')
+        tz_add_tags(test.get_selector(), tags)
 
         return test_class
     
@@ -37,13 +42,16 @@ def tz_testcase(*args, requirements:List[str] = [], **kwargs):
     # If called with parentheses
     return decorator
     
-def tz_step(*args, index = -1, blocking = True, repeat = 1, requirements:List[str] = [], **kwargs):
-    """This decorator is used to declare a step. This decorator can only be used for methods of classes decorated with @TZTest.testcase"""
+def tz_step(*args, index = -1, blocking = True, repeat = 1, requirements:List[str] = [], timeout:float|None = None, data=None, tags:List[str] = [], **kwargs):
+    """This decorator is used to declare a step. This decorator can only be used for methods of classes decorated with @TZTest.testcase
+    A step running for more than timeout seconds is interrupted and fails. A step with data runs for every row of the dataset.
+    The tags of a step are tags of its test too."""
     
     def decorator(func):
-        step = tz_add_step(func.__name__, index, func, blocking, repeat)
+        step = tz_add_step(func.__name__, index, func, blocking, repeat, timeout, data)
         for r in requirements:
             TzTree().add_object( r, str((Path(step.get_selector()) / r)), kind='requirement')
+        tz_add_tags(step.get_selector(), tags, str(Path(step.get_selector()).parent))
 
         return func
     
@@ -52,11 +60,13 @@ def tz_step(*args, index = -1, blocking = True, repeat = 1, requirements:List[st
     
     return decorator
 
-def tz_fixture(*args, scope:TZFixtureScope=TZFixtureScope.TEST):
-    """This method is used to declare a fixture. This decorator can be used on functions of classes that implements the setup and teardown methods."""
+def tz_fixture(*args, scope:TZFixtureScope=TZFixtureScope.TEST, reusable:bool=False, pool_size:int=0, pool_timeout:float|None=None, pool_recycle:int=0, lazy:bool=False, cache:bool=False):
+    """This method is used to declare a fixture. This decorator can be used on functions of classes that implements the setup and teardown methods.
+    Reusable fixtures are kept alive between consecutive tests using them. Pooled fixtures lend one of pool_size instances to every test.
+    Lazy fixtures are set up on their first use by the consumer. Cached fixtures are restored from a snapshot instead of being set up."""
 
     def decorator(func):
-        tz_add_fixture(func.__name__, func, scope)
+        tz_add_fixture(func.__name__, func, scope, reusable, pool_size, pool_timeout, pool_recycle, lazy, cache)
         return func
 
     if len(args) == 1:
@@ -7,6 +7,9 @@
 import typer
 from typing import List
 from .tz_facade import TZFacade
+from .tz_daemon import TZDaemon, TZ_DAEMON_SOCKET, tz_daemon_request
+from .tz_cache import TZFixtureCache
+from .tz_distributed import TZCoordinator, TZAgent, TZ_COORDINATOR_PORT
 from ._tz_logging import tz_getLogger
 
 logger = tz_getLogger( __name__)
@@ -15,14 +18,52 @@ app = typer.Typer()
 @app.command()
 def start_session(
     directory: str,
-    selector: str = "/",
-    config_file: str = None
+    selector: List[str] = typer.Option(["/"], help="Path or glob of the tests to run, e.g. api/**/TC_0* or kind:test, repeat to run the union"),
+    config_file: str = None,
+    trace_file: str = typer.Option(None, help="Write a Chrome Trace Event Format timeline of the session to this file"),
+    memory: bool = typer.Option(False, help="Record memory usage of every test and step and flag leaking tests"),
+    memory_threshold: int = typer.Option(1024 * 1024, help="Retained bytes above which a test is flagged as leaking"),
+    history_file: str = typer.Option(None, help="Append the results of the session to this history store"),
+    concurrency: int = typer.Option(1, help="Maximum number of independent tests running at the same time on the event loop"),
+    threads: int = typer.Option(1, help="Run independent synchronous tests on a pool of N threads"),
+    reorder: bool = typer.Option(False, help="Group the tests using the same fixtures to reduce setups and teardowns"),
+    shard: str = typer.Option(None, help="Run only the i-th of N shards of the suite, e.g. 2/4"),
+    shard_by: str = typer.Option("hash", help="Shard assignment: hash of the test, or duration balanced from the history file"),
+    results_file: str = typer.Option(None, help="Write the results of the session to this file, see merge-reports"),
+    journal_file: str = typer.Option(None, help="Append a crash-safe record of every completed test to this journal"),
+    resume: str = typer.Option(None, help="Resume the session interrupted while writing this journal, skipping the completed tests"),
+    isolate: bool = typer.Option(False, help="Run every test in a process forked from the session, crashes fail the test only"),
+    timeout: float = typer.Option(None, help="Kill isolated tests running longer than this number of seconds"),
+    exitfirst: bool = typer.Option(False, "--exitfirst", "-x", help="Stop the session at the first failed test"),
+    maxfail: int = typer.Option(0, help="Stop the session after N failed tests"),
+    reruns: int = typer.Option(0, help="Run a failed test again up to N times, tests passing on a later attempt are flaky"),
+    rerun_fresh: bool = typer.Option(False, help="Tear down the fixtures of a failed test before running it again"),
+    tags: str = typer.Option(None, "--tags", "-m", help="Run only the tests matching a tag expression, e.g. \"smoke and not slow\"")
 ) -> None:
     """Start a test session.
     Args:
         directory (str): The directory containing the test cases.
-        selector (str): Selector for testcases.
+        selector (List[str]): Selectors for testcases, globs and kind:<kind> are supported.
         config_file (str): Path to the configuration file (optional).
+        trace_file (str): Path of the Chrome trace / Perfetto timeline (optional).
+        memory (bool): Enable the per-test memory profiler.
+        memory_threshold (int): Leak detection threshold in bytes.
+        history_file (str): Path of the JSON Lines history store (optional).
+        concurrency (int): Maximum number of concurrent tests of the asyncio engine.
+        threads (int): Number of worker threads of the thread-pool engine.
+        reorder (bool): Order the tests by the fixtures they use.
+        shard (str): Shard to run, as i/N (optional).
+        shard_by (str): Shard assignment strategy, hash or duration.
+        results_file (str): Path of the JSON Lines results file (optional).
+        journal_file (str): Path of the session journal (optional).
+        resume (str): Journal of the session to resume (optional).
+        isolate (bool): Run every test in a forked process.
+        timeout (float): Timeout of the isolated tests in seconds (optional).
+        exitfirst (bool): Stop at the first failed test, same as maxfail 1.
+        maxfail (int): Number of failed tests stopping the session, 0 to run all the tests.
+        reruns (int): Number of reruns of a failed test.
+        rerun_fresh (bool): Set up the fixtures of a failed test again before its reruns.
+        tags (str): Tag expression selecting the tests (optional).
     """
 
     logger.debug(f"Starting session in directory: {directory}")
@@ -35,7 +76,177 @@ def start_session(
         # Load configuration from the specified file
         facade.load_configuration_from_file(config_file)
     
-    facade.start_session(directory, selector)
+    facade.start_session(directory, selector, trace_file=trace_file, memory=memory, memory_threshold=memory_threshold, history_file=history_file, concurrency=concurrency, threads=threads, reorder=reorder,
+                         shard=shard, shard_by=shard_by, results_file=results_file, journal_file=journal_file, resume=resume,
+                         isolate=isolate, timeout=timeout, maxfail=1 if exitfirst else maxfail, reruns=reruns, rerun_fresh=rerun_fresh, tags=tags)
+
+@app.command()
+def merge_reports(
+    results_files: List[str] = typer.Argument(..., help="Results files written by the shards"),
+    report_output_file: str = typer.Option("./report.html", help="Path of the merged HTML report")
+) -> None:
+    """Merge the results files of several shards into a single report.
+    Args:
+        results_files (List[str]): Results files written with --results-file.
+        report_output_file (str): Path of the merged report.
+    """
+    info = TZFacade().merge_reports(results_files, report_output_file)
+    logger.info(f"Merged {len(results_files)} results files: {info.passed_tests} passed, {info.failed_tests} failed")
+    if info.failed_tests:
+        raise typer.Exit(1)
+
+@app.command()
+def load(
+    directory: str,
+    selector: str,
+    config_file: str = None,
+    users: int = typer.Option(10, help="Number of concurrent virtual users"),
+    duration: float = typer.Option(60.0, help="Duration of the load test in seconds"),
+    ramp_up: float = typer.Option(0.0, help="Seconds over which the users are started"),
+    window: float = typer.Option(1.0, help="Width in seconds of the windows of the throughput and latency report"),
+    results_file: str = typer.Option(None, help="Write the results of the load test to this JSON file")
+) -> None:
+    """Run a testcase as concurrent virtual users looping over its steps.
+    Args:
+        directory (str): The directory containing the test cases.
+        selector (str): Selector of the testcase.
+        config_file (str): Path to the configuration file (optional).
+        users (int): Number of virtual users.
+        duration (float): Duration of the test in seconds.
+        ramp_up (float): Ramp-up period in seconds.
+        window (float): Width of the report windows in seconds.
+        results_file (str): Path of the JSON results (optional).
+    """
+    facade = TZFacade()
+    if config_file:
+        facade.load_configuration_from_file(config_file)
+    
+    info = facade.load_test(directory, selector, users, duration, ramp_up=ramp_up, window=window, results_file=results_file)
+    if info.iterations.errors:
+        raise typer.Exit(1)
+
+@app.command()
+def daemon(
+    directory: str,
+    config_file: str = None,
+    socket_path: str = typer.Option(TZ_DAEMON_SOCKET, "--socket", help="Unix socket the daemon listens on")
+) -> None:
+    """Start a daemon keeping the test modules loaded and the SESSION fixtures alive between runs.
+    Args:
+        directory (str): The directory containing the test cases.
+        config_file (str): Path to the configuration file (optional).
+        socket_path (str): Path of the Unix socket.
+    """
+    facade = TZFacade()
+    
+    if config_file:
+        facade.load_configuration_from_file(config_file)
+    
+    TZDaemon(directory, socket_path).serve()
+
+@app.command()
+def daemon_run(
+    selector: str = "/",
+    report_output_file: str = typer.Option("./report.html", help="Path of the HTML report"),
+    socket_path: str = typer.Option(TZ_DAEMON_SOCKET, "--socket", help="Unix socket of the daemon"),
+    threads: int = typer.Option(1, help="Run independent synchronous tests on a pool of N threads"),
+    reorder: bool = typer.Option(False, help="Group the tests using the same fixtures to reduce setups and teardowns")
+) -> None:
+    """Run a session on a running daemon.
+    Args:
+        selector (str): Selector for testcases.
+        report_output_file (str): Path of the HTML report.
+        socket_path (str): Path of the Unix socket.
+        threads (int): Number of worker threads of the thread-pool engine.
+        reorder (bool): Order the tests by the fixtures they use.
+    """
+    response = tz_daemon_request({"command": "run", "selector": selector, "report_output_file": report_output_file, "threads": threads, "reorder": reorder}, socket_path)
+    
+    if response["status"] == "error":
+        logger.error(response["error"])
+        raise typer.Exit(2)
+    
+    logger.info(f"Reloaded modules: {len(response['reloaded'])}, reused fixtures: {response['reused']}, rebuilt fixtures: {response['stale']}")
+    logger.info(f"{response['status']}: {response['passed']} passed, {response['failed']} failed. Report: {response['report']}")
+    if response["status"] != "PASSED":
+        raise typer.Exit(1)
+
+@app.command()
+def daemon_stop(
+    socket_path: str = typer.Option(TZ_DAEMON_SOCKET, "--socket", help="Unix socket of the daemon")
+) -> None:
+    """Stop a running daemon, tearing down its fixtures."""
+    tz_daemon_request({"command": "stop"}, socket_path)
+
+@app.command()
+def clear_cache(
+    fixture: str = typer.Option(None, help="Only remove the snapshots of this fixture"),
+    config_file: str = None,
+    cache_dir: str = typer.Option(None, help="Folder of the fixture snapshots (default: fixture_cache_dir configuration or .tzen/cache)")
+) -> None:
+    """Remove the snapshots of cached fixtures, forcing their setup at the next session.
+    Args:
+        fixture (str): Name of the fixture (optional, all the fixtures by default).
+        config_file (str): Path to the configuration file (optional).
+        cache_dir (str): Folder of the snapshots (optional).
+    """
+    if config_file:
+        TZFacade().load_configuration_from_file(config_file)
+    
+    removed = TZFixtureCache(cache_dir).clear(fixture)
+    logger.info(f"Removed {removed} fixture snapshots")
+
+@app.command()
+def coordinator(
+    directory: str,
+    selector: str = "/",
+    config_file: str = None,
+    host: str = typer.Option("127.0.0.1", help="Address the coordinator listens on, e.g. 0.0.0.0 for every interface. The protocol is not authenticated"),
+    port: int = typer.Option(TZ_COORDINATOR_PORT, help="TCP port the coordinator listens on"),
+    lease_timeout: float = typer.Option(60.0, help="Seconds without heartbeats after which the test of an agent is re-queued"),
+    max_attempts: int = typer.Option(3, help="Leases of a test lost before reporting it as failed"),
+    report_output_file: str = typer.Option("./report.html", help="Path of the HTML report"),
+    results_file: str = typer.Option(None, help="Write the results of the session to this file")
+) -> None:
+    """Serve the tests of a folder to tzen agents and collect their results.
+    Args:
+        directory (str): The directory containing the test cases.
+        selector (str): Selector for testcases.
+        config_file (str): Path to the configuration file (optional).
+        host (str): Listening address.
+        port (int): Listening TCP port.
+        lease_timeout (float): Lease timeout in seconds.
+        max_attempts (int): Maximum number of leases of a test.
+        report_output_file (str): Path of the HTML report.
+        results_file (str): Path of the JSON Lines results file (optional).
+    """
+    if config_file:
+        TZFacade().load_configuration_from_file(config_file)
+    
+    info = TZCoordinator(directory, selector, host, port, lease_timeout, max_attempts).serve(report_output_file, results_file)
+    if info.failed_tests:
+        raise typer.Exit(1)
+
+@app.command()
+def agent(
+    directory: str,
+    config_file: str = None,
+    host: str = typer.Option("127.0.0.1", help="Address of the coordinator"),
+    port: int = typer.Option(TZ_COORDINATOR_PORT, help="TCP port of the coordinator"),
+    name: str = typer.Option(None, help="Name of the agent (default: host name and process id)")
+) -> None:
+    """Pull tests from a coordinator and run them until the queue is empty.
+    Args:
+        directory (str): The local copy of the directory containing the test cases.
+        config_file (str): Path to the configuration file (optional).
+        host (str): Address of the coordinator.
+        port (int): TCP port of the coordinator.
+        name (str): Name of the agent (optional).
+    """
+    if config_file:
+        TZFacade().load_configuration_from_file(config_file)
+    
+    TZAgent(directory, host, port, name).run()
 
 @app.command()
 def build_doc(
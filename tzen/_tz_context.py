@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Author:   Lorenzo Furcas (TopFirmino)
+# License:  MIT – see the LICENSE file in the repository root for details.
+# ---------------------------------------------------------------------------
+"""Context variables shared by the execution engines. Context variables follow both threads and asyncio tasks,
+so they identify the worker that is executing a test whatever the engine is."""
+
+from __future__ import annotations
+from contextvars import ContextVar
+
+# Name of the worker executing the current test, None for the main sequential engine
+TZ_WORKER:ContextVar[str | None] = ContextVar("tz_worker", default=None)
+
+# Test run being executed, used to lend pooled fixture instances to their consumers
+TZ_CURRENT_RUN:ContextVar[object | None] = ContextVar("tz_current_run", default=None)
+
+# Fixture instances of the virtual user executing the current code, see tz_load
+TZ_USER_FIXTURES:ContextVar[dict | None] = ContextVar("tz_user_fixtures", default=None)
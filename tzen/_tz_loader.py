@@ -149,5 +149,19 @@ def import_all_modules_in_directory(directory: str) -> Mapping[str, Any]:
                         m = importlib.import_module(module_name)
  
     return imported_modules
+
+def tz_module_name(directory: str, path: str) -> str:
+    """Name under which import_all_modules_in_directory imports the file at path."""
+    parent_dir = os.path.dirname(os.path.abspath(directory))
+    return os.path.relpath(os.path.abspath(path)[:-3], parent_dir).replace(os.path.sep, '.')
+
+def reload_module(directory: str, path: str):
+    """Import again a single module of a directory previously loaded with import_all_modules_in_directory.
+    The caller is in charge of removing the objects registered by the previous version of the module."""
+    module_name = tz_module_name(directory, path)
+    importlib.invalidate_caches()
+    sys.modules.pop(module_name, None)
+    with future_annotations_for_tree(os.path.abspath(directory)):
+        return importlib.import_module(module_name)
             
 
@@ -5,6 +5,7 @@
 # License:  MIT – see the LICENSE file in the repository root for details.
 # ---------------------------------------------------------------------------
 import logging
+from ._tz_overhead import tz_overhead_section
 from rich.logging import RichHandler
 from rich.console import Console
 
@@ -85,10 +86,12 @@ root_handler.setFormatter(logging.Formatter('%(name)s:\t%(message)s'))
 root_logger.addHandler(root_handler)
 
 #Configuring logger root for user defines testcases
+# The loggers of the tests and of the fixtures are created without a level and inherit the one of their root:
+# Logger.setLevel clears the cached levels of every logger, calling it for each of them would be quadratic
 TZEN_ROOT_TEST_LOGGER_NAME = TZEN_ROOT_LOGGER_NAME + ".test"
 root_test_logger = logging.getLogger(TZEN_ROOT_TEST_LOGGER_NAME)
 root_test_logger.propagate = False
-root_test_logger.setLevel(logging.INFO)
+root_test_logger.setLevel(logging.DEBUG)
 root_test_handler = RichHandler(console=TZEN_GLOBAL_CONSOLE, rich_tracebacks=True, show_path=False, omit_repeated_times=False, markup=True)
 root_test_handler.setFormatter(TZTestFormatter())
 root_test_logger.addHandler(root_test_handler)
@@ -97,7 +100,7 @@ root_test_logger.addHandler(root_test_handler)
 TZEN_ROOT_FIXTURE_LOGGER_NAME = TZEN_ROOT_TEST_LOGGER_NAME + ".fixture"
 root_fixture_logger = logging.getLogger(TZEN_ROOT_FIXTURE_LOGGER_NAME)
 root_fixture_logger.propagate = False
-root_fixture_logger.setLevel(logging.INFO)
+root_fixture_logger.setLevel(logging.DEBUG)
 root_fixture_handler = RichHandler(console=TZEN_GLOBAL_CONSOLE, rich_tracebacks=True, show_path=False, omit_repeated_times=False, markup=True)
 root_fixture_handler.setFormatter(TZFixtureFormatter())
 root_fixture_logger.addHandler(root_fixture_handler)
@@ -112,9 +115,10 @@ def tz_getLogger(name: str, level: int = logging.INFO) -> logging.Logger:
 
 class TZTestLogger():
     
-    def __init__(self, test_name:str, test_step_num:int, level=logging.DEBUG) -> None:
+    def __init__(self, test_name:str, test_step_num:int, level=logging.NOTSET) -> None:
         self.logger = logging.getLogger(f"{TZEN_ROOT_TEST_LOGGER_NAME}.{test_name}")
-        self.logger.setLevel(level)  # opzionale, ma utile per override locale
+        if level != self.logger.level:
+            self.logger.setLevel(level)  # opzionale, ma utile per override locale
         self.extras = {
             "test_name": test_name,
             "test_step": 0,
@@ -125,30 +129,37 @@ class TZTestLogger():
         self.extras["test_step"] = step
     
     def debug(self, msg, *args, **kwargs):
-        return self.logger.debug(msg, *args, extra=self.extras, **kwargs)
+        with tz_overhead_section("logging"):
+            return self.logger.debug(msg, *args, extra=self.extras, **kwargs)
 
     def info(self, msg, *args, show_step_info=True, **kwargs):
-        _xtra = self.extras.copy()
-        _xtra["show_step_info"] = show_step_info
-        return self.logger.info(msg, *args, extra=_xtra, **kwargs)
+        with tz_overhead_section("logging"):
+            _xtra = self.extras.copy()
+            _xtra["show_step_info"] = show_step_info
+            return self.logger.info(msg, *args, extra=_xtra, **kwargs)
 
     def warning(self, msg, *args, **kwargs):
-        return self.logger.warning(msg, *args, extra=self.extras, **kwargs)
+        with tz_overhead_section("logging"):
+            return self.logger.warning(msg, *args, extra=self.extras, **kwargs)
 
     def error(self, msg, *args, **kwargs):
-        return self.logger.error(msg, *args, extra=self.extras, **kwargs)
+        with tz_overhead_section("logging"):
+            return self.logger.error(msg, *args, extra=self.extras, **kwargs)
 
     def critical(self, msg, *args, **kwargs):
-        return self.logger.critical(msg, *args, extra=self.extras, **kwargs)
+        with tz_overhead_section("logging"):
+            return self.logger.critical(msg, *args, extra=self.extras, **kwargs)
 
     def exception(self, msg, *args, **kwargs):
-        return self.logger.exception(msg, *args, extra=self.extras, **kwargs)
+        with tz_overhead_section("logging"):
+            return self.logger.exception(msg, *args, extra=self.extras, **kwargs)
 
 class TZFixtureLogger(TZTestLogger):
     
-    def __init__(self, fixture_name:str, level=logging.DEBUG) -> None:
+    def __init__(self, fixture_name:str, level=logging.NOTSET) -> None:
         self.logger = logging.getLogger(f"{TZEN_ROOT_FIXTURE_LOGGER_NAME}.{fixture_name}")
-        self.logger.setLevel(level)  # opzionale, ma utile per override locale
+        if level != self.logger.level:
+            self.logger.setLevel(level)  # opzionale, ma utile per override locale
         self.extras = {
             "fixture_name": fixture_name,
         }
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Author:   Lorenzo Furcas (TopFirmino)
+# License:  MIT – see the LICENSE file in the repository root for details.
+# ---------------------------------------------------------------------------
+"""Attribution of the time spent by a test run to user code and to framework code.
+Every test run owns a TZOverheadMeter stored in a context variable. Instrumented sections push their category on the
+meter and the elapsed time is always charged to the innermost category, so nested sections are never counted twice.
+Time not covered by any section is charged to the generic 'framework' category."""
+
+from __future__ import annotations
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List
+
+# Categories charged to the code written by the user
+TZ_USER_CATEGORIES = ("step", "construction", "fixture")
+# Categories charged to tzen itself
+TZ_FRAMEWORK_CATEGORIES = ("inject", "notify", "teardown_scan", "logging", "framework")
+
+_TZ_METER:ContextVar[TZOverheadMeter | None] = ContextVar("tz_overhead_meter", default=None)
+
+
+class TZOverheadMeter:
+    """Exclusive-time accounting of a single test run."""
+
+    __slots__ = ("totals", "_stack", "_mark")
+
+    def __init__(self) -> None:
+        self.totals:Dict[str, float] = {}
+        self._stack:List[str] = []
+        self._mark = 0.0
+
+    def enter(self, category:str) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            _top = self._stack[-1]
+            self.totals[_top] = self.totals.get(_top, 0.0) + now - self._mark
+        self._stack.append(category)
+        self._mark = now
+
+    def exit(self) -> None:
+        now = time.perf_counter()
+        _top = self._stack.pop()
+        self.totals[_top] = self.totals.get(_top, 0.0) + now - self._mark
+        self._mark = now
+
+    def start(self):
+        """Activate the meter in the current context. Returns the token used by stop."""
+        self.enter("framework")
+        return _TZ_METER.set(self)
+
+    def stop(self, token) -> Dict[str, float]:
+        """Deactivate the meter and return the time spent in every category."""
+        _TZ_METER.reset(token)
+        while self._stack:
+            self.exit()
+        return self.totals
+
+
+class tz_overhead_section:
+    """Context manager that charges the enclosed code to a category of the active meter, if any."""
+
+    __slots__ = ("category", "meter")
+
+    def __init__(self, category:str) -> None:
+        self.category = category
+        self.meter = None
+
+    def __enter__(self):
+        self.meter = _TZ_METER.get()
+        if self.meter is not None:
+            self.meter.enter(self.category)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.meter is not None:
+            self.meter.exit()
+
+def tz_overhead_wrap(func:Callable, category:str) -> Callable:
+    """Wrap a callable so that its execution is charged to a category of the active meter, if any."""
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def _async_wrapper(*args, **kwargs):
+            meter = _TZ_METER.get()
+            if meter is None:
+                return await func(*args, **kwargs)
+            meter.enter(category)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                meter.exit()
+
+        return _async_wrapper
+
+    @functools.wraps(func)
+    def _wrapper(*args, **kwargs):
+        meter = _TZ_METER.get()
+        if meter is None:
+            return func(*args, **kwargs)
+        meter.enter(category)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            meter.exit()
+
+    return _wrapper
+
+def tz_overhead_split(totals:Dict[str, float]) -> Dict[str, float]:
+    """Summarize a category breakdown in user and framework time."""
+    return {
+        "user": sum(v for k, v in totals.items() if k in TZ_USER_CATEGORIES),
+        "framework": sum(v for k, v in totals.items() if k not in TZ_USER_CATEGORIES),
+    }
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Author:   Lorenzo Furcas (TopFirmino)
+# License:  MIT – see the LICENSE file in the repository root for details.
+# ---------------------------------------------------------------------------
+"""Helpers used to account the resources consumed by tests and steps. Values are taken from getrusage, per thread
+when the platform supports it so that tests running on other threads do not pollute each other, per process otherwise.
+Tests run concurrently by the asyncio engine share the thread of the event loop: their resources are not measured."""
+
+from __future__ import annotations
+import sys
+from .tz_types import TZResourceUsage
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+_RUSAGE_WHO = getattr(resource, "RUSAGE_THREAD", getattr(resource, "RUSAGE_SELF", None))
+
+# Linux reports kilobytes, macOS reports bytes
+_MAXRSS_SCALE = 1 if sys.platform == "darwin" else 1024
+
+def tz_resource_usage() -> TZResourceUsage:
+    """Returns the resources consumed so far by the calling thread (or process)."""
+    if resource is None:
+        return TZResourceUsage()
+    
+    _r = resource.getrusage(_RUSAGE_WHO)
+    return TZResourceUsage(
+        user_time=_r.ru_utime,
+        system_time=_r.ru_stime,
+        max_rss=_r.ru_maxrss * _MAXRSS_SCALE,
+        voluntary_switches=_r.ru_nvcsw,
+        involuntary_switches=_r.ru_nivcsw,
+        block_input=_r.ru_inblock,
+        block_output=_r.ru_oublock,
+    )
+
+def tz_resource_delta(before:TZResourceUsage, after:TZResourceUsage) -> TZResourceUsage:
+    """Returns the resources consumed between two samples. The max RSS is the high-water mark reached at the end."""
+    return TZResourceUsage(
+        user_time=after.user_time - before.user_time,
+        system_time=after.system_time - before.system_time,
+        max_rss=after.max_rss,
+        voluntary_switches=after.voluntary_switches - before.voluntary_switches,
+        involuntary_switches=after.involuntary_switches - before.involuntary_switches,
+        block_input=after.block_input - before.block_input,
+        block_output=after.block_output - before.block_output,
+    )
+
+def tz_resource_sum(first:TZResourceUsage, second:TZResourceUsage) -> TZResourceUsage:
+    """Returns the resources consumed by two runs, e.g. two rows of a data-driven test. The max RSS is the highest."""
+    return TZResourceUsage(
+        user_time=first.user_time + second.user_time,
+        system_time=first.system_time + second.system_time,
+        max_rss=max(first.max_rss, second.max_rss),
+        voluntary_switches=first.voluntary_switches + second.voluntary_switches,
+        involuntary_switches=first.involuntary_switches + second.involuntary_switches,
+        block_input=first.block_input + second.block_input,
+        block_output=first.block_output + second.block_output,
+    )
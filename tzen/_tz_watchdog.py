@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Author:   Lorenzo Furcas (TopFirmino)
+# License:  MIT – see the LICENSE file in the repository root for details.
+# ---------------------------------------------------------------------------
+"""Timeouts of tests and steps.
+Synchronous code is guarded by a single watchdog thread, started on the first armed deadline: when a deadline expires
+the stack of the guarded thread is dumped and a TZTimeoutError is raised in it. Threads blocked in a system call are
+only interrupted if they are the main thread, which is woken up with SIGALRM; other threads are interrupted as soon
+as they run Python code again. Coroutines are guarded by cancelling their task, see tz_wait_for."""
+
+from __future__ import annotations
+import asyncio
+import ctypes
+import heapq
+import io
+import itertools
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+
+
+class TZTimeoutError(Exception):
+    """Raised in a test or step running past its timeout."""
+
+    message = "Timeout expired"
+
+    def __init__(self, message:str | None = None) -> None:
+        # Exceptions raised asynchronously are instantiated without arguments, their message is a class attribute
+        super().__init__(message or self.message)
+
+
+class _TZDeadline:
+
+    __slots__ = ("deadline", "thread", "what", "timeout", "fired", "active")
+
+    def __init__(self, deadline:float, thread:int, what:str, timeout:float) -> None:
+        self.deadline = deadline
+        self.thread = thread
+        self.what = what
+        self.timeout = timeout
+        self.fired = False
+        self.active = True
+
+
+class _TZWatchdog:
+
+    def __init__(self) -> None:
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            # The watchdog thread does not survive a fork, see TZSession isolate
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        self._lock = threading.RLock()
+        self._wakeup = threading.Condition(self._lock)
+        self._heap = []
+        self._counter = itertools.count()
+        self._thread = None
+        self._signals = False
+        # Deadline fired on the main thread and not yet raised by the signal handler
+        self._pending:_TZDeadline | None = None
+
+    def arm(self, timeout:float, what:str) -> _TZDeadline:
+        """Guard the calling thread for timeout seconds."""
+        if threading.current_thread() is threading.main_thread():
+            self._install_handler()
+
+        guard = _TZDeadline(time.monotonic() + timeout, threading.get_ident(), what, timeout)
+        with self._lock:
+            heapq.heappush(self._heap, (guard.deadline, next(self._counter), guard))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="tzen-watchdog", daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+        return guard
+
+    def disarm(self, guard:_TZDeadline) -> None:
+        with self._lock:
+            guard.active = False
+            if self._pending is guard:
+                self._pending = None
+            elif guard.fired and guard.thread != threading.main_thread().ident:
+                # Drop the exception if it has not been raised yet
+                ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(guard.thread), None)
+
+    def _install_handler(self) -> None:
+        if self._signals or not hasattr(signal, "pthread_kill"):
+            return
+        # Never replace the handler of the application
+        if signal.getsignal(signal.SIGALRM) in (signal.SIG_DFL, self._on_alarm):
+            signal.signal(signal.SIGALRM, self._on_alarm)
+            self._signals = True
+
+    def _on_alarm(self, signum, frame) -> None:
+        with self._lock:
+            guard, self._pending = self._pending, None
+        if guard is not None and guard.active:
+            raise self._exception(guard, frame)
+
+    def _exception(self, guard:_TZDeadline, frame) -> type:
+        _stack = io.StringIO()
+        traceback.print_stack(frame, limit=16, file=_stack)
+        _message = f"{guard.what} timed out after {guard.timeout}s, stack of the stuck thread:\n{_stack.getvalue()}"
+        return type(TZTimeoutError.__name__, (TZTimeoutError,), {"message": _message})
+
+    def _loop(self) -> None:
+        with self._lock:
+            while True:
+                while self._heap and not self._heap[0][2].active:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._wakeup.wait()
+                    continue
+
+                _left = self._heap[0][0] - time.monotonic()
+                if _left > 0:
+                    self._wakeup.wait(_left)
+                    continue
+
+                guard = heapq.heappop(self._heap)[2]
+                guard.fired = True
+                if guard.thread == threading.main_thread().ident and self._signals:
+                    self._pending = guard
+                    signal.pthread_kill(guard.thread, signal.SIGALRM)
+                else:
+                    frame = sys._current_frames().get(guard.thread)
+                    if frame is not None:
+                        ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(guard.thread), ctypes.py_object(self._exception(guard, frame)))
+
+
+_WATCHDOG = _TZWatchdog()
+
+def tz_arm_timeout(timeout:float, what:str) -> _TZDeadline:
+    """Raise a TZTimeoutError in the calling thread if it is still guarded after timeout seconds."""
+    return _WATCHDOG.arm(timeout, what)
+
+def tz_disarm_timeout(guard:_TZDeadline) -> None:
+    _WATCHDOG.disarm(guard)
+
+
+async def tz_wait_for(awaitable, timeout:float, what:str):
+    """Await with a timeout. On expiry the stack of the task is dumped in the TZTimeoutError, then the task is cancelled."""
+    task = asyncio.ensure_future(awaitable)
+    done, _ = await asyncio.wait({task}, timeout=timeout)
+    if task in done:
+        return task.result()
+
+    _stack = io.StringIO()
+    task.print_stack(file=_stack)
+    task.cancel()
+    try:
+        await task
+    except BaseException:
+        pass
+    raise TZTimeoutError(f"{what} timed out after {timeout}s, stack of the stuck task:\n{_stack.getvalue()}")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Author:   Lorenzo Furcas (TopFirmino)
+# License:  MIT – see the LICENSE file in the repository root for details.
+# ---------------------------------------------------------------------------
+"""This module implements the on-disk cache of fixture snapshots.
+Snapshots are pickled set-up fixture instances stored under <cache dir>/<fixture name>/<key>.pickle, where the key is
+the content address computed by TZFixtureContainer.cache_key. The folder is read from the `fixture_cache_dir`
+configuration value, `.tzen/cache` by default."""
+
+from __future__ import annotations
+import os
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Tuple
+
+from . import tz_constants as conf
+from ._tz_logging import tz_getLogger
+
+logger = tz_getLogger(__name__)
+
+TZ_FIXTURE_CACHE_DIR = ".tzen/cache"
+
+
+def _unlink(path:Path) -> None:
+    # Path.unlink(missing_ok=True) is only available from Python 3.8
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class TZFixtureCache:
+    """Content-addressed store of fixture snapshots."""
+
+    def __init__(self, path:str | None = None) -> None:
+        self.path = Path(path or getattr(conf, "fixture_cache_dir", TZ_FIXTURE_CACHE_DIR)).absolute()
+
+    def _file(self, name:str, key:str) -> Path:
+        return self.path / name / f"{key}.pickle"
+
+    def load(self, name:str, key:str) -> Tuple[bool, Any]:
+        """Returns whether a snapshot exists and the restored instance. Unreadable snapshots are discarded."""
+        _file = self._file(name, key)
+        if not _file.exists():
+            return False, None
+        try:
+            with open(_file, 'rb') as f:
+                return True, pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable snapshot of fixture '{name}': {e}")
+            _unlink(_file)
+            return False, None
+
+    def store(self, name:str, key:str, instance:Any) -> bool:
+        """Write the snapshot of an instance. Instances that cannot be pickled are not cached."""
+        _file = self._file(name, key)
+        _file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=_file.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(instance, f, protocol=pickle.HIGHEST_PROTOCOL)
+            # Readers never see a partial snapshot
+            os.replace(tmp, _file)
+            return True
+        except Exception as e:
+            logger.warning(f"Cannot snapshot fixture '{name}': {e}")
+            _unlink(Path(tmp))
+            return False
+
+    def clear(self, name:str | None = None) -> int:
+        """Remove the snapshots of a fixture, or of all the fixtures. Returns the number of snapshots removed."""
+        _root = self.path / name if name else self.path
+        if not _root.exists():
+            return 0
+        removed = sum(1 for _ in _root.rglob("*.pickle"))
+        shutil.rmtree(_root)
+        return removed
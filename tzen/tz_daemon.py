@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Author:   Lorenzo Furcas (TopFirmino)
+# License:  MIT – see the LICENSE file in the repository root for details.
+# ---------------------------------------------------------------------------
+"""This module implements the tzen daemon: a long-lived process that keeps the test modules imported and the SESSION
+fixtures set up between runs. Run requests are received as JSON lines over a local Unix socket.
+Before every run the modules changed on disk are reloaded; the fixtures whose source did not change keep their
+instances, the others (and the fixtures depending on them) are torn down and set up again by the next session."""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import socket
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .tz_facade import TZFacade
+from .tz_fixture import _TZEN_FIXTURES_, TZFixtureScope, tz_forget_fixtures, tz_fixture_source_hash, tz_fixture_graph, tz_inject_fixtures
+from .tz_test import _TZEN_TESTS_, tz_forget_module
+from .tz_tree import TzTree
+from ._tz_loader import import_all_modules_in_directory, reload_module, tz_module_name
+from ._tz_logging import tz_getLogger
+
+logger = tz_getLogger(__name__)
+
+TZ_DAEMON_SOCKET = ".tzen.sock"
+
+
+class TZDaemon:
+    """Daemon serving run requests for the tests of a folder."""
+
+    def __init__(self, tests_folder:str, socket_path:str = TZ_DAEMON_SOCKET) -> None:
+        self.directory = Path(tests_folder).absolute()
+        self.socket_path = str(Path(socket_path).absolute())
+        self.facade = TZFacade()
+        self._files:Dict[str, str | None] = {}
+        self._hashes:Dict[str, str] = {}
+        self._running = False
+
+    # ---- modules -------------------------------------------------------------
+
+    def _scan(self) -> Dict[str, str]:
+        """Content hash of every module of the folder."""
+        files = {}
+        for root, dirs, names in os.walk(self.directory):
+            if '__pycache__' in root:
+                continue
+            for name in names:
+                if name.endswith('.py'):
+                    path = os.path.join(root, name)
+                    with open(path, 'rb') as f:
+                        files[path] = hashlib.sha256(f.read()).hexdigest()
+        return files
+
+    def load(self) -> None:
+        import_all_modules_in_directory(str(self.directory))
+        self._files = self._scan()
+        self._hashes = {k: tz_fixture_source_hash(v) for k, v in _TZEN_FIXTURES_.items()}
+
+    def refresh(self) -> Dict[str, List[str]]:
+        """Reload the modules changed since the last run and release the fixtures that cannot be reused."""
+        files = self._scan()
+        changed = sorted(x for x in set(files) | set(self._files) if files.get(x) != self._files.get(x))
+        if not changed:
+            return {"reloaded": [], "reused": [], "stale": []}
+
+        old = {}
+        for path in changed:
+            name = tz_module_name(str(self.directory), path)
+            tz_forget_module(name)
+            old.update(tz_forget_fixtures(name))
+
+        reloaded = []
+        for path in changed:
+            if path not in files:
+                continue
+            try:
+                reload_module(str(self.directory), path)
+                reloaded.append(path)
+            except Exception as e:
+                # Retried at the next run, even if the file does not change
+                logger.error(f"Cannot reload {path}: {e}")
+                files[path] = None
+        tz_inject_fixtures(sorted(old))
+
+        # Fixtures with an unchanged definition keep their instances
+        reused, stale = [], set()
+        for name, fix in old.items():
+            new = _TZEN_FIXTURES_.get(name)
+            if new is not None and fix.is_setup and tz_fixture_source_hash(new) == self._hashes.get(name):
+                new.adopt(fix)
+                reused.append(name)
+            else:
+                stale.add(name)
+
+        # Fixtures built on top of a stale fixture hold a reference to it, they are rebuilt too
+        graph = tz_fixture_graph(TzTree(), list(TZFixtureScope))
+        dependents = set()
+        while True:
+            _new = {k for k, deps in graph.items() if deps & (stale | dependents) and k not in stale | dependents}
+            if not _new:
+                break
+            dependents |= _new
+
+        for name in sorted(dependents):
+            _TZEN_FIXTURES_[name].teardown()
+        reused = [x for x in reused if x not in dependents]
+        for name in sorted(stale):
+            old[name].teardown()
+
+        self._files = files
+        self._hashes = {k: tz_fixture_source_hash(v) for k, v in _TZEN_FIXTURES_.items()}
+        return {"reloaded": reloaded, "reused": sorted(reused), "stale": sorted(stale | dependents)}
+
+    # ---- runs ----------------------------------------------------------------
+
+    def run(self, selector:str = '/', report_output_file:str = "./report.html", **kwargs) -> Dict[str, Any]:
+        """Run a session keeping the SESSION fixtures alive. Accepts the options of TZFacade.run_session."""
+        changes = self.refresh()
+
+        # Observers of the previous sessions are still attached to the long-lived tests and fixtures
+        for test in _TZEN_TESTS_.values():
+            test.detach_all()
+        for fix in _TZEN_FIXTURES_.values():
+            fix.detach_all()
+
+        session = self.facade.run_session(str(self.directory), selector, report_output_file, keep_fixtures=True, **kwargs)
+        return {
+            "status": session.info.status.name,
+            "executed": session.info.executed_tests,
+            "passed": session.info.passed_tests,
+            "failed": session.info.failed_tests,
+            "report": str(Path(report_output_file).absolute()),
+            **changes,
+        }
+
+    def shutdown(self) -> None:
+        """Tear down all the fixtures still alive."""
+        for fix in _TZEN_FIXTURES_.values():
+            try:
+                fix.teardown()
+            except Exception as e:
+                logger.error(f"Teardown of fixture '{fix.name}' failed: {e}")
+
+    # ---- server --------------------------------------------------------------
+
+    def _handle(self, request:Dict[str, Any]) -> Dict[str, Any]:
+        command = request.pop("command", "run")
+        if command == "run":
+            return self.run(**request)
+        if command == "ping":
+            return {"status": "ready", "fixtures": sorted(k for k, v in _TZEN_FIXTURES_.items() if v.is_setup)}
+        if command == "stop":
+            self._running = False
+            return {"status": "stopped"}
+        raise ValueError(f"Unknown command {command}")
+
+    def serve(self) -> None:
+        """Load the tests and serve requests until a stop command is received."""
+        if not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("The tzen daemon requires Unix domain sockets")
+
+        self.load()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        self._running = True
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+            server.bind(self.socket_path)
+            server.listen()
+            logger.info(f"tzen daemon listening on {self.socket_path}")
+            try:
+                while self._running:
+                    conn, _ = server.accept()
+                    with conn, conn.makefile('r', encoding='utf-8') as rfile, conn.makefile('w', encoding='utf-8') as wfile:
+                        line = rfile.readline()
+                        try:
+                            response = self._handle(json.loads(line))
+                        except Exception as e:
+                            logger.exception("Request failed")
+                            response = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+                        wfile.write(json.dumps(response) + "\n")
+            finally:
+                self.shutdown()
+                os.unlink(self.socket_path)
+
+
+def tz_daemon_request(request:Dict[str, Any], socket_path:str = TZ_DAEMON_SOCKET) -> Dict[str, Any]:
+    """Send a request to a running daemon and wait for its response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(str(Path(socket_path).absolute()))
+        with client.makefile('r', encoding='utf-8') as rfile, client.makefile('w', encoding='utf-8') as wfile:
+            wfile.write(json.dumps(request) + "\n")
+            wfile.flush()
+            return json.loads(rfile.readline())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Author:   Lorenzo Furcas (TopFirmino)
+# License:  MIT – see the LICENSE file in the repository root for details.
+# ---------------------------------------------------------------------------
+"""This module implements the datasets of data-driven tests and steps.
+A dataset is read lazily, one row at a time, so that its size does not matter: it is either the path of a .csv file
+(rows are dicts), of a .jsonl file (rows are JSON values), a callable returning an iterable, or an iterable.
+The result of every row is aggregated in a TZCasesInfo, keeping the details of the first failures only."""
+
+from __future__ import annotations
+import csv
+import json
+import sys
+from pathlib import Path
+from typing import Any, Iterator
+
+from . import tz_constants as conf
+from .tz_types import TZCasesInfo, TZCaseFailure
+
+# Number of failed sub-cases kept in full by default, see the `max_case_failures` configuration value
+TZ_MAX_CASE_FAILURES = 100
+
+
+def tz_dataset(data:Any, module:str) -> Any:
+    """Resolve the relative paths of a dataset against the folder of the module declaring it."""
+    if isinstance(data, (str, Path)) and not Path(data).is_absolute():
+        return Path(sys.modules[module].__file__).parent / data
+    return data
+
+def tz_iter_dataset(data:Any) -> Iterator[Any]:
+    """Iterate over the rows of a dataset without loading it."""
+    if isinstance(data, (str, Path)):
+        path = Path(data)
+        if path.suffix == ".csv":
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                yield from csv.DictReader(f)
+        elif path.suffix in (".jsonl", ".ndjson"):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        else:
+            raise ValueError(f"Unsupported dataset {path}, expected a .csv or .jsonl file")
+    elif callable(data):
+        yield from data()
+    else:
+        yield from data
+
+def tz_record_case(cases:TZCasesInfo, index:int, row:Any, passed:bool, error:str | None = None) -> bool:
+    """Aggregate the result of a sub-case. Returns True if the failure has been kept in full."""
+    cases.total += 1
+    if passed:
+        cases.passed += 1
+        return False
+    
+    cases.failed += 1
+    if len(cases.failures) < getattr(conf, "max_case_failures", TZ_MAX_CASE_FAILURES):
+        cases.failures.append(TZCaseFailure(index=index, row=row, error=error))
+        return True
+    cases.dropped += 1
+    return False
+
+def tz_cases_summary(cases:TZCasesInfo) -> str:
+    """One line summary of the failed sub-cases."""
+    _first = cases.failures[0] if cases.failures else None
+    return f"{cases.failed} of {cases.total} cases failed" + (f", first at case {_first.index}: {_first.error}" if _first else "")
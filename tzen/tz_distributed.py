@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Author:   Lorenzo Furcas (TopFirmino)
+# License:  MIT – see the LICENSE file in the repository root for details.
+# ---------------------------------------------------------------------------
+"""This module implements the distributed execution of a suite: a coordinator serves a queue of tests over TCP and
+agents, on the same or on other machines, pull the tests one at a time, run them and stream back their logs and
+their TZTestInfo. Messages are JSON lines:
+
+    agent -> coordinator            coordinator -> agent
+    {"type": "hello", "agent"}      {"type": "welcome", "selector", "lease_timeout"}
+    {"type": "pull"}                {"type": "work", "test", "selector"} | {"type": "wait"} | {"type": "done"}
+    {"type": "heartbeat"}
+    {"type": "log", "test", "level", "message"}
+    {"type": "result", "test", "info"}
+
+Every test handed to an agent is leased. A lease is renewed by the heartbeats of the agent and is re-queued when the
+agent disconnects or stops sending heartbeats; a test whose lease expires max_attempts times is reported as failed."""
+
+from __future__ import annotations
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .tz_types import TZSessionInfo, TZSessionStatusType, TZTestInfo, TZTestStatusType
+from .tz_tree import TzTree
+from .tz_session import TZSession, _get_svr_backends
+from .tz_results import TZResultsFile, tz_test_info_to_dict, tz_test_info_from_dict
+from ._tz_loader import import_all_modules_in_directory
+from ._tz_logging import tz_getLogger, TZEN_ROOT_TEST_LOGGER_NAME
+
+logger = tz_getLogger(__name__)
+
+TZ_COORDINATOR_PORT = 7878
+
+
+class _TZLease:
+
+    __slots__ = ("test", "agent", "deadline")
+
+    def __init__(self, test:str, agent:str, deadline:float) -> None:
+        self.test = test
+        self.agent = agent
+        self.deadline = deadline
+
+
+class _TZCoordinatorHandler(socketserver.StreamRequestHandler):
+    """Connection with a single agent."""
+
+    def _send(self, message:Dict[str, Any]) -> None:
+        self.wfile.write((json.dumps(message) + "\n").encode())
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        coordinator:TZCoordinator = self.server.coordinator
+        agent = None
+        try:
+            for line in self.rfile:
+                message = json.loads(line)
+                kind = message["type"]
+
+                if kind == "hello":
+                    agent = message["agent"]
+                    logger.info(f"Agent {agent} connected")
+                    self._send({"type": "welcome", "selector": coordinator.selector, "lease_timeout": coordinator.lease_timeout})
+                elif kind == "pull":
+                    self._send(coordinator.lease(agent))
+                elif kind == "heartbeat":
+                    coordinator.renew(agent)
+                elif kind == "log":
+                    coordinator.log(agent, message)
+                elif kind == "result":
+                    coordinator.complete(agent, message["test"], tz_test_info_from_dict(message["info"]))
+        except (ConnectionError, json.JSONDecodeError) as e:
+            logger.warning(f"Agent {agent} dropped: {e}")
+        finally:
+            if agent is not None:
+                coordinator.release(agent)
+
+
+class _TZCoordinatorServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class TZCoordinator:
+    """Serves the tests of a folder to the agents and collects their results."""
+
+    def __init__(self, tests_folder:str, selector:str = '/', host:str = "127.0.0.1", port:int = TZ_COORDINATOR_PORT,
+                 lease_timeout:float = 60.0, max_attempts:int = 3) -> None:
+        self.directory = Path(tests_folder).absolute()
+        self.selector = selector
+        self.host = host
+        self.port = port
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.info:TZSessionInfo = None
+        self._queue:deque = deque()
+        self._selectors:Dict[str, str] = {}
+        self._leases:Dict[str, _TZLease] = {}
+        self._attempts:Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+
+    # ---- queue ---------------------------------------------------------------
+
+    def load(self) -> None:
+        """Import the suite and fill the queue with its tests."""
+        import_all_modules_in_directory(str(self.directory))
+        organizer = TzTree().resolve(str(self.directory / self.selector))
+        if organizer is None:
+            raise ValueError(f"Cannot find selector {str(self.directory / self.selector)}")
+
+        tests = [x.get_object() for x in organizer.find("test")]
+        self.info = TZSessionInfo(name="Distributed Session", total_tests=len(tests), details={x.name: None for x in tests})
+        # Agents resolve the tests relative to their own copy of the folder
+        self._selectors = {x.name: str(Path(x.get_selector()).relative_to(self.directory)) for x in tests}
+        self._queue = deque(self._selectors)
+        if not tests:
+            self._finished.set()
+
+    def lease(self, agent:str) -> Dict[str, Any]:
+        with self._lock:
+            if self._queue:
+                test = self._queue.popleft()
+                self._leases[test] = _TZLease(test, agent, time.monotonic() + self.lease_timeout)
+                self._attempts[test] = self._attempts.get(test, 0) + 1
+                return {"type": "work", "test": test, "selector": self._selectors[test]}
+            return {"type": "done"} if self._finished.is_set() else {"type": "wait"}
+
+    def renew(self, agent:str) -> None:
+        with self._lock:
+            _deadline = time.monotonic() + self.lease_timeout
+            for lease in self._leases.values():
+                if lease.agent == agent:
+                    lease.deadline = _deadline
+
+    def release(self, agent:str) -> None:
+        """Re-queue the tests leased by an agent that disconnected."""
+        with self._lock:
+            for test in [k for k, v in self._leases.items() if v.agent == agent]:
+                self._expire(test, f"agent {agent} disconnected")
+
+    def _expire(self, test:str, reason:str) -> None:
+        del self._leases[test]
+        if self._attempts[test] >= self.max_attempts:
+            logger.error(f"Giving up {test} after {self._attempts[test]} attempts: {reason}")
+            _now = time.time()
+            self._record(TZTestInfo(name=test, total_steps=0, status=TZTestStatusType.FAILED, selector=self._selectors[test],
+                                    error=f"Lease lost {self._attempts[test]} times, last time because {reason}", start=_now, end=_now))
+        else:
+            logger.warning(f"Re-queuing {test}: {reason}")
+            self._queue.appendleft(test)
+
+    def _reap(self) -> None:
+        """Re-queue the leases whose agent stopped sending heartbeats."""
+        while not self._finished.wait(min(self.lease_timeout / 4, 1.0)):
+            with self._lock:
+                _now = time.monotonic()
+                for test in [k for k, v in self._leases.items() if v.deadline < _now]:
+                    self._expire(test, f"lease of agent {self._leases[test].agent} expired")
+
+    def log(self, agent:str, message:Dict[str, Any]) -> None:
+        logger.log(message.get("level", logging.INFO), f"[{agent}] {message['test']}: {message['message']}")
+
+    def complete(self, agent:str, test:str, info:TZTestInfo) -> None:
+        with self._lock:
+            if self.info.details.get(test) is not None:
+                # Late result of an expired lease, the test has already been run elsewhere
+                return
+            self._leases.pop(test, None)
+            if test in self._queue:
+                self._queue.remove(test)
+            self._record(info)
+
+    def _record(self, info:TZTestInfo) -> None:
+        self.info.details[info.name] = info
+        self.info.executed_tests += 1
+        if info.status in (TZTestStatusType.PASSED, TZTestStatusType.FLAKY):
+            self.info.passed_tests += 1
+            self.info.flaky_tests += info.status == TZTestStatusType.FLAKY
+        else:
+            self.info.failed_tests += 1
+        logger.info(f"[{self.info.executed_tests}/{self.info.total_tests}] {info.name}: {info.status.name}")
+        if self.info.executed_tests == self.info.total_tests:
+            self._finished.set()
+
+    # ---- server --------------------------------------------------------------
+
+    def serve(self, report_output_file:str = "./report.html", results_file:str = None) -> TZSessionInfo:
+        """Serve the queue until every test has a result, then write the report."""
+        self.load()
+        self.info.status = TZSessionStatusType.RUNNING
+        self.info.start = int(time.time())
+
+        with _TZCoordinatorServer((self.host, self.port), _TZCoordinatorHandler) as server:
+            server.coordinator = self
+            self.port = server.server_address[1]
+            logger.info(f"tzen coordinator serving {self.info.total_tests} tests on {self.host}:{self.port}")
+
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            threading.Thread(target=self._reap, daemon=True).start()
+            self._finished.wait()
+            # Let the agents pull the done message before closing
+            time.sleep(min(self.lease_timeout / 4, 1.0))
+            server.shutdown()
+
+        self.info.end = int(time.time())
+        self.info.status = TZSessionStatusType.FAILED if self.info.failed_tests else TZSessionStatusType.PASSED
+
+        if results_file:
+            TZResultsFile(results_file).write(self.info)
+        _get_svr_backends()["default_html"](report_output_file).write(self.info, logger)
+        return self.info
+
+
+class _TZAgentLogHandler(logging.Handler):
+    """Streams the test log records to the coordinator."""
+
+    def __init__(self, agent:TZAgent) -> None:
+        super().__init__(logging.DEBUG)
+        self.agent = agent
+
+    def emit(self, record:logging.LogRecord) -> None:
+        try:
+            self.agent.send({"type": "log", "test": self.agent.current, "level": record.levelno, "message": record.getMessage()})
+        except OSError:
+            # The connection is lost, the agent notices it at its next pull
+            pass
+        except Exception:
+            self.handleError(record)
+
+
+class TZAgent:
+    """Pulls tests from a coordinator and runs them on the local copy of the suite."""
+
+    def __init__(self, tests_folder:str, host:str = "127.0.0.1", port:int = TZ_COORDINATOR_PORT, name:str = None) -> None:
+        self.directory = Path(tests_folder).absolute()
+        self.host = host
+        self.port = port
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.current:str = None
+        self._socket = None
+        self._rfile = None
+        self._write_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def send(self, message:Dict[str, Any]) -> None:
+        with self._write_lock:
+            self._socket.sendall((json.dumps(message) + "\n").encode())
+
+    def _receive(self) -> Dict[str, Any]:
+        line = self._rfile.readline()
+        if not line:
+            raise ConnectionError("Coordinator closed the connection")
+        return json.loads(line)
+
+    def _heartbeat(self, period:float) -> None:
+        while not self._stopped.wait(period):
+            try:
+                self.send({"type": "heartbeat"})
+            except OSError:
+                return
+
+    def run(self) -> int:
+        """Run tests until the coordinator has no more work. Returns the number of tests executed."""
+        import_all_modules_in_directory(str(self.directory))
+
+        self._socket = socket.create_connection((self.host, self.port))
+        self._rfile = self._socket.makefile('r', encoding='utf-8')
+        self.send({"type": "hello", "agent": self.name})
+        welcome = self._receive()
+
+        organizer = TzTree().resolve(str(self.directory / welcome["selector"]))
+        if organizer is None:
+            raise ValueError(f"Cannot find selector {str(self.directory / welcome['selector'])}")
+
+        session = TZSession(organizer)
+        handler = _TZAgentLogHandler(self)
+        logging.getLogger(TZEN_ROOT_TEST_LOGGER_NAME).addHandler(handler)
+        threading.Thread(target=self._heartbeat, args=(welcome["lease_timeout"] / 3,), daemon=True).start()
+
+        executed = 0
+        session.open()
+        try:
+            while True:
+                try:
+                    self.send({"type": "pull"})
+                    work = self._receive()
+                except OSError as e:
+                    logger.warning(f"Lost connection with the coordinator: {e}")
+                    break
+                if work["type"] == "done":
+                    break
+                if work["type"] == "wait":
+                    time.sleep(0.5)
+                    continue
+
+                self.current = work["test"]
+                node = TzTree().resolve(str(self.directory / work["selector"]))
+                if node is None or node.kind != "test":
+                    # The copy of the suite of the agent differs from the one of the coordinator
+                    logger.error(f"Cannot find test {work['selector']} in {self.directory}")
+                    _now = time.time()
+                    info = TZTestInfo(name=work["test"], total_steps=0, selector=work["selector"], status=TZTestStatusType.FAILED,
+                                      start=_now, end=_now, error=f"Test not found by agent {self.name}")
+                else:
+                    info = session.run_test(node.get_object()).info
+                    executed += 1
+                self.current = None
+                try:
+                    self.send({"type": "result", "test": work["test"], "info": tz_test_info_to_dict(info)})
+                except OSError as e:
+                    logger.warning(f"Lost connection with the coordinator: {e}")
+                    break
+        finally:
+            self._stopped.set()
+            logging.getLogger(TZEN_ROOT_TEST_LOGGER_NAME).removeHandler(handler)
+            session.close()
+            self._socket.close()
+
+        logger.info(f"Agent {self.name} executed {executed} tests")
+        return executed
@@ -273,7 +273,7 @@ class DefaultMarkdownBackend(TZDocBackend):
         # prepare header + empty fixtures section (so it stays at the very top)
         self._header = f"# {self.name}\n\n"
         self._fixtures_header = f"{'#'*self.FIXTURES_TOP_LEVEL} Fixtures\n\n"
-        self._file = self._compose()  # keep self._file always up to date
+        self._file = self._compose()
 
     # ---- small helpers -------------------------------------------------------
 
@@ -395,8 +395,10 @@ class DefaultMarkdownBackend(TZDocBackend):
         # For 'step' and 'constant' we don’t add standalone sections here,
         # because they’re summarized under each test.
 
-        # Keep the exported file string up to date
+    def write(self):
+        # The file is composed once: composing it on every record is quadratic in the size of the project
         self._file = self._compose()
+        super().write()
 
 def tz_build_documentation(tree: TzTreeNode, name:str, path:str, backend:str = "default"):
 
@@ -12,11 +12,21 @@ from pathlib import Path
 from .tz_test import *
 from . import tz_constants as conf
 from ._tz_loader import import_all_modules_in_directory
-from .tz_tree import TzTree 
-from .tz_session import TZSession
+from .tz_tree import TzTree, tz_is_pattern
+from .tz_session import TZSession, _get_svr_backends
+from .tz_shard import tz_parse_shard, tz_history_durations
+from .tz_results import TZResultsFile, tz_merge_results, tz_iter_results
+from typing import List
 from ._tz_logging import tz_getLogger
 from .tz_plugins import get_pm
 from .tz_doc import tz_build_documentation
+from .tz_trace import TZTraceRecorder
+from .tz_memory import TZMemoryProfiler
+from .tz_history import TZHistoryStore
+from .tz_journal import TZJournal
+from .tz_load import TZLoadRunner
+from .tz_types import TZLoadInfo, TZTestStatusType
+from dataclasses import asdict
 
 logger = tz_getLogger(__name__)
 
@@ -51,7 +61,7 @@ class TZFacade:
         for k, v in config.items():
             setattr(conf, k, v)
                     
-    def start_session(self, tests_folder:str, selector:str = '/', report_output_file: str = "./report.html", **kwargs) -> None:
+    def start_session(self, tests_folder:str, selector:str | List[str] = '/', report_output_file: str = "./report.html", trace_file:str = None, memory:bool = False, memory_threshold:int = 1024 * 1024, history_file:str = None, concurrency:int = 1, threads:int = 1, reorder:bool = False, shard:str = None, shard_by:str = "hash", results_file:str = None, journal_file:str = None, resume:str = None, isolate:bool = False, timeout:float = None, maxfail:int = 0, reruns:int = 0, rerun_fresh:bool = False, tags:str = None, **kwargs) -> None:
         """ Start a session and load all the tests from a folder """
         project_path = Path(tests_folder).absolute()
 
@@ -59,16 +69,116 @@ class TZFacade:
         # This triggers the filling of the TZTree
         import_all_modules_in_directory(str(project_path))
         
+        self.run_session(tests_folder, selector, report_output_file, trace_file=trace_file, memory=memory, memory_threshold=memory_threshold,
+                         history_file=history_file, concurrency=concurrency, threads=threads, reorder=reorder,
+                         shard=shard, shard_by=shard_by, results_file=results_file, journal_file=journal_file, resume=resume,
+                         isolate=isolate, timeout=timeout, maxfail=maxfail, reruns=reruns, rerun_fresh=rerun_fresh, tags=tags)
+
+    def run_session(self, tests_folder:str, selector:str | List[str] = '/', report_output_file: str = "./report.html", trace_file:str = None, memory:bool = False, memory_threshold:int = 1024 * 1024, history_file:str = None, concurrency:int = 1, threads:int = 1, reorder:bool = False, keep_fixtures:bool = False, shard:str = None, shard_by:str = "hash", results_file:str = None, journal_file:str = None, resume:str = None, isolate:bool = False, timeout:float = None, maxfail:int = 0, reruns:int = 0, rerun_fresh:bool = False, tags:str = None) -> TZSession:
+        """ Run a session on the tests of a folder that has already been loaded.
+        Several selectors, or glob and kind selectors, run the union of the tests they select. """
+        project_path = Path(tests_folder).absolute()
+        
         # Filter the tree by the selector
-        organizer = TzTree().resolve( str(project_path / selector) )
-        if organizer is None:
-            raise ValueError(f"Cannot find selector {str(project_path / selector)}")
+        _selectors = [selector] if isinstance(selector, str) else list(selector)
+        _selected = None
+        if len(_selectors) == 1 and not tz_is_pattern(_selectors[0]):
+            organizer = TzTree().resolve( str(project_path / _selectors[0]) )
+            if organizer is None:
+                raise ValueError(f"Cannot find selector {str(project_path / _selectors[0])}")
+        else:
+            organizer = TzTree().resolve( str(project_path) )
+            if organizer is None:
+                raise ValueError(f"Cannot find tests folder {str(project_path)}")
+            _selected = [x.get_object() for x in TzTree().select_tests(_selectors, organizer)]
+            logger.info(f"Selected {len(_selected)} tests with {', '.join(_selectors)}")
+        
+        # Select the tests of this machine
+        _shard, _durations = None, None
+        if shard:
+            _shard = tz_parse_shard(shard)
+            if shard_by == "duration":
+                if not history_file:
+                    raise ValueError("Sharding by duration requires a history file")
+                _durations = tz_history_durations(history_file)
+            elif shard_by != "hash":
+                raise ValueError(f"Unknown sharding strategy {shard_by}, expected hash or duration")
+        
+        # Skip the tests already completed by the interrupted session, and keep extending its journal
+        _completed = None
+        if resume:
+            if not os.path.isfile(resume):
+                raise FileNotFoundError(f"Journal {resume} does not exist")
+            _completed = TZJournal(resume).completed()
+            journal_file = journal_file or resume
         
         # Create the session
-        session = TZSession(organizer)
+        session = TZSession(organizer, concurrency=concurrency, threads=threads, reorder=reorder, keep_fixtures=keep_fixtures,
+                            shard=_shard, durations=_durations, completed=_completed, isolate=isolate, timeout=timeout,
+                            maxfail=maxfail, reruns=reruns, rerun_fresh=rerun_fresh, tags=tags, selected=_selected)
+        
+        if journal_file:
+            TZJournal(journal_file).bind(session)
+        
+        if trace_file:
+            TZTraceRecorder(trace_file).bind(session)
+        
+        if memory:
+            if isolate:
+                raise ValueError("The memory profiler cannot measure isolated tests")
+            # tracemalloc is process-wide, the peak and the allocations of concurrent tests cannot be told apart
+            if threads > 1 or concurrency > 1:
+                raise ValueError("The memory profiler measures one test at a time, it cannot be combined with threads or concurrency")
+            TZMemoryProfiler(memory_threshold).bind(session)
+        
         session.start()
         
+        if history_file:
+            _history = TZHistoryStore(history_file)
+            _history.append(session.info)
+            if session.info.flaky_tests:
+                _rates = _history.flakiness()
+                for info in session.info.details.values():
+                    if info is not None and info.status == TZTestStatusType.FLAKY:
+                        logger.warning(f"{info.name} has been flaky in {_rates.get(info.selector, 0.0):.0%} of its recorded runs")
+        
+        if results_file:
+            TZResultsFile(results_file).write(session.info, shard=shard)
+        
         session.build_report(report_output_file)
+        return session
+        
+    def merge_reports(self, results_files:List[str], report_output_file:str = "./report.html", backend:str = "default_html") -> TZSessionInfo:
+        """ Merge the results files of several shards into a single report """
+        info, memory, leaks = tz_merge_results(results_files)
+        
+        backends = _get_svr_backends()
+        if backend not in backends:
+            raise ValueError(f"Unknown backend {backend}. Available backends {backends}")
+        
+        backends[backend](report_output_file).write_stream(info, tz_iter_results(results_files), memory, leaks, logger)
+        return info
+        
+    def load_test(self, tests_folder:str, selector:str, users:int, duration:float, ramp_up:float = 0.0, window:float = 1.0, results_file:str = None) -> TZLoadInfo:
+        """ Run a testcase as concurrent virtual users """
+        project_path = Path(tests_folder).absolute()
+        import_all_modules_in_directory(str(project_path))
+        
+        organizer = TzTree().resolve( str(project_path / selector) )
+        if organizer is None:
+            raise ValueError(f"Cannot find selector {str(project_path / selector)}")
+        
+        tests = organizer.find("test")
+        if len(tests) != 1:
+            raise ValueError(f"A load test runs a single testcase, selector {selector} matches {len(tests)}")
+        
+        info = TZLoadRunner(tests[0].get_object(), users, duration, ramp_up=ramp_up, window=window).run()
+        
+        if results_file:
+            import json
+            with open(results_file, 'w', encoding='utf-8') as f:
+                json.dump(asdict(info), f, indent=2)
+        return info
         
     def build_documentation(self, tests_folder:str, output_folder:str, requirements_file:str) -> None:
         """ Generate the documentation for the tests """
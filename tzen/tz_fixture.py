@@ -9,28 +9,55 @@
 
 from __future__ import annotations
 from enum import Enum
-from typing import Dict, Callable, Type
-from .tz_tree import tz_tree_register_type, TzTree
+from typing import Dict, Callable, Type, List, Set
+from .tz_tree import tz_tree_register_type, TzTree, TzTreeNode
+from .tz_types import TZEventType
+from ._tz_overhead import tz_overhead_section
+from ._tz_context import TZ_CURRENT_RUN, TZ_USER_FIXTURES
+from .tz_constants import _TZEN_CONSTANTS_
+from .tz_cache import TZFixtureCache
 from pathlib import Path
 import sys
+import asyncio
+import threading
 import inspect
 import functools
+import hashlib
 
 class TZFixtureScope(Enum):
-    """Enumeration of fixture scopes."""
+    """Enumeration of fixture scopes.
+    MODULE and PACKAGE fixtures are shared by the tests of a module, or of a folder of modules, and are torn down
+    when the session leaves that subtree."""
     TEST = "test"
     SESSION = "session"
-    STEP = "step"  
+    STEP = "step"
+    MODULE = "module"
+    PACKAGE = "package"
 
 _TZEN_FIXTURES_ = {}
 
-def tz_add_fixture(name:str, fixture_class:Callable | Type, scope:TZFixtureScope = TZFixtureScope.TEST) -> TZFixtureContainer:
-    """Add a fixture to the specified scope."""
+def tz_add_fixture(name:str, fixture_class:Callable | Type, scope:TZFixtureScope = TZFixtureScope.TEST, reusable:bool = False,
+                   pool_size:int = 0, pool_timeout:float | None = None, pool_recycle:int = 0, lazy:bool = False, cache:bool = False) -> TZFixtureContainer:
+    """Add a fixture to the specified scope. 
+    A reusable TEST fixture is kept alive between consecutive tests using it instead of being rebuilt.
+    A pooled fixture keeps `pool_size` instances and lends one to every test using it, see TZFixtureContainer.
+    A lazy fixture is injected as a TZLazyFixture proxy and is set up only when the consumer first uses it.
+    A cached fixture is restored from a snapshot of a previous setup, see TZFixtureCache."""
     
     if name in _TZEN_FIXTURES_:
         raise RuntimeError(f"Fixture '{name}' already exists")
     
-    fixture = TZFixtureContainer(name, scope, fixture_class)
+    fixture = TZFixtureContainer(name, scope, fixture_class, reusable, pool_size, pool_timeout, pool_recycle, lazy, cache)
+    
+    if pool_size and scope in [TZFixtureScope.TEST, TZFixtureScope.STEP]:
+        raise ValueError(f"Fixture '{name}' cannot be pooled, TEST and STEP fixtures are never shared")
+    if pool_size and fixture.is_async:
+        raise ValueError(f"Fixture '{name}' cannot be pooled, asynchronous fixtures are not supported")
+    if lazy and fixture.is_async:
+        raise ValueError(f"Fixture '{name}' cannot be lazy, asynchronous fixtures are set up by the asyncio session engine")
+    if cache and (pool_size or fixture.is_async or inspect.isgeneratorfunction(fixture_class)):
+        raise ValueError(f"Fixture '{name}' cannot be cached, only synchronous classes and functions returning the instance can")
+
     _TZEN_FIXTURES_[name] = fixture
     
     return fixture
@@ -41,6 +68,21 @@ def _fixture_provider(name:str, selector:str):
 
     return _TZEN_FIXTURES_[name]
 
+def _inject_constructor(node:TzTreeNode) -> None:
+    _class = node.get_object().fixture_class
+    # Every consumer injects the original constructor again, injecting the injected one would stack wrappers
+    if "_tz_init_" not in vars(_class):
+        _class._tz_init_ = _class.__init__
+    _class.__init__ = TzTree().inject(_class._tz_init_, node.get_selector())
+
+def tz_inject_fixtures(names:List[str]) -> None:
+    """Inject the constructors of fixtures defined again, e.g. by a reloaded module, into their existing nodes.
+    Their consumers are injected only when their own module is loaded, which may not happen again."""
+    for name in names:
+        _nodes = [x for x in TzTree().select(f"**/{name}") if x.kind == 'fixture']
+        if name in _TZEN_FIXTURES_ and _nodes:
+            _inject_constructor(_nodes[0])
+
 def _fixture_injector(func:Callable, consumer:str) -> Callable:
 
     base = inspect.unwrap(func)
@@ -49,7 +91,7 @@ def _fixture_injector(func:Callable, consumer:str) -> Callable:
     for name, param in sig.parameters.items():
         if param.annotation in _TZEN_FIXTURES_:
             _fixture_node = TzTree().add_object(param.annotation, str(Path(consumer) / param.annotation), kind='fixture')
-            _fixture_node.get_object().fixture_class.__init__ = TzTree().inject(_fixture_node.get_object().fixture_class.__init__, _fixture_node.get_selector())
+            _inject_constructor(_fixture_node)
 
     @functools.wraps(func)
     def _wrapper(*f_args, **f_kwargs):
@@ -62,59 +104,452 @@ def _fixture_injector(func:Callable, consumer:str) -> Callable:
             if param.default is not inspect._empty:
                 continue
             if param.annotation in _TZEN_FIXTURES_:
-                bound.arguments[name] = _TZEN_FIXTURES_[param.annotation].get_fixture()
+                _fixture = _TZEN_FIXTURES_[param.annotation]
+                bound.arguments[name] = TZLazyFixture(_fixture) if _fixture.lazy else _fixture.get_fixture()
 
         return func(*bound.args, **bound.kwargs)
 
     return _wrapper
 
+def tz_teardown_user_fixtures(instances:Dict[str, tuple]) -> None:
+    """Tear down the fixture instances of a virtual user, the last created first."""
+    for name, (instance, generator) in reversed(list(instances.items())):
+        _TZEN_FIXTURES_[name]._destroy_instance(instance, generator)
+    instances.clear()
+
+def tz_forget_fixtures(module_name:str) -> Dict[str, TZFixtureContainer]:
+    """Remove the fixtures defined by a module, e.g. before reloading it. Returns the removed containers."""
+    removed = {k: v for k, v in _TZEN_FIXTURES_.items() if getattr(v.fixture_class, "__module__", None) == module_name}
+    for name in removed:
+        del _TZEN_FIXTURES_[name]
+    return removed
+
+def tz_fixture_source_hash(fixture:TZFixtureContainer) -> str:
+    """Hash of the definition of a fixture, used to tell whether an existing instance can still be used."""
+    try:
+        source = inspect.getsource(fixture.fixture_class)
+    except (OSError, TypeError):
+        source = fixture.fixture_class.__qualname__
+    return hashlib.sha256(f"{fixture.scope.value}:{fixture.pool_size}:{source}".encode()).hexdigest()
+
+def tz_fixture_graph(organizer:TzTreeNode, scopes:List[TZFixtureScope]) -> Dict[str, Set[str]]:
+    """Build the dependency graph of the fixtures with the given scopes used below the organizer.
+    The fixtures injected into a fixture constructor are the children of its node, so every fixture depends on the
+    fixtures found below its nodes. Dependencies through fixtures with other scopes are kept transitively."""
+    graph:Dict[str, Set[str]] = {}
+    def _in_scopes(name:str) -> bool:
+        # Nodes may outlive their fixture when the defining module has been removed
+        return name in _TZEN_FIXTURES_ and _TZEN_FIXTURES_[name].scope in scopes
+    
+    for node in organizer.find("fixture"):
+        if not _in_scopes(node.name):
+            continue
+        _deps = graph.setdefault(node.name, set())
+        for dep in node.find("fixture")[1:]:
+            if _in_scopes(dep.name) and dep.name != node.name:
+                _deps.add(dep.name)
+    return graph
+
+def tz_fixture_levels(graph:Dict[str, Set[str]]) -> List[List[str]]:
+    """Sort a fixture graph in topological levels: every fixture only depends on fixtures of the previous levels,
+    so the fixtures of a level are independent of each other."""
+    _pending = {k: set(v) & graph.keys() for k, v in graph.items()}
+    levels = []
+    while _pending:
+        _level = sorted(k for k, v in _pending.items() if not v)
+        if not _level:
+            raise RuntimeError(f"Circular dependency between fixtures {sorted(_pending)}")
+        for name in _level:
+            del _pending[name]
+        for deps in _pending.values():
+            deps.difference_update(_level)
+        levels.append(_level)
+    return levels
+
+class TZLazyFixture:
+    """Proxy injected in place of a lazy fixture. The fixture is set up on the first access to the proxy;
+    if the consumer never uses it, neither its setup nor its teardown run. Truthiness, comparisons and isinstance checks
+    are uses of the proxy too."""
+    
+    __slots__ = ("_tz_container",)
+
+    def __init__(self, container:TZFixtureContainer) -> None:
+        object.__setattr__(self, "_tz_container", container)
+
+    def _tz_materialize(self):
+        return object.__getattribute__(self, "_tz_container").get_fixture()
+
+    def __getattr__(self, name):
+        return getattr(self._tz_materialize(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._tz_materialize(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self._tz_materialize(), name)
+
+    def __getitem__(self, key):
+        return self._tz_materialize()[key]
+
+    def __setitem__(self, key, value):
+        self._tz_materialize()[key] = value
+
+    # The proxy defines every forwarded method, forwarding __len__ and __iter__ to a fixture not defining them
+    # raises the TypeError of the fixture type, as the fixture itself would
+    def __iter__(self):
+        _fixture = self._tz_materialize()
+        if not hasattr(type(_fixture), "__iter__") and not hasattr(type(_fixture), "__getitem__"):
+            raise TypeError(f"'{type(_fixture).__name__}' object is not iterable")
+        return iter(_fixture)
+
+    def __len__(self):
+        _fixture = self._tz_materialize()
+        if not hasattr(type(_fixture), "__len__"):
+            raise TypeError(f"object of type '{type(_fixture).__name__}' has no len()")
+        return len(_fixture)
+
+    def __bool__(self):
+        return bool(self._tz_materialize())
+
+    def __contains__(self, item):
+        return item in self._tz_materialize()
+
+    def __eq__(self, other):
+        return self._tz_materialize() == other
+
+    def __hash__(self):
+        return hash(self._tz_materialize())
+
+    def __enter__(self):
+        return self._tz_materialize().__enter__()
+
+    def __exit__(self, *exc_info):
+        return self._tz_materialize().__exit__(*exc_info)
+
+    @property
+    def __class__(self):
+        return type(self._tz_materialize())
+
+    def __call__(self, *args, **kwargs):
+        return self._tz_materialize()(*args, **kwargs)
+
+    def __repr__(self):
+        _container = object.__getattribute__(self, "_tz_container")
+        return repr(_container.get_fixture()) if _container.is_setup else f"<lazy fixture '{_container.name}'>"
+
+class _TZPooledInstance:
+    
+    __slots__ = ("instance", "generator", "uses")
+
+    def __init__(self, instance, generator) -> None:
+        self.instance = instance
+        self.generator = generator
+        self.uses = 0
+
 @tz_tree_register_type("fixture", provider=_fixture_provider, injector=_fixture_injector)
 class TZFixtureContainer:
+    """Container of a fixture, in charge of its setup and teardown.
+    
+    Pooled fixtures (pool_size > 0) keep pool_size ready instances and lend one to every test run for its whole
+    duration. When the pool is exhausted a consumer waits up to pool_timeout seconds (forever if None) for an instance to
+    be released. Returned instances are recycled, i.e. torn down and replaced, once they have been lent pool_recycle
+    times or when their `healthy()` method, if any, returns False.
+    """
     
-    def __init__(self, name:str, scope:TZFixtureScope, fixture_class:Callable | Type):
+    def __init__(self, name:str, scope:TZFixtureScope, fixture_class:Callable | Type, reusable:bool = False,
+                 pool_size:int = 0, pool_timeout:float | None = None, pool_recycle:int = 0, lazy:bool = False, cache:bool = False):
         self.name = name
         self.scope = scope
+        self.reusable = reusable
+        self.lazy = lazy
+        self.cache = cache
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self.pool_recycle = pool_recycle
+        self._idle:List[_TZPooledInstance] = []
+        self._leases:Dict[object, _TZPooledInstance] = {}
+        self._pool_cond = threading.Condition()
         self.fixture_class = fixture_class
         self.fixture_instance = None
         self.is_setup = False
         self.doc = fixture_class.__doc__ if fixture_class.__doc__ else ""
+        self.subscribers = {event:[] for event in TZEventType.__members__.values()}
+        self._generator = None
+        self._async_lock = None
+        self._lock = threading.RLock()
+
+    @property
+    def is_async(self) -> bool:
+        """True when the fixture has to be set up and torn down on the event loop."""
+        if inspect.isclass(self.fixture_class):
+            return (inspect.iscoroutinefunction(getattr(self.fixture_class, "setup", None))
+                    or inspect.iscoroutinefunction(getattr(self.fixture_class, "teardown", None)))
+        return inspect.isasyncgenfunction(self.fixture_class) or inspect.iscoroutinefunction(self.fixture_class)
+
+    def attach(self, subscriber, event):
+        if event in self.subscribers and subscriber not in self.subscribers[event]:
+            self.subscribers[event].append(subscriber)
+
+    def detach_all(self):
+        """Remove all the subscribers, e.g. when the fixture outlives the session that attached them."""
+        self.subscribers = {event:[] for event in TZEventType.__members__.values()}
+
+    def notify(self, event):
+        if event in self.subscribers:
+            with tz_overhead_section("notify"):
+                for subscriber in self.subscribers[event]:
+                    subscriber(self)
+
+    def adopt(self, other:TZFixtureContainer):
+        """Take over the instances set up by another container with the same definition, e.g. after a module reload.
+        The other container is left torn down without running its teardown."""
+        with other._lock, self._lock:
+            self.fixture_instance, self._generator, self.is_setup = other.fixture_instance, other._generator, other.is_setup
+            self._idle, self._leases = other._idle, other._leases
+            other.fixture_instance, other._generator, other.is_setup = None, None, False
+            other._idle, other._leases = [], {}
 
     def get_fixture(self):
-        """Get the fixture instance."""
+        """Get the fixture instance. Pooled fixtures return the instance lent to the current test run.
+        TEST and STEP fixtures used by a virtual user of a load test return the instance of that user."""
+        if self.scope in [TZFixtureScope.TEST, TZFixtureScope.STEP]:
+            _user = TZ_USER_FIXTURES.get()
+            if _user is not None:
+                return self._user_instance(_user)
+        
         if not self.is_setup:
             self.setup()
+        
+        if self.pool_size:
+            return self.acquire(TZ_CURRENT_RUN.get()).instance
             
         return self.fixture_instance
+
+    def _user_instance(self, instances:Dict[str, tuple]):
+        if self.name not in instances:
+            if self.is_async:
+                raise RuntimeError(f"Fixture '{self.name}' is asynchronous, virtual users only support synchronous fixtures")
+            with tz_overhead_section("fixture"):
+                instances[self.name] = self._create_instance()
+        return instances[self.name][0]
+
+    # ---- pool ----------------------------------------------------------------
+
+    def acquire(self, owner, timeout:float | None = None) -> _TZPooledInstance:
+        """Lend an instance of the pool to the owner, a test run. The owner keeps the same instance until it is released.
+        Consumers running on the event loop never block, they fail at once when the pool is exhausted."""
+        try:
+            asyncio.get_running_loop()
+            _timeout = 0
+        except RuntimeError:
+            _timeout = self.pool_timeout if timeout is None else timeout
+        
+        with self._pool_cond:
+            if owner in self._leases:
+                return self._leases[owner]
+            if not self._pool_cond.wait_for(lambda: self._idle or not self.is_setup, _timeout):
+                raise TimeoutError(f"No instance of fixture '{self.name}' available within {_timeout}s")
+            if not self.is_setup:
+                raise RuntimeError(f"Fixture '{self.name}' has been torn down")
+            
+            pooled = self._idle.pop(0)
+            pooled.uses += 1
+            self._leases[owner] = pooled
+            return pooled
+
+    def release(self, owner) -> None:
+        """Return the instance lent to the owner, if any, recycling it when needed."""
+        with self._pool_cond:
+            pooled = self._leases.pop(owner, None)
+        if pooled is None:
+            return
+        
+        if (self.pool_recycle and pooled.uses >= self.pool_recycle) or not self._is_healthy(pooled):
+            with tz_overhead_section("fixture"):
+                self._destroy_instance(pooled.instance, pooled.generator)
+                pooled = _TZPooledInstance(*self._create_instance())
+        
+        with self._pool_cond:
+            self._idle.append(pooled)
+            self._pool_cond.notify()
+
+    def _is_healthy(self, pooled:_TZPooledInstance) -> bool:
+        _check = getattr(pooled.instance, "healthy", None)
+        try:
+            return _check() if callable(_check) else True
+        except Exception:
+            return False
+
+    def _fill_pool(self):
+        for _ in range(self.pool_size):
+            self._idle.append(_TZPooledInstance(*self._create_instance()))
+
+    def _drain_pool(self):
+        with self._pool_cond:
+            _all = self._idle + list(self._leases.values())
+            self._idle, self._leases = [], {}
+            self._pool_cond.notify_all()
+        for pooled in _all:
+            self._destroy_instance(pooled.instance, pooled.generator)
     
     def setup(self):
-        """Setup the fixture instance."""
+        """Setup the fixture instance. Concurrent consumers wait for the first one to complete the setup."""
+        with self._lock:
+            self._setup()
+
+    def _setup(self):
         if not self.is_setup:
             
-            if inspect.isclass(self.fixture_class):
-                self.fixture_instance = self.fixture_class()
-                self.fixture_instance.setup()
-                
-            elif inspect.isfunction(self.fixture_class):
-                # For function fixtures, we can call the fixture directly
-                # assuming it is a callable that returns the fixture instance
-                self.fixture_instance = self.fixture_class()
-                
-            elif inspect.isgeneratorfunction(self.fixture_class):   
-                self.fixture_instance = next(self.fixture_class()) 
+            if self.is_async:
+                raise RuntimeError(f"Fixture '{self.name}' is asynchronous, it can only be set up by the asyncio session engine")
+            
+            self.notify(TZEventType.FIXTURE_SETUP_STARTED)
+            try:
+                with tz_overhead_section("fixture"):
+                    if self.pool_size:
+                        self._fill_pool()
+                    elif self.cache:
+                        self.fixture_instance = self._restore_or_create()
+                    else:
+                        self.fixture_instance, self._generator = self._create_instance()
                 
-            else:
-                raise ValueError(f"Unsupported fixture type")
+                self.is_setup = True
+            finally:
+                self.notify(TZEventType.FIXTURE_SETUP_TERMINATED)
+
+    def _create_instance(self):
+        """Create and set up a new instance of the fixture. Returns the instance and the generator to resume on teardown."""
+        if inspect.isclass(self.fixture_class):
+            instance = self.fixture_class()
+            instance.setup()
+            return instance, None
             
-            self.is_setup = True
+        elif inspect.isgeneratorfunction(self.fixture_class):   
+            generator = self.fixture_class()
+            return next(generator), generator
+            
+        elif inspect.isfunction(self.fixture_class):
+            # For function fixtures, we can call the fixture directly
+            # assuming it is a callable that returns the fixture instance
+            return self.fixture_class(), None
+            
+        else:
+            raise ValueError(f"Unsupported fixture type")
+
+    def cache_key(self) -> str:
+        """Content address of the snapshots of the fixture: its source and the values of the constants injected into it."""
+        _base = self.fixture_class.__init__ if inspect.isclass(self.fixture_class) else self.fixture_class
+        _params = inspect.signature(inspect.unwrap(_base)).parameters
+        _constants = {k: repr(_TZEN_CONSTANTS_[k].value) for k in sorted(_params) if k in _TZEN_CONSTANTS_}
+        return hashlib.sha256(f"{tz_fixture_source_hash(self)}:{_constants}".encode()).hexdigest()
+
+    def _restore_or_create(self):
+        _cache = TZFixtureCache()
+        _key = self.cache_key()
+        found, instance = _cache.load(self.name, _key)
+        if found:
+            return instance
+        
+        instance, _ = self._create_instance()
+        _cache.store(self.name, _key, instance)
+        return instance
+
+    def _destroy_instance(self, instance, generator):
+        if inspect.isclass(self.fixture_class):
+            instance.teardown()
+        elif generator is not None:
+            # Resume the generator after its yield to run the teardown code
+            next(generator, None)
             
     def teardown(self):
         """Teardown the fixture instance."""
+        with self._lock:
+            self._teardown()
+
+    def _teardown(self):
         if self.is_setup:
-            if inspect.isclass(self.fixture_class):
-                self.fixture_instance.teardown()
+            
+            if self.is_async:
+                raise RuntimeError(f"Fixture '{self.name}' is asynchronous, it can only be torn down by the asyncio session engine")
+            
+            self.notify(TZEventType.FIXTURE_TEARDOWN_STARTED)
+            try:
+                with tz_overhead_section("fixture"):
+                    if self.pool_size:
+                        self._drain_pool()
+                    else:
+                        self._destroy_instance(self.fixture_instance, self._generator)
+                        self._generator = None
+                
                 self.fixture_instance = None
-            elif inspect.isgeneratorfunction(self.fixture_class):  
-                self.fixture_class()
+                self.is_setup = False
+            finally:
+                self.notify(TZEventType.FIXTURE_TEARDOWN_TERMINATED)
+
+    def _get_async_lock(self) -> asyncio.Lock:
+        # A session runs on its own event loop, locks cannot be shared between loops
+        _loop = asyncio.get_running_loop()
+        if self._async_lock is None or self._async_lock[0] is not _loop:
+            self._async_lock = (_loop, asyncio.Lock())
+        return self._async_lock[1]
+
+    async def setup_async(self):
+        """Setup the fixture instance on the event loop. Synchronous fixtures are set up in place."""
+        if not self.is_async:
+            self.setup()
+            return
+        
+        async with self._get_async_lock():
+            if self.is_setup:
+                return
             
-            self.is_setup = False
+            self.notify(TZEventType.FIXTURE_SETUP_STARTED)
+            try:
+                with tz_overhead_section("fixture"):
+                    if inspect.isclass(self.fixture_class):
+                        self.fixture_instance = self.fixture_class()
+                        _res = self.fixture_instance.setup()
+                        if inspect.isawaitable(_res):
+                            await _res
+                    
+                    elif inspect.isasyncgenfunction(self.fixture_class):
+                        self._generator = self.fixture_class()
+                        self.fixture_instance = await self._generator.__anext__()
+                    
+                    else:
+                        self.fixture_instance = await self.fixture_class()
+                
+                self.is_setup = True
+            finally:
+                self.notify(TZEventType.FIXTURE_SETUP_TERMINATED)
 
+    async def teardown_async(self):
+        """Teardown the fixture instance on the event loop. Synchronous fixtures are torn down in place."""
+        if not self.is_async:
+            self.teardown()
+            return
+        
+        async with self._get_async_lock():
+            if not self.is_setup:
+                return
+            
+            self.notify(TZEventType.FIXTURE_TEARDOWN_STARTED)
+            try:
+                with tz_overhead_section("fixture"):
+                    if inspect.isclass(self.fixture_class):
+                        _res = self.fixture_instance.teardown()
+                        if inspect.isawaitable(_res):
+                            await _res
+                    
+                    elif self._generator is not None:
+                        # Resume the generator after its yield to run the teardown code
+                        try:
+                            await self._generator.__anext__()
+                        except StopAsyncIteration:
+                            pass
+                        self._generator = None
+                
+                self.fixture_instance = None
+                self.is_setup = False
+            finally:
+                self.notify(TZEventType.FIXTURE_TEARDOWN_TERMINATED)
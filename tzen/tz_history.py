@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Author:   Lorenzo Furcas (TopFirmino)
+# License:  MIT – see the LICENSE file in the repository root for details.
+# ---------------------------------------------------------------------------
+"""This module implements the history store: an append-only JSON Lines file with one record per executed test.
+The history is used to compare runs over time, e.g. durations and resources consumed by every test and step, and to
+track the flakiness of every test: the rate of its executions that passed only after being run again."""
+
+from __future__ import annotations
+import json
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from .tz_types import TZSessionInfo, TZTestInfo, TZStepInfo, TZTestStatusType
+from ._tz_logging import tz_getLogger
+
+logger = tz_getLogger(__name__)
+
+
+def _step_record(step:TZStepInfo) -> Dict[str, Any]:
+    return {
+        "name": step.name,
+        "index": step.index,
+        "status": step.status.name,
+        "duration": step.end - step.start,
+        "resources": asdict(step.resources) if step.resources else None,
+    }
+
+def _test_record(session:TZSessionInfo, test:TZTestInfo) -> Dict[str, Any]:
+    return {
+        "session": session.start,
+        "name": test.name,
+        "selector": test.selector,
+        "status": test.status.name,
+        "start": test.start,
+        "end": test.end,
+        "duration": test.end - test.start,
+        "error": test.error,
+        "attempts": max(len(test.attempts), 1),
+        "flaky": test.status == TZTestStatusType.FLAKY,
+        "resources": asdict(test.resources) if test.resources else None,
+        "steps": [_step_record(x) for x in test.steps],
+    }
+
+
+class TZHistoryStore:
+    """Append-only store of test executions."""
+
+    def __init__(self, path:str) -> None:
+        self.path = Path(path).absolute()
+
+    def append(self, info:TZSessionInfo) -> None:
+        """Append a record for every test executed in the session."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for test in info.details.values():
+                # Skipped tests did not run, their durations would mislead the comparisons
+                if test is None or test.status == TZTestStatusType.SKIPPED:
+                    continue
+                f.write(json.dumps(_test_record(info, test)) + "\n")
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over all the records of the store, oldest first. Corrupted lines are skipped."""
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for n, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping corrupted history record {self.path}:{n}")
+
+    def flakiness(self) -> Dict[str, float]:
+        """Rate of the executions of every test, by selector, that were flaky."""
+        totals:Dict[str, List[int]] = {}
+        for record in self.records():
+            _total = totals.setdefault(record.get("selector") or record["name"], [0, 0])
+            _total[0] += bool(record.get("flaky"))
+            _total[1] += 1
+        return {k: v[0] / v[1] for k, v in totals.items()}
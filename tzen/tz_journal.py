@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Author:   Lorenzo Furcas (TopFirmino)
+# License:  MIT – see the LICENSE file in the repository root for details.
+# ---------------------------------------------------------------------------
+"""This module implements the session journal: a write-ahead JSON Lines file with the full TZTestInfo of every
+completed test, appended as soon as the session records its final result, i.e. after its reruns.
+Records are flushed immediately and fsynced in batches, every `batch_size` records or `batch_interval` seconds, so a
+crash of the machine loses at most the last batch while a crash of the process loses nothing. A session is resumed
+from its journal by skipping the tests already recorded, see TZSession."""
+
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator
+
+from .tz_types import TZEventType, TZTestInfo
+from .tz_results import tz_test_info_to_dict, tz_test_info_from_dict
+from ._tz_logging import tz_getLogger
+
+logger = tz_getLogger(__name__)
+
+
+class TZJournal:
+    """Session observer appending a record for every completed test."""
+
+    def __init__(self, path:str, batch_size:int = 16, batch_interval:float = 1.0) -> None:
+        self.path = Path(path).absolute()
+        self.batch_size = max(batch_size, 1)
+        self.batch_interval = batch_interval
+        self._file = None
+        self._pending = 0
+        self._synced = 0.0
+        self._lock = threading.Lock()
+
+    # ---- writing -------------------------------------------------------------
+
+    def bind(self, session) -> TZJournal:
+        """Subscribe the journal to a session."""
+        session.attach(self._on_session_started, TZEventType.SESSION_STARTED)
+        session.attach(self._on_test_recorded, TZEventType.TEST_RECORDED)
+        session.attach(self._on_session_terminated, TZEventType.SESSION_TERMINATED)
+        return self
+
+    def _sync(self) -> None:
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._synced = time.monotonic()
+
+    def _on_session_started(self, session) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Journals of resumed sessions are extended, not rewritten
+        self._file = open(self.path, 'a+', encoding='utf-8')
+        if self._file.tell():
+            self._file.seek(self._file.tell() - 1)
+            if self._file.read(1) != "\n":
+                # Terminate the torn record of the crashed session
+                self._file.write("\n")
+        self._synced = time.monotonic()
+
+    def _on_test_recorded(self, session, info:TZTestInfo) -> None:
+        _line = json.dumps(tz_test_info_to_dict(info)) + "\n"
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(_line)
+            self._file.flush()
+            self._pending += 1
+            if self._pending >= self.batch_size or time.monotonic() - self._synced >= self.batch_interval:
+                self._sync()
+
+    def _on_session_terminated(self, session) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+
+    # ---- reading -------------------------------------------------------------
+
+    def records(self) -> Iterator[TZTestInfo]:
+        """Iterate over the tests recorded in the journal. Torn records, e.g. the last one of a crashed session, are skipped."""
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for n, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield tz_test_info_from_dict(json.loads(line))
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    logger.warning(f"Skipping torn journal record {self.path}:{n}")
+
+    def completed(self) -> Dict[str, TZTestInfo]:
+        """The tests recorded in the journal by name, the last record of a test wins."""
+        return {x.name: x for x in self.records()}
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Author:   Lorenzo Furcas (TopFirmino)
+# License:  MIT – see the LICENSE file in the repository root for details.
+# ---------------------------------------------------------------------------
+"""This module reuses a testcase as a load generator: N virtual users, started over a ramp-up period, each construct
+their own instance of the test class and run its steps in a loop until the end of the test.
+Every virtual user has its own TEST and STEP fixture instances, SESSION, MODULE and PACKAGE fixtures are shared.
+Users are threads, or asyncio tasks when the testcase has asynchronous steps. Latencies are aggregated in time windows:
+every window is reported as soon as it closes and only its latency buckets are kept, so memory does not grow with the
+duration of the test."""
+
+from __future__ import annotations
+import asyncio
+import math
+import threading
+import time
+from typing import Dict, List
+
+from .tz_test import TZTest, TZTestRun
+from .tz_fixture import _TZEN_FIXTURES_, tz_teardown_user_fixtures
+from .tz_types import TZLatencyInfo, TZLoadInfo, TZLoadWindowInfo
+from ._tz_context import TZ_CURRENT_RUN, TZ_USER_FIXTURES, TZ_WORKER
+from ._tz_logging import tz_getLogger, TZTestLogger
+
+logger = tz_getLogger(__name__)
+
+# Name of the samples of whole iterations
+_ITERATION = ""
+# Latency buckets grow by 1%, starting at 1us
+_BUCKET_MIN = 1e-6
+_BUCKET_LOG = math.log(1.01)
+
+
+class _TZLatencyBuckets:
+    """Log-scaled histogram of (latency, ok) samples. Percentiles are nearest-rank on the successful samples, within 1%
+    of the exact value, and the memory used depends on the spread of the latencies, not on the number of samples."""
+
+    __slots__ = ("count", "errors", "total", "max", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets:Dict[int, int] = {}
+
+    def add(self, latency:float, ok:bool) -> None:
+        self.count += 1
+        if not ok:
+            self.errors += 1
+            return
+        self.total += latency
+        self.max = max(self.max, latency)
+        _bucket = int(math.log(latency / _BUCKET_MIN) / _BUCKET_LOG) if latency > _BUCKET_MIN else 0
+        self.buckets[_bucket] = self.buckets.get(_bucket, 0) + 1
+
+    def merge(self, other:_TZLatencyBuckets) -> None:
+        self.count += other.count
+        self.errors += other.errors
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+
+    def info(self) -> TZLatencyInfo:
+        info = TZLatencyInfo(count=self.count, errors=self.errors)
+        _ok = self.count - self.errors
+        if _ok:
+            _ranks = [max(math.ceil(p * _ok), 1) for p in (0.50, 0.90, 0.99)]
+            _percentiles, _seen = [], 0
+            for bucket, count in sorted(self.buckets.items()):
+                _seen += count
+                while len(_percentiles) < len(_ranks) and _ranks[len(_percentiles)] <= _seen:
+                    # Upper bound of the bucket, never above the largest sample
+                    _percentiles.append(min(_BUCKET_MIN * math.exp((bucket + 1) * _BUCKET_LOG), self.max))
+            info.mean = self.total / _ok
+            info.p50, info.p90, info.p99 = _percentiles
+            info.max = self.max
+        return info
+
+
+class TZLoadRunner:
+    """Runs a testcase as concurrent virtual users for duration seconds."""
+
+    def __init__(self, test:TZTest, users:int, duration:float, ramp_up:float = 0.0, window:float = 1.0) -> None:
+        if users < 1 or duration <= 0 or window <= 0:
+            raise ValueError("A load test needs at least one user, a positive duration and a positive window")
+        self.test = test
+        self.users = users
+        self.duration = duration
+        self.ramp_up = max(ramp_up, 0.0)
+        self.window = window
+        self.is_async = any(step.is_async for step in test.steps)
+        self._origin = 0.0
+        self._count = max(math.ceil(round(duration / window, 6)), 1)
+        # Latency buckets of the open windows by step name, by window index. Samples of a window already closed, or
+        # of an iteration overrunning the duration, are counted in the first open one
+        self._open:Dict[int, Dict[str, _TZLatencyBuckets]] = {}
+        self._next = 0
+        self._last = 0.0
+        self._totals:Dict[str, _TZLatencyBuckets] = {}
+        self._started:List[float] = []
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    # ---- virtual users -------------------------------------------------------
+
+    def _delay(self, index:int) -> float:
+        return self.ramp_up * index / self.users
+
+    def _begin_user(self, index:int):
+        """Create the run of a user and construct its test instance. Returns the run, or None if construction failed."""
+        run = self.test.create_run()
+        run.logger = TZTestLogger(f"{self.test.name}#{index + 1}", len(self.test.steps))
+        TZ_CURRENT_RUN.set(run)
+        TZ_WORKER.set(f"user-{index + 1}")
+        with self._lock:
+            self._started.append(time.perf_counter() - self._origin)
+        try:
+            run.instance = self.test.test_class()
+            run.instance.logger = run.logger
+            return run
+        except Exception as e:
+            run.logger.error(f"Virtual user stopped, construction failed: {e}")
+            return None
+
+    def _sample(self, index:int, name:str, start:float, ok:bool) -> None:
+        _now = time.perf_counter()
+        _offset = _now - self._origin
+        with self._lock:
+            _window = min(max(int(_offset // self.window), self._next), self._count - 1)
+            _buckets = self._open.setdefault(_window, {})
+            if name not in _buckets:
+                _buckets[name] = _TZLatencyBuckets()
+            _buckets[name].add(_now - start, ok)
+            self._last = max(self._last, _offset)
+
+    def _user(self, index:int, stop_at:float) -> None:
+        instances = {}
+        TZ_USER_FIXTURES.set(instances)
+        run = None
+        try:
+            run = self._begin_user(index)
+            while run is not None and time.perf_counter() < stop_at:
+                _iteration, _ok = time.perf_counter(), True
+                for step in self.test.steps:
+                    _start = time.perf_counter()
+                    try:
+                        _res = step.run(run.instance)
+                    except Exception as e:
+                        run.logger.debug(f"{step.name}: {e}")
+                        _res = False
+                    self._sample(index, step.name, _start, _res)
+                    _ok &= _res
+                    if step.blocking and not _res:
+                        break
+                self._sample(index, _ITERATION, _iteration, _ok)
+        finally:
+            self._end_user(run, instances)
+
+    async def _user_async(self, index:int, stop_at:float) -> None:
+        await asyncio.sleep(self._delay(index))
+        # Every task runs in its own copy of the context
+        instances = {}
+        TZ_USER_FIXTURES.set(instances)
+        run = None
+        try:
+            run = self._begin_user(index)
+            while run is not None and time.perf_counter() < stop_at:
+                _iteration, _ok = time.perf_counter(), True
+                for step in self.test.steps:
+                    _start = time.perf_counter()
+                    try:
+                        _res = await step.run_async(run.instance)
+                    except Exception as e:
+                        run.logger.debug(f"{step.name}: {e}")
+                        _res = False
+                    self._sample(index, step.name, _start, _res)
+                    _ok &= _res
+                    if step.blocking and not _res:
+                        break
+                self._sample(index, _ITERATION, _iteration, _ok)
+        finally:
+            self._end_user(run, instances)
+
+    def _end_user(self, run:TZTestRun | None, instances:Dict[str, tuple]) -> None:
+        try:
+            tz_teardown_user_fixtures(instances)
+        except Exception as e:
+            logger.error(f"Teardown of the fixtures of a virtual user failed: {e}")
+        if run is not None:
+            for fix in _TZEN_FIXTURES_.values():
+                if fix.pool_size:
+                    fix.release(run)
+
+    # ---- execution -----------------------------------------------------------
+
+    def run(self) -> TZLoadInfo:
+        """Run the load test and return its aggregated results. Shared fixtures are torn down at the end."""
+        logger.info(f"Load test of {self.test.name}: {self.users} users for {self.duration}s, ramp-up {self.ramp_up}s")
+        info = TZLoadInfo(name=self.test.name, users=self.users, duration=self.duration, ramp_up=self.ramp_up, start=time.time())
+        self._origin = time.perf_counter()
+        stop_at = self._origin + self.duration
+        _reporter = threading.Thread(target=self._report, args=(info,), name="tzen-load-report", daemon=True)
+        _reporter.start()
+
+        try:
+            if self.is_async:
+                asyncio.run(self._run_async(stop_at))
+            else:
+                self._run_threads(stop_at)
+        finally:
+            self._done.set()
+            _reporter.join()
+            for fix in _TZEN_FIXTURES_.values():
+                if fix.is_setup and not fix.is_async:
+                    fix.teardown()
+
+        info.end = time.time()
+        # The last window ends with the last iteration
+        _elapsed = max(self._last, self.duration)
+        self._close_windows(info, self._count, _elapsed)
+        info.iterations = self._totals.pop(_ITERATION, _TZLatencyBuckets()).info()
+        info.steps = {x.name: self._totals[x.name].info() for x in self.test.steps if x.name in self._totals}
+        info.throughput = info.iterations.count / _elapsed
+        self._log_totals(info)
+        return info
+
+    def _run_threads(self, stop_at:float) -> None:
+        _threads = []
+        for index in range(self.users):
+            # Users are started by the ramp-up schedule, not all at once
+            _wait = self._origin + self._delay(index) - time.perf_counter()
+            if _wait > 0:
+                time.sleep(_wait)
+            if time.perf_counter() >= stop_at:
+                break
+            _thread = threading.Thread(target=self._user, args=(index, stop_at), name=f"tzen-user-{index + 1}", daemon=True)
+            _thread.start()
+            _threads.append(_thread)
+        for _thread in _threads:
+            _thread.join()
+
+    async def _run_async(self, stop_at:float) -> None:
+        await asyncio.gather(*[self._user_async(index, stop_at) for index in range(self.users) if self._delay(index) < self.duration])
+
+    # ---- results -------------------------------------------------------------
+
+    def _report(self, info:TZLoadInfo) -> None:
+        """Close every window but the last one as soon as it ends."""
+        for n in range(1, self._count):
+            if self._done.wait(self._origin + n * self.window - time.perf_counter()):
+                return
+            self._close_windows(info, n, n * self.window)
+
+    def _close_windows(self, info:TZLoadInfo, upto:int, end:float) -> None:
+        """Aggregate and log the windows before upto; end is the end of the last of them."""
+        while self._next < upto:
+            with self._lock:
+                n = self._next
+                _buckets = self._open.pop(n, {})
+                self._next += 1
+            _start, _end = n * self.window, end if n == upto - 1 else (n + 1) * self.window
+            _window = TZLoadWindowInfo(start=_start, end=_end, users=sum(1 for x in self._started if x < _end))
+            _window.iterations = _buckets.get(_ITERATION, _TZLatencyBuckets()).info()
+            _window.steps = {x.name: _buckets[x.name].info() for x in self.test.steps if x.name in _buckets}
+            _window.throughput = _window.iterations.count / (_end - _start)
+            info.windows.append(_window)
+            for name, buckets in _buckets.items():
+                self._totals.setdefault(name, _TZLatencyBuckets()).merge(buckets)
+
+            _ms = lambda x: f"{x * 1000:.1f}ms"
+            _steps = ", ".join(f"{k} p50 {_ms(v.p50)} p90 {_ms(v.p90)} p99 {_ms(v.p99)}" for k, v in _window.steps.items())
+            logger.info(f"[{_window.start:6.1f}s - {_window.end:6.1f}s] {_window.users} users, {_window.throughput:.1f} it/s, "
+                        f"{_window.iterations.errors} errors | {_steps}")
+
+    def _log_totals(self, info:TZLoadInfo) -> None:
+        _ms = lambda x: f"{x * 1000:.1f}ms"
+        logger.info(f"Total: {info.iterations.count} iterations, {info.throughput:.1f} it/s, {info.iterations.errors} failed")
+        for name, latency in info.steps.items():
+            logger.info(f"  {name}: {latency.count} runs, {latency.errors} errors, mean {_ms(latency.mean)}, "
+                        f"p50 {_ms(latency.p50)}, p90 {_ms(latency.p90)}, p99 {_ms(latency.p99)}, max {_ms(latency.max)}")
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Author:   Lorenzo Furcas (TopFirmino)
+# License:  MIT – see the LICENSE file in the repository root for details.
+# ---------------------------------------------------------------------------
+"""This module provides an opt-in memory profiler for test sessions.
+For every test and step it records the tracemalloc peak, the memory retained after the run and the growth of the
+current RSS. The growth of the gc object counts by type walks the whole heap, so it is only recorded for tests.
+Tests retaining more than a threshold are flagged as leaking.
+"""
+
+from __future__ import annotations
+import gc
+import os
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from .tz_types import TZEventType, TZMemoryInfo
+from ._tz_logging import tz_getLogger
+
+logger = tz_getLogger(__name__)
+
+_STATM = "/proc/self/statm"
+
+
+def _current_rss() -> int:
+    """Returns the current resident set size of the process in bytes, 0 when not available.
+    ru_maxrss is a high-water mark: it does not grow while a test reuses memory freed by a previous one."""
+    try:
+        with open(_STATM, "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0
+
+def _gc_counts() -> Counter:
+    return Counter(type(o).__name__ for o in gc.get_objects())
+
+
+class _TZMemorySample:
+    """Memory state captured at the beginning of a test or of a step."""
+
+    __slots__ = ("current", "rss", "counts", "snapshot")
+
+    def __init__(self, current:int, rss:int, counts:Counter | None, snapshot:tracemalloc.Snapshot) -> None:
+        self.current = current
+        self.rss = rss
+        self.counts = counts
+        self.snapshot = snapshot
+
+
+class TZMemoryProfiler:
+    """Session observer that fills the memory field of TZTestInfo and TZStepInfo.
+
+    Args:
+        threshold (int): Retained bytes above which a test or a step is flagged as leaking.
+        top (int): Number of allocation sites and object types reported.
+        frames (int): Number of frames stored by tracemalloc for every allocation.
+    """
+
+    FILTERS = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    )
+
+    def __init__(self, threshold:int = 1024 * 1024, top:int = 10, frames:int = 1) -> None:
+        self.threshold = threshold
+        self.top = top
+        self.frames = frames
+        self._owns_tracemalloc = False
+        self._samples:Dict[Tuple[object, int], _TZMemorySample] = {}
+        self._peaks:Dict[object, int] = {}
+        self.leaks:List[str] = []
+
+    def bind(self, session) -> TZMemoryProfiler:
+        """Subscribe the profiler to a session and to all of its tests."""
+        session.attach(self._on_session_started, TZEventType.SESSION_STARTED)
+        session.attach(self._on_session_terminated, TZEventType.SESSION_TERMINATED)
+        for test in session.tests:
+            test.attach(self._on_test_started, TZEventType.TEST_STARTED)
+            test.attach(self._on_test_terminated, TZEventType.TEST_TERMINATED)
+            test.attach(self._on_step_started, TZEventType.STEP_STARTED)
+            test.attach(self._on_step_terminated, TZEventType.STEP_TERMINATED)
+        return self
+
+    # ---- sampling ------------------------------------------------------------
+
+    def _reset_peak(self) -> None:
+        # tracemalloc.reset_peak is only available from Python 3.9
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(self.FILTERS)
+
+    def _sample(self, census:bool) -> _TZMemorySample:
+        gc.collect()
+        counts = _gc_counts() if census else None
+        snapshot = self._snapshot()
+        # Read after the snapshot: it stays alive until the end of the measured run
+        current, _ = tracemalloc.get_traced_memory()
+        return _TZMemorySample(current, _current_rss(), counts, snapshot)
+
+    def _measure(self, before:_TZMemorySample, peak:int) -> TZMemoryInfo:
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+        rss = _current_rss()
+        growth = Counter()
+        if before.counts is not None:
+            growth = _gc_counts()
+            growth.subtract(before.counts)
+        stats = self._snapshot().compare_to(before.snapshot, "lineno")
+
+        retained = max(current - before.current, 0)
+        return TZMemoryInfo(
+            peak=max(peak - before.current, 0),
+            retained=retained,
+            rss_delta=max(rss - before.rss, 0),
+            gc_growth={k: v for k, v in growth.most_common(self.top) if v > 0},
+            top_allocations=[str(x) for x in stats[:self.top] if x.size_diff > 0],
+            leak=retained > self.threshold,
+        )
+
+    def _update_peak(self, run) -> int:
+        _, peak = tracemalloc.get_traced_memory()
+        self._peaks[run] = max(self._peaks.get(run, 0), peak)
+        return peak
+
+    # ---- session events ------------------------------------------------------
+
+    def _on_session_started(self, session) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._owns_tracemalloc = True
+
+    def _on_session_terminated(self, session) -> None:
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+        if self.leaks:
+            logger.warning(f"Tests retaining more than {self.threshold} bytes: {', '.join(self.leaks)}")
+
+    # ---- test events ---------------------------------------------------------
+
+    def _on_test_started(self, test) -> None:
+        self._samples[(test, 0)] = self._sample(census=True)
+        self._peaks[test] = 0
+        self._reset_peak()
+
+    def _on_test_terminated(self, test) -> None:
+        before = self._samples.pop((test, 0), None)
+        if before is None:
+            return
+        peak = max(self._update_peak(test), self._peaks.pop(test, 0))
+        test.info.memory = self._measure(before, peak)
+        if test.info.memory.leak:
+            self.leaks.append(test.name)
+            test.logger.warning(f"Retained {test.info.memory.retained} bytes after the test")
+
+    def _on_step_started(self, test) -> None:
+        self._update_peak(test)
+        self._samples[(test, test.info.current_step)] = self._sample(census=False)
+        self._reset_peak()
+
+    def _on_step_terminated(self, test) -> None:
+        before = self._samples.pop((test, test.info.current_step), None)
+        if before is None or not test.info.steps:
+            return
+        peak = self._update_peak(test)
+        test.info.steps[test.info.current_step - 1].memory = self._measure(before, peak)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Author:   Lorenzo Furcas (TopFirmino)
+# License:  MIT – see the LICENSE file in the repository root for details.
+# ---------------------------------------------------------------------------
+"""This module implements the results file of a session: a JSON Lines file whose first record describes the session
+and every following record is the full TZTestInfo of an executed test.
+Results files of several shards are merged into a single TZSessionInfo reading one test at a time, so that the
+memory used by a merge does not depend on the size of the suite."""
+
+from __future__ import annotations
+import json
+from dataclasses import asdict
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from .tz_types import (TZSessionInfo, TZSessionStatusType, TZTestInfo, TZTestStatusType, TZStepInfo, TZMemoryInfo,
+                       TZResourceUsage, TZCasesInfo, TZCaseFailure, TZAttemptInfo)
+
+
+def _json_default(obj:Any):
+    if isinstance(obj, Enum):
+        return obj.name
+    return str(obj)
+
+def tz_test_info_to_dict(info:TZTestInfo) -> Dict[str, Any]:
+    return json.loads(json.dumps(asdict(info), default=_json_default))
+
+def _cases_from_dict(data:Dict[str, Any] | None) -> TZCasesInfo | None:
+    if not data:
+        return None
+    data = dict(data)
+    data["failures"] = [TZCaseFailure(**x) for x in data.get("failures", [])]
+    return TZCasesInfo(**data)
+
+def _step_info_from_dict(data:Dict[str, Any]) -> TZStepInfo:
+    data = dict(data)
+    data["cases"] = _cases_from_dict(data.get("cases"))
+    data["status"] = TZTestStatusType[data["status"]]
+    data["memory"] = TZMemoryInfo(**data["memory"]) if data.get("memory") else None
+    data["resources"] = TZResourceUsage(**data["resources"]) if data.get("resources") else None
+    return TZStepInfo(**data)
+
+def tz_test_info_from_dict(data:Dict[str, Any]) -> TZTestInfo:
+    data = dict(data)
+    data["status"] = TZTestStatusType[data["status"]]
+    data["steps"] = [_step_info_from_dict(x) for x in data.get("steps", [])]
+    data["cases"] = _cases_from_dict(data.get("cases"))
+    data["attempts"] = [TZAttemptInfo(**{**x, "status": TZTestStatusType[x["status"]]}) for x in data.get("attempts", [])]
+    data["memory"] = TZMemoryInfo(**data["memory"]) if data.get("memory") else None
+    data["resources"] = TZResourceUsage(**data["resources"]) if data.get("resources") else None
+    return TZTestInfo(**data)
+
+
+class TZResultsFile:
+    """Results of a session, written once at the end of the session."""
+
+    def __init__(self, path:str) -> None:
+        self.path = path
+
+    def write(self, info:TZSessionInfo, **extra) -> None:
+        """Write the results of a session. Extra keyword arguments are stored in the session record, e.g. the shard."""
+        _session = {
+            "kind": "session",
+            "name": info.name,
+            "total_tests": info.total_tests,
+            "executed_tests": info.executed_tests,
+            "passed_tests": info.passed_tests,
+            "failed_tests": info.failed_tests,
+            "skipped_tests": info.skipped_tests,
+            "flaky_tests": info.flaky_tests,
+            "start": info.start,
+            "end": info.end,
+            "status": info.status.name,
+            "overhead": info.overhead,
+            "saved_setups": info.saved_setups,
+            **extra,
+        }
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(_session) + "\n")
+            for test in info.details.values():
+                if test is not None:
+                    f.write(json.dumps({"kind": "test", **tz_test_info_to_dict(test)}) + "\n")
+
+    def _records(self) -> Iterator[Dict[str, Any]]:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def session(self) -> Dict[str, Any]:
+        return next(x for x in self._records() if x["kind"] == "session")
+
+    def tests(self) -> Iterator[TZTestInfo]:
+        for record in self._records():
+            if record.pop("kind") == "test":
+                yield tz_test_info_from_dict(record)
+
+
+def tz_merge_results(paths:Iterable[str]) -> Tuple[TZSessionInfo, bool, List[TZTestInfo]]:
+    """Merge the session records of several results files. The tests are not kept in memory: the returned info has no
+    details, and is returned together with whether any test has memory figures and the list of leaking tests."""
+    info = TZSessionInfo(name="Merged Session", total_tests=0, details=None)
+    memory, leaks = False, []
+    for path in paths:
+        results = TZResultsFile(path)
+        _session = results.session()
+        info.total_tests += _session["total_tests"]
+        info.executed_tests += _session["executed_tests"]
+        info.passed_tests += _session["passed_tests"]
+        info.failed_tests += _session["failed_tests"]
+        info.skipped_tests += _session.get("skipped_tests", 0)
+        info.flaky_tests += _session.get("flaky_tests", 0)
+        info.saved_setups += _session.get("saved_setups", 0)
+        info.start = min(info.start, _session["start"]) if info.start else _session["start"]
+        info.end = max(info.end, _session["end"])
+        for k, v in _session.get("overhead", {}).items():
+            info.overhead[k] = info.overhead.get(k, 0.0) + v
+
+        for test in results.tests():
+            if test.memory:
+                memory = True
+                if test.memory.leak:
+                    leaks.append(test)
+
+    info.status = TZSessionStatusType.FAILED if info.failed_tests else TZSessionStatusType.PASSED
+    return info, memory, leaks
+
+def tz_iter_results(paths:Iterable[str]) -> Iterator[TZTestInfo]:
+    """Iterate over the tests of several results files, one at a time."""
+    for path in paths:
+        yield from TZResultsFile(path).tests()
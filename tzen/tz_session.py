@@ -9,15 +9,32 @@ from __future__ import annotations
 from tzen.tz_types import TZSessionInfo
 
 from .tz_types import *
-from .tz_test import TZTest
+from .tz_test import TZTest, TZTestRun
 from ._tz_logging import tz_getLogger
 from .tz_types import TZEventType
 import time
+import os
+import json
+import select
+import signal
+import sys
+import asyncio
+import contextlib
+import contextvars
+import functools
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 from .tz_tree import TzTreeNode
-from .tz_fixture import TZFixtureScope
+from .tz_fixture import TZFixtureScope, TZFixtureContainer, tz_fixture_graph, tz_fixture_levels
+from .tz_shard import tz_shard_tests
+from .tz_tags import tz_select_tagged
+from .tz_results import tz_test_info_to_dict, tz_test_info_from_dict
 from .tz_plugins import hookimpl, hookspec, get_pm
+from ._tz_overhead import tz_overhead_section, tz_overhead_split, TZ_USER_CATEGORIES
+from ._tz_context import TZ_WORKER
 from pathlib import Path
-from typing import List
+from typing import Callable, Dict, List, Iterable, Tuple
 from datetime import datetime
 from jinja2 import Environment
 
@@ -83,6 +100,12 @@ class TZSvrBackend:
         with open(_p, 'w') as f:
             f.write(self.build(info, logger))
 
+    def write_stream(self, info:TZSessionInfo, tests:Iterable[TZTestInfo], memory:bool, leaks:List[TZTestInfo], logger):
+        """Write the report of a session whose tests are provided by an iterator, e.g. when merging shards.
+        Backends able to render the tests one at a time shall override it, this implementation loads them all."""
+        info.details = {x.name: x for x in tests}
+        self.write(info, logger)
+
 class DefaultHtmlSVRBackend(TZSvrBackend):
     HTML_TEMPLATE = """<!doctype html>
 <html lang="en">
@@ -131,6 +154,8 @@ class DefaultHtmlSVRBackend(TZSvrBackend):
     }
     .badge.ok { border-color: var(--ok); color: var(--ok); }
     .badge.fail { border-color: var(--fail); color: var(--fail); }
+    .badge.skip { border-color: var(--warn); color: var(--warn); }
+    .badge.flaky { border-color: var(--warn); color: var(--warn); }
 
     /* Footer */
     footer { margin-top: 2rem; padding-top: 1rem; border-top: 1px solid var(--border); font-size: .85rem; color: var(--muted); }
@@ -163,6 +188,27 @@ class DefaultHtmlSVRBackend(TZSvrBackend):
       <div class="kpi fail">{{ failed_tests }}</div>
       <div class="muted">Total failed</div>
     </div>
+    {% if skipped_tests %}
+    <div class="card">
+      <h2>Skipped</h2>
+      <div class="kpi">{{ skipped_tests }}</div>
+      <div class="muted">Not run or cancelled after the session stopped</div>
+    </div>
+    {% endif %}
+    {% if flaky_tests %}
+    <div class="card">
+      <h2>Flaky</h2>
+      <div class="kpi">{{ flaky_tests }}</div>
+      <div class="muted">Passed after failed attempts, included in passed</div>
+    </div>
+    {% endif %}
+    {% if saved_setups %}
+    <div class="card">
+      <h2>Setups saved</h2>
+      <div class="kpi">{{ saved_setups }}</div>
+      <div class="muted">Fixture setups avoided by reuse</div>
+    </div>
+    {% endif %}
   </section>
 
   <section>
@@ -173,6 +219,9 @@ class DefaultHtmlSVRBackend(TZSvrBackend):
           <th style="width:32%">Test</th>
           <th style="width:12%">Status</th>
           <th style="width:14%">Duration</th>
+          <th style="width:18%">Resources</th>
+          <th style="width:14%">Overhead</th>
+          {% if memory %}<th style="width:16%">Memory</th>{% endif %}
           <th>Notes / Error</th>
         </tr>
       </thead>
@@ -189,19 +238,77 @@ class DefaultHtmlSVRBackend(TZSvrBackend):
               <span class="badge ok">Passed</span>
             {% elif t.status == TZTestStatusType.FAILED  %}
               <span class="badge fail">Failed</span>
+            {% elif t.status == TZTestStatusType.SKIPPED  %}
+              <span class="badge skip">Skipped</span>
+            {% elif t.status == TZTestStatusType.FLAKY  %}
+              <span class="badge flaky">Flaky</span>
             {% else %}
               <span>{{ t.status }}</span>
               <span class="badge">{{ t.status|capitalize }}</span>
             {% endif %}
           </td>
           <td>{{ (t.end - t.start) | dhms }}</td>
+          <td>
+            {% if t.resources %}
+              <div>CPU: {{ "%.2f" | format(t.resources.user_time) }}s user / {{ "%.2f" | format(t.resources.system_time) }}s sys
+                {% if t.end > t.start %}<span class="muted">({{ "%.0f" | format(100 * t.resources.cpu_time / (t.end - t.start)) }}%)</span>{% endif %}</div>
+              <div class="muted">Max RSS: {{ t.resources.max_rss | bytes }}</div>
+              <div class="muted">Ctx switches: {{ t.resources.voluntary_switches }} vol / {{ t.resources.involuntary_switches }} invol</div>
+              <div class="muted">Block I/O: {{ t.resources.block_input }} in / {{ t.resources.block_output }} out</div>
+              {% if t.steps %}
+              <details>
+                <summary class="muted">Steps</summary>
+                {% for s in t.steps if s.resources %}
+                  <div class="muted">{{ s.index }}. {{ s.name }}: {{ "%.3f" | format(s.end - s.start) }}s wall, {{ "%.3f" | format(s.resources.cpu_time) }}s CPU, {{ s.resources.voluntary_switches }}/{{ s.resources.involuntary_switches }} ctx, {{ s.resources.block_input }}/{{ s.resources.block_output }} I/O</div>
+                {% endfor %}
+              </details>
+              {% endif %}
+            {% else %}
+              <span class="muted">-</span>
+            {% endif %}
+          </td>
+          <td>
+            {% if t.overhead %}
+              {% set split = t.overhead | overhead_split %}
+              <div>User: {{ "%.3f" | format(split.user) }}s</div>
+              <div>Framework: {{ "%.3f" | format(split.framework) }}s</div>
+              <details>
+                <summary class="muted">Breakdown</summary>
+                {% for k, v in t.overhead | dictsort %}<div class="muted">{{ k }}: {{ "%.4f" | format(v) }}s</div>{% endfor %}
+              </details>
+            {% else %}
+              <span class="muted">-</span>
+            {% endif %}
+          </td>
+          {% if memory %}
+          <td>
+            {% if t.memory %}
+              <div>Peak: {{ t.memory.peak | bytes }}</div>
+              <div>Retained: {{ t.memory.retained | bytes }}</div>
+              <div class="muted">RSS +{{ t.memory.rss_delta | bytes }}</div>
+              {% if t.memory.leak %}<span class="badge fail">Leak</span>{% endif %}
+            {% else %}
+              <span class="muted">-</span>
+            {% endif %}
+          </td>
+          {% endif %}
           <td>
             {% if t.error %}
               <code style="color:#ff6b7a">{{ t.error }}</code>
               {% if t.error_details %}
                 <pre style="color:red">{{ t.error_details }}</pre>
               {% endif %}
-            {% else %}
+            {% endif %}
+            {% for c in [t.cases] + t.steps|map(attribute='cases')|list if c %}
+              <div class="muted">{{ c.passed }}/{{ c.total }} cases passed{% if c.dropped %}, {{ c.dropped }} failures not kept{% endif %}</div>
+              {% for f in c.failures %}
+                <div><code style="color:#ff6b7a">#{{ f.index }} {{ f.row }}: {{ f.error }}</code></div>
+              {% endfor %}
+            {% endfor %}
+            {% for a in t.attempts if a.status != TZTestStatusType.PASSED %}
+              <div class="muted">Attempt {{ a.attempt }}: {{ a.status.name }}{% if a.error %} &middot; {{ a.error }}{% endif %}</div>
+            {% endfor %}
+            {% if not t.error and not t.cases and not t.attempts %}
               <span class="muted">-</span>
             {% endif %}
           </td>
@@ -211,6 +318,45 @@ class DefaultHtmlSVRBackend(TZSvrBackend):
     </table>
   </section>
 
+  {% if overhead %}
+  <section>
+    <h2>Framework overhead</h2>
+    <table>
+      <thead><tr><th>Category</th><th>Kind</th><th>Time</th><th>Share</th></tr></thead>
+      <tbody>
+        {% for k, v in overhead | dictsort(by="value", reverse=True) %}
+        <tr>
+          <td>{{ k }}</td>
+          <td class="muted">{{ "user" if k in user_categories else "framework" }}</td>
+          <td>{{ "%.4f" | format(v) }}s</td>
+          <td>{{ "%.1f" | format(100 * v / overhead_total) if overhead_total else 0 }}%</td>
+        </tr>
+        {% endfor %}
+      </tbody>
+    </table>
+  </section>
+  {% endif %}
+
+  {% if leaks %}
+  <section>
+    <h2>Memory leaks</h2>
+    {% for t in leaks %}
+    <div class="card">
+      <h3>{{ t.name }} <span class="badge fail">{{ t.memory.retained | bytes }} retained</span></h3>
+      {% for s in t.steps if s.memory and s.memory.leak %}
+        <div class="muted">Step {{ s.index }} {{ s.name }}: {{ s.memory.retained | bytes }} retained</div>
+      {% endfor %}
+      {% if t.memory.top_allocations %}
+        <pre>{{ t.memory.top_allocations | join("\n") }}</pre>
+      {% endif %}
+      {% if t.memory.gc_growth %}
+        <div class="muted">Object growth: {% for k, v in t.memory.gc_growth.items() %}{{ k }} +{{ v }}{% if not loop.last %}, {% endif %}{% endfor %}</div>
+      {% endif %}
+    </div>
+    {% endfor %}
+  </section>
+  {% endif %}
+
   <footer>
     Test Report generated with TZen. MIT License.
   </footer>
@@ -240,28 +386,60 @@ class DefaultHtmlSVRBackend(TZSvrBackend):
         if minutes: parts.append(f"{minutes}m")
         parts.append(f"{seconds}s") 
         return " ".join(parts)
+
+    def _bytes(self, size: int) -> str:
+        """bytes -> human readable size"""
+        try:
+            size = float(size)
+        except Exception:
+            return str(size)
+        for unit in ("B", "KiB", "MiB", "GiB"):
+            if abs(size) < 1024 or unit == "GiB":
+                return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+            size /= 1024
     
-    def build(self, info: TZSessionInfo, logger) -> str:
-    
+    def _template(self):
         env = Environment(autoescape=True)
         env.filters["ts_iso"] = self._ts_iso
         env.filters["dhms"] = self._dhms
+        env.filters["bytes"] = self._bytes
+        env.filters["overhead_split"] = tz_overhead_split
         
         template = env.from_string(self.HTML_TEMPLATE)
         template.globals['TZTestStatusType'] = TZTestStatusType
+        return template
 
-        ctx = {
+    def _context(self, info: TZSessionInfo, tests: Iterable[TZTestInfo], memory: bool, leaks: List[TZTestInfo]) -> dict:
+        return {
             "report_title": None,
             "executed_tests": info.executed_tests,
             "passed_tests": info.passed_tests,
             "failed_tests": info.failed_tests,
+            "skipped_tests": info.skipped_tests,
+            "flaky_tests": info.flaky_tests,
+            "saved_setups": info.saved_setups,
             "start_time": info.start,
             "end_time": info.end,
             "duration": info.end - info.start,
-            "tests": info.details.values(),
+            "tests": tests,
+            "memory": memory,
+            "leaks": leaks,
+            "overhead": info.overhead,
+            "overhead_total": sum(info.overhead.values()),
+            "user_categories": TZ_USER_CATEGORIES,
         }
 
-        return template.render(**ctx)
+    def build(self, info: TZSessionInfo, logger) -> str:
+        _tests = info.details.values()
+        _memory = any(t.memory for t in _tests if t)
+        _leaks = [t for t in _tests if t and t.memory and t.memory.leak]
+        return self._template().render(**self._context(info, _tests, _memory, _leaks))
+
+    def write_stream(self, info: TZSessionInfo, tests: Iterable[TZTestInfo], memory: bool, leaks: List[TZTestInfo], logger):
+        """Render the report while iterating over the tests, only one test at a time is kept in memory."""
+        with open(Path(self.path).absolute(), 'w') as f:
+            for chunk in self._template().generate(**self._context(info, tests, memory, leaks)):
+                f.write(chunk)
 
 class DefaultPlainSVRBackend(TZSvrBackend):
 
@@ -272,48 +450,389 @@ class DefaultPlainSVRBackend(TZSvrBackend):
         logger.info(f"[REPORT] info: {session.name} | Status: {status} | Executed: {execd}/{total}")
 
 
+def _to_thread(func, *args):
+    """Run func on a worker thread with a copy of the current context, as asyncio.to_thread from Python 3.9."""
+    return asyncio.get_running_loop().run_in_executor(None, functools.partial(contextvars.copy_context().run, func, *args))
+
 
 class TZSession:
-    """ Class to manage a test session. It allows to run tests and notify observers about test events."""
+    """ Class to manage a test session. It allows to run tests and notify observers about test events.
+    
+    Sessions containing asynchronous steps or fixtures, or started with a concurrency greater than one, are executed on
+    a single event loop driven by the session. Up to `concurrency` independent tests run at the same time.
+    Synchronous sessions started with more than one thread run independent tests on a thread pool instead.
+    In both cases tests sharing a TEST or STEP scoped fixture never overlap.
+    
+    SESSION fixtures are set up before the first test following their dependency graph: the fixtures of a topological
+    level are independent and are set up in parallel. They are torn down in parallel in the reverse order.
+    
+    With `reorder` the tests are grouped by the fixtures they use, so that consecutive tests share as many fixtures as
+    possible. Reusable TEST fixtures are kept alive when the next test uses them too (sequential sessions only).
+    
+    With `keep_fixtures` the synchronous SESSION fixtures are left set up at the end, to be reused by a later session.
+    
+    With `selected` only the given tests of the organizer are executed, e.g. the tests matched by glob selectors, see
+    TzTree.select_tests. With `tags` only the tests matching the tag expression are executed, e.g. "smoke and not
+    slow", see tz_tags. SESSION fixtures not used by the executed tests are not set up.
+    
+    With `shard` = (i, N) only the tests of the i-th of N shards are executed, see tz_shard_tests.
+    
+    With `completed` the tests already executed by an interrupted session, e.g. read from its TZJournal, are not run
+    again: their results are restored in the session info.
     
-    def __init__(self, test_organizer:TzTreeNode) -> None:
+    With `isolate` every test runs in a child process forked from the session, which inherits the imported modules and
+    the SESSION fixtures copy-on-write: a crash of the child, or a child running longer than `timeout` seconds, fails
+    the test instead of the session. Isolated sessions run one synchronous test at a time.
+    
+    With `maxfail` the session stops after that many failed tests: no new test is started, the running ones stop
+    before their next step, and the tests not run are reported as skipped. Fixtures are torn down as usual.
+    
+    With `reruns` a failed test is run again up to that many times, every attempt is recorded in its info and a test
+    passing on a later attempt is reported as flaky. With `rerun_fresh` the fixtures of the test, of any scope, are torn
+    down before every rerun so that they are set up again; it requires a session running one test at a time.
+    """
+    
+    def __init__(self, test_organizer:TzTreeNode, concurrency:int = 1, threads:int = 1, reorder:bool = False, keep_fixtures:bool = False,
+                 shard:Tuple[int, int] | None = None, durations:Dict[str, float] | None = None, completed:Dict[str, TZTestInfo] | None = None,
+                 isolate:bool = False, timeout:float | None = None, maxfail:int = 0, reruns:int = 0, rerun_fresh:bool = False, tags:str | None = None, selected:List[TZTest] | None = None) -> None:
         super().__init__()
         self.tests = [x.get_object() for x in test_organizer.find("test")]
+        if selected is not None:
+            _selected = {x.name for x in selected}
+            self.tests = [x for x in self.tests if x.name in _selected]
+        if tags:
+            self.tests = tz_select_tagged(self.tests, tags)
+        if shard is not None:
+            self.tests = tz_shard_tests(self.tests, *shard, durations)
         self.info = TZSessionInfo(name="Test Session", total_tests=len(self.tests), details={test.name: None for test in self.tests })
         self.subscribers = {event:[] for event in TZEventType.__members__.values()}
-        self.current_test:TZTest = None
+        self.current_test:TZTestRun = None
         self.result: bool = True
         self.test_organizer = test_organizer
+        self.concurrency = max(concurrency, 1)
+        self.threads = max(threads, 1)
+        self.keep_fixtures = keep_fixtures
+        self.isolate = isolate
+        self.timeout = timeout
+        self.maxfail = maxfail
+        self.reruns = max(reruns, 0)
+        self.rerun_fresh = rerun_fresh
+        self._stop = threading.Event()
+        self._failures = 0
+        self._async = False
+        self._lock = threading.RLock()
+        self._session_levels:List[List[TZFixtureContainer]] = []
+        # Reference counts of the MODULE and PACKAGE fixtures
+        self._subtree_fixtures:Dict[str, set] = {}
+        self._subtree_users:Dict[tuple, int] = {}
+        self._subtree_active:Dict[str, int] = {}
+        self._subtree_due = set()
+        self._subtree_objects:Dict[str, TZFixtureContainer] = {}
+        self._next_fixtures:Dict[str, set] = {}
+        # Fixtures whose instance belongs to the parent of an isolated test, never torn down by the child
+        self._inherited = set()
+        
+        if completed:
+            self._restore(completed)
+        
+        if reorder:
+            self._reorder_tests()
+        
+        for test in self.tests:
+            self._attach_to_test(test)
+
+    def _restore(self, completed:Dict[str, TZTestInfo]):
+        """Restore the results of the tests already completed and remove them from the tests to run."""
+        # Tests cancelled by a stopped session are run again
+        completed = {k: v for k, v in completed.items() if v.status != TZTestStatusType.SKIPPED}
+        _restored = [completed[x.name] for x in self.tests if x.name in completed]
+        for info in _restored:
+            self.info.details[info.name] = info
+            self.info.executed_tests += 1
+            if info.status in (TZTestStatusType.PASSED, TZTestStatusType.FLAKY):
+                self.info.passed_tests += 1
+                self.info.flaky_tests += info.status == TZTestStatusType.FLAKY
+            else:
+                self.info.failed_tests += 1
+                self.result = False
+        self.tests = [x for x in self.tests if x.name not in completed]
+        if _restored:
+            logger.info(f"Resuming session: {len(_restored)} tests already completed, {len(self.tests)} to run")
+
+    # ---- fixtures helpers ----------------------------------------------------
+
+    def _fixtures_under(self, node:TzTreeNode | None) -> List[TzTreeNode]:
+        return node.find("fixture") if node is not None else []
+
+    def _constructor_fixtures(self, test:TZTest | TZTestRun) -> List[TzTreeNode]:
+        """Fixture nodes consumed by the constructor of the test, i.e. not below one of its steps."""
+        _node = self.test_organizer.resolve(test.get_selector())
+        return [x for c in _node.children if c.kind != "step" for x in c.find("fixture")]
+
+    def _setup_async_fixtures(self, nodes:List[TzTreeNode]):
+        """Return an awaitable setting up the asynchronous fixtures among the nodes, None if there is nothing to do.
+        Nodes are reversed so that the fixtures injected into other fixtures are set up first."""
+        _fixtures = [x.get_object() for x in reversed(nodes)]
+        _fixtures = [x for x in _fixtures if x.is_async and not x.is_setup]
+        return self._setup_all_async(_fixtures) if _fixtures else None
+
+    async def _setup_all_async(self, fixtures):
+        for fix in fixtures:
+            await fix.setup_async()
+
+    def _teardown_fixtures(self, nodes:List[TzTreeNode], scopes):
+        """Teardown the fixtures among the nodes with the given scopes. Returns an awaitable for the asynchronous ones."""
+        return self._teardown_all([x for x in [x.get_object() for x in nodes] if x.scope in scopes])
+
+    def _teardown_all(self, fixtures:List[TZFixtureContainer]):
+        _pending = []
+        for fix in fixtures:
+            if fix.name in self._inherited:
+                continue
+            if fix.is_async:
+                _pending.append(fix)
+            else:
+                fix.teardown()
+        return self._teardown_all_async(_pending) if _pending else None
+
+    async def _teardown_all_async(self, fixtures):
+        for fix in fixtures:
+            await fix.teardown_async()
+
+    def _gather(self, *awaitables):
+        """Combine the optional awaitables returned by the fixture helpers."""
+        _awaitables = [x for x in awaitables if x is not None]
+        if len(_awaitables) <= 1:
+            return _awaitables[0] if _awaitables else None
+        return self._await_all(_awaitables)
+
+    async def _await_all(self, awaitables):
+        for x in awaitables:
+            await x
+
+    def _unique_fixtures(self):
+        return {x.name: x.get_object() for x in self.test_organizer.find("fixture")}.values()
+
+    def _exclusive_fixtures(self, test:TZTest | TZTestRun) -> List[str]:
+        """Names of the fixtures that cannot be shared with a concurrent test."""
+        _node = self.test_organizer.resolve(test.get_selector())
+        return sorted({x.name for x in self._fixtures_under(_node) if x.get_object().scope in [TZFixtureScope.TEST, TZFixtureScope.STEP]})
+
+    def _build_session_levels(self):
+        _fixtures = {x.name: x.get_object() for x in self.test_organizer.find("fixture")}
+        _used = {x.name for test in self.tests for x in self._fixtures_under(self.test_organizer.resolve(test.get_selector()))}
+        _levels = tz_fixture_levels(tz_fixture_graph(self.test_organizer, [TZFixtureScope.SESSION]))
+        # Lazy fixtures are only set up by the consumers using them
+        self._session_levels = [[_fixtures[x] for x in level if not _fixtures[x].lazy and x in _used] for level in _levels]
+
+    def _test_fixtures(self, test:TZTest | TZTestRun) -> List[str]:
+        """Names of the fixtures, other than SESSION ones, used by a test."""
+        _node = self.test_organizer.resolve(test.get_selector())
+        return sorted({x.name for x in self._fixtures_under(_node) if x.get_object().scope != TZFixtureScope.SESSION})
+
+    def _reorder_tests(self):
+        """Group the tests using the same fixtures. The sort is stable, tests with the same fixtures keep their order."""
+        self.tests.sort(key=lambda x: self._test_fixtures(x))
+        self.info.details = {test.name: None for test in self.tests}
+
+    def _build_next_fixtures(self):
+        """Map every test to the fixtures used by the test executed right after it, in sequential sessions."""
+        self._next_fixtures = {}
+        if self.threads > 1 or self.concurrency > 1:
+            return
+        _fixtures = [set(self._test_fixtures(x)) for x in self.tests]
+        for n, test in enumerate(self.tests[:-1]):
+            self._next_fixtures[test.name] = _fixtures[n + 1]
+
+    def _kept_fixtures(self, test:TZTestRun, nodes:List[TzTreeNode]) -> List[TZFixtureContainer]:
+        """Reusable TEST fixtures that the next test uses too: their teardown and the following setup are skipped."""
+        _next = self._next_fixtures.get(test.name, ())
+        _kept = {x.name: x.get_object() for x in nodes if x.name in _next}
+        _kept = [x for x in _kept.values() if x.reusable and x.scope == TZFixtureScope.TEST and x.is_setup]
+        self.info.saved_setups += len(_kept)
+        return _kept
+
+    def _subtree_key(self, node:TzTreeNode, scope:TZFixtureScope) -> str:
+        """Selector of the subtree a MODULE or PACKAGE fixture used by the node is bound to."""
+        _node = node
+        while _node is not None and _node.kind != "module":
+            _node = _node.parent
+        if _node is None:
+            return self.test_organizer.get_selector()
+        if scope == TZFixtureScope.PACKAGE and _node.parent is not None:
+            _node = _node.parent
+        return _node.get_selector()
+
+    def _build_subtree_refcounts(self):
+        """Count, for every MODULE and PACKAGE fixture, the tests using it in each subtree."""
+        self._subtree_fixtures, self._subtree_users, self._subtree_active = {}, {}, {}
+        self._subtree_due = set()
+        for test in self.tests:
+            _node = self.test_organizer.resolve(test.get_selector())
+            _uses = set()
+            for x in self._fixtures_under(_node):
+                fix = x.get_object()
+                if fix.scope in [TZFixtureScope.MODULE, TZFixtureScope.PACKAGE]:
+                    self._subtree_objects[fix.name] = fix
+                    _uses.add((fix.name, self._subtree_key(_node, fix.scope)))
+            self._subtree_fixtures[test.name] = _uses
+            for use in _uses:
+                self._subtree_users[use] = self._subtree_users.get(use, 0) + 1
+                self._subtree_active.setdefault(use[0], 0)
+
+    def _acquire_subtree_fixtures(self, test:TZTestRun):
+        with self._lock:
+            for name, _ in self._subtree_fixtures.get(test.name, ()):
+                self._subtree_active[name] += 1
+
+    def _release_subtree_fixtures(self, test:TZTestRun):
+        """Teardown the MODULE and PACKAGE fixtures whose subtree has no more tests to run.
+        The teardown is deferred while the fixture is in use by a concurrent test of another subtree."""
+        with self._lock:
+            for use in self._subtree_fixtures.get(test.name, ()):
+                self._subtree_active[use[0]] -= 1
+                self._subtree_users[use] -= 1
+                if self._subtree_users[use] == 0:
+                    self._subtree_due.add(use[0])
+            
+            _released = sorted(x for x in self._subtree_due if self._subtree_active[x] == 0)
+            self._subtree_due.difference_update(_released)
+            # Synchronous teardowns happen under the lock, a concurrent test cannot grab the fixture meanwhile
+            return self._teardown_all([self._subtree_objects[x] for x in _released])
+
+    def _lease_pooled_fixtures(self, nodes:List[TzTreeNode]):
+        """Return an awaitable leasing the pooled fixtures among the nodes to the running test, None if there are none.
+        Waiting for an instance would block the event loop, so the leases are taken on a worker thread."""
+        _pooled = sorted({x.name: x.get_object() for x in nodes if x.get_object().pool_size and not x.get_object().lazy}.items())
+        return self._lease_all_async([x for _, x in _pooled]) if _pooled else None
+
+    async def _lease_all_async(self, fixtures:List[TZFixtureContainer]):
+        for fix in fixtures:
+            try:
+                # The worker thread inherits the context, hence the current test run
+                await _to_thread(fix.get_fixture)
+            except Exception as e:
+                # The consumer fails at once on an exhausted pool, reporting the error on the test
+                logger.warning(f"Cannot lease an instance of fixture '{fix.name}': {e}")
+
+    def _try_setup(self, fix:TZFixtureContainer):
+        # A failing fixture is left to its first consumer, which reports the error as a test failure
+        try:
+            fix.setup()
+        except Exception as e:
+            logger.warning(f"Setup of fixture '{fix.name}' failed, it will be retried by its first consumer: {e}")
+
+    async def _try_setup_async(self, fix:TZFixtureContainer):
+        try:
+            if fix.is_async:
+                await fix.setup_async()
+            else:
+                await _to_thread(fix.setup)
+        except Exception as e:
+            logger.warning(f"Setup of fixture '{fix.name}' failed, it will be retried by its first consumer: {e}")
+
+    def _setup_session_fixtures(self):
+        """Set up the SESSION fixtures level by level, the fixtures of a level in parallel."""
+        self._build_session_levels()
+        for level in self._session_levels:
+            _todo = [x for x in level if not x.is_setup]
+            if len(_todo) > 1:
+                with ThreadPoolExecutor(max_workers=len(_todo), thread_name_prefix="tzen-fixture") as pool:
+                    list(pool.map(self._try_setup, _todo))
+            elif _todo:
+                self._try_setup(_todo[0])
+
+    async def _setup_session_fixtures_async(self):
+        self._build_session_levels()
+        for level in self._session_levels:
+            await self._gather_on_tracks([functools.partial(self._try_setup_async, x) for x in level if not x.is_setup])
+
+    def _teardown_session_fixtures(self):
+        """Tear down all the fixtures still set up: SESSION fixtures last, in reverse topological order."""
+        for fix in self._unique_fixtures():
+            if fix.scope != TZFixtureScope.SESSION or fix.lazy:
+                fix.teardown()
+        
+        for level in reversed(self._session_levels):
+            _todo = [x for x in level if x.is_setup and not self.keep_fixtures]
+            if len(_todo) > 1:
+                with ThreadPoolExecutor(max_workers=len(_todo), thread_name_prefix="tzen-fixture") as pool:
+                    list(pool.map(lambda x: x.teardown(), _todo))
+            elif _todo:
+                _todo[0].teardown()
+
+    async def _teardown_session_fixtures_async(self):
+        for fix in self._unique_fixtures():
+            if fix.scope != TZFixtureScope.SESSION or fix.lazy:
+                await fix.teardown_async()
+        
+        for level in reversed(self._session_levels):
+            # Asynchronous fixtures are bound to the event loop of the session, they cannot be kept
+            _todo = [x for x in level if x.is_setup and (x.is_async or not self.keep_fixtures)]
+            await self._gather_on_tracks([x.teardown_async if x.is_async else functools.partial(_to_thread, x.teardown) for x in _todo])
+
+    async def _gather_on_tracks(self, functions:List[Callable]):
+        """Call the functions and await their results concurrently. Each function runs as a worker of its own, as the
+        threads of the synchronous engine, so that their events are not interleaved on the same track of the trace."""
+        if len(functions) <= 1:
+            for func in functions:
+                await func()
+            return
+        
+        async def _worker(slot:int, func:Callable):
+            # Every task runs in its own copy of the context, inherited by the worker threads of _to_thread
+            TZ_WORKER.set(f"tzen-fixture_{slot}")
+            await func()
+        await asyncio.gather(*[_worker(slot, x) for slot, x in enumerate(functions)])
+
+    # ---- test events ---------------------------------------------------------
             
-    def _on_test_started(self, test:TZTest):
+    def _on_test_started(self, test:TZTestRun):
         """Attach the session to a test and notify about the start of the test."""
-        self.info.current_test = test.info.name
-        self.info.details[test.name] = test.info
-        self.info.executed_tests += 1
+        with self._lock:
+            self.info.current_test = test.info.name
+            self.info.details[test.name] = test.info
+            # Reruns are attempts of the same execution
+            if not test.info.attempts:
+                self.info.executed_tests += 1
+        self._acquire_subtree_fixtures(test)
         self.notify(TZEventType.TEST_STARTED)
+        
+        if self._async:
+            _pooled = self._lease_pooled_fixtures(self._fixtures_under(self.test_organizer.resolve(test.get_selector())))
+            return self._gather(_pooled, self._setup_async_fixtures(self._constructor_fixtures(test)))
     
-    def _on_test_terminated(self, test:TZTest):
+    def _on_test_terminated(self, test:TZTestRun):
         # Teardown all test fixtures
-        for fix in [x.get_object() for x in self.test_organizer.resolve(test.get_selector()).find("fixture")]:
-            if fix.scope in [TZFixtureScope.TEST, TZFixtureScope.STEP]:
-                fix.teardown()
+        with tz_overhead_section("teardown_scan"):
+            _nodes = self._fixtures_under(self.test_organizer.resolve(test.get_selector()))
+            _kept = self._kept_fixtures(test, _nodes)
+            _fixtures = {x.name: x.get_object() for x in _nodes}.values()
+            _pending = self._teardown_all([x for x in _fixtures if x.scope in [TZFixtureScope.TEST, TZFixtureScope.STEP] and x not in _kept])
+            for fix in _fixtures:
+                if fix.pool_size:
+                    fix.release(test)
+            _released = self._release_subtree_fixtures(test)
 
         self.info.details[test.name] = test.info
         self.notify(TZEventType.TEST_TERMINATED)
+        return self._gather(_pending, _released)
 
-
-    def _on_step_started(self, test:TZTest):
+    def _on_step_started(self, test:TZTestRun):
         self.info.details[test.name] = test.info
         self.notify(TZEventType.STEP_STARTED)
+        
+        if self._async:
+            return self._setup_async_fixtures(self._fixtures_under(self.test_organizer.resolve(test.current_step.get_selector())))
     
-    def _on_step_terminated(self, test:TZTest):
+    def _on_step_terminated(self, test:TZTestRun):
         # Teardown all step fixtures
-        for fix in [x.get_object() for x in self.test_organizer.resolve(test.current_step.get_selector()).find("fixture")]:
-            if fix.scope in [TZFixtureScope.TEST, TZFixtureScope.STEP]:
-                fix.teardown()
+        with tz_overhead_section("teardown_scan"):
+            _pending = self._teardown_fixtures(self._fixtures_under(self.test_organizer.resolve(test.current_step.get_selector())), [TZFixtureScope.TEST, TZFixtureScope.STEP])
 
         self.info.details[test.name] = test.info
         self.notify(TZEventType.STEP_TERMINATED)
+        return _pending
         
     def _attach_to_test(self, test:TZTest):
         """Attach the session to a test."""
@@ -326,43 +845,340 @@ class TZSession:
         if event in self.subscribers:
             self.subscribers[event].append(subscriber)
 
-    def notify(self, event):
+    def notify(self, event, *args):
         if event in self.subscribers:
             for subscriber in self.subscribers[event]:
-                subscriber(self)
- 
-    def start(self):
-        """Run the test session."""
+                subscriber(self, *args)
+
+    # ---- execution -----------------------------------------------------------
+
+    def _needs_async(self) -> bool:
+        """True when the session has to be driven by the asyncio engine."""
+        if self.concurrency > 1:
+            return True
+        if any(step.is_async for test in self.tests for step in test.steps):
+            return True
+        return any(x.is_async for x in self._unique_fixtures())
+
+    def _begin(self):
         logger.info(f"#"*30)
         logger.info(f"[green]TZen[/green] Starting session with a total of {self.info.total_tests} tests")
         logger.info(f"#"*30)
         
         self.info.status = TZSessionStatusType.RUNNING
+        self._build_subtree_refcounts()
+        self._build_next_fixtures()
+        self.info.saved_setups = 0
         self.notify(TZEventType.SESSION_STARTED)
         self.info.start = int(time.time())
-        
-        for test in self.tests:
 
-            self.current_test = test
-            self._attach_to_test(test)
-            self.info.current_test = test.name
-            _test_result = test.run()
-            
-            self.result = _test_result and self.result
-            
-            if  _test_result:
+    def _record_result(self, info:TZTestInfo):
+        with self._lock:
+            if info.status == TZTestStatusType.SKIPPED:
+                self.info.skipped_tests += 1
+            elif info.status in (TZTestStatusType.PASSED, TZTestStatusType.FLAKY):
                 self.info.passed_tests += 1
+                if info.status == TZTestStatusType.FLAKY:
+                    self.info.flaky_tests += 1
+                    logger.warning(f"{info.name} is flaky: passed at attempt {len(info.attempts)}")
             else:
                 self.info.failed_tests += 1
-        
+                self.result = False
+                self._failures += 1
+                if self.maxfail and self._failures >= self.maxfail and not self._stop.is_set():
+                    logger.warning(f"Stopping the session after {self._failures} failed tests")
+                    self._stop.set()
+        self.notify(TZEventType.TEST_RECORDED, info)
+
+    def _skip_not_run(self):
+        """Report the tests never started because the session stopped."""
+        for test in self.tests:
+            if self.info.details.get(test.name) is None:
+                self.info.details[test.name] = TZTestInfo(name=test.name, total_steps=len(test.steps), selector=test.get_selector(),
+                                                          status=TZTestStatusType.SKIPPED, error=f"Not run, the session stopped after {self._failures} failed tests")
+                self.info.skipped_tests += 1
+
+    def _end(self):
+        if self._stop.is_set():
+            self._skip_not_run()
         self.info.status = TZSessionStatusType.PASSED if self.result else TZSessionStatusType.FAILED
-        self.notify(TZEventType.SESSION_TERMINATED)
         self.info.end = int(time.time())
+        self._collect_overhead()
+        if self.info.saved_setups:
+            logger.info(f"Fixture setups saved by reuse: {self.info.saved_setups}")
+        self.notify(TZEventType.SESSION_TERMINATED)
+ 
+    def start(self):
+        """Run the test session."""
+        if self.isolate:
+            if not hasattr(os, "fork"):
+                raise RuntimeError("Isolated sessions require os.fork")
+            if self._needs_async() or self.threads > 1:
+                raise ValueError("Isolated sessions run one synchronous test at a time")
+        if self.rerun_fresh and (self.isolate or self.threads > 1 or self.concurrency > 1):
+            raise ValueError("Fresh reruns tear down shared fixtures, they require a session running one test at a time in process")
+        
+        if self._needs_async():
+            if self.threads > 1:
+                raise ValueError("Asynchronous sessions cannot run on threads, use the concurrency option instead")
+            asyncio.run(self.start_async())
+            return
+        
+        self._begin()
+        self._setup_session_fixtures()
+        
+        if self.threads > 1:
+            self._run_on_threads()
+        else:
+            for test in self.tests:
+                if self._stop.is_set():
+                    break
+                self._record_result(self._run_test(test).info)
         
         # Teardown all fixtures.
-        # FIXME Filter by unique names
-        for x in self.test_organizer.find("fixture"):        
-            x.get_object().teardown()
+        self._teardown_session_fixtures()
+
+        self._end()
+
+    def open(self):
+        """Begin the session without running its tests, which are then executed one at a time with run_test.
+        Used by the engines receiving the tests to run from the outside, only synchronous tests are supported."""
+        if self._needs_async():
+            raise ValueError("Asynchronous sessions cannot run one test at a time")
+        self._begin()
+        self._setup_session_fixtures()
+
+    def run_test(self, test:TZTest) -> TZTestRun:
+        """Run a single test of an opened session."""
+        run = self._run_test(test)
+        self._record_result(run.info)
+        return run
+
+    def close(self):
+        """Terminate a session opened with open."""
+        self._teardown_session_fixtures()
+        self._end()
+
+    def _create_run(self, test:TZTest, attempts:List[TZAttemptInfo] | None = None) -> TZTestRun:
+        run = test.create_run()
+        run.cancel_event = self._stop
+        # Concurrent tests of the asyncio engine interleave on the thread of the event loop
+        run.measure_resources = self.concurrency == 1
+        run.info.attempts = list(attempts or [])
+        self.current_test = run
+        self.info.current_test = test.name
+        return run
+
+    def _can_rerun(self, run:TZTestRun) -> bool:
+        return run.info.status == TZTestStatusType.FAILED and max(len(run.info.attempts), 1) <= self.reruns and not self._stop.is_set()
+
+    def _prepare_rerun(self, run:TZTestRun):
+        """Prepare the rerun of a failed test. Returns the attempts so far and an awaitable for the asynchronous teardowns, if any."""
+        attempts = run.info.attempts or [TZAttemptInfo(attempt=1, status=run.info.status, start=run.info.start, end=run.info.end, error=run.info.error)]
+        logger.warning(f"Rerunning {run.name}, attempt {len(attempts) + 1}/{self.reruns + 1}: {run.info.error}")
+        
+        with self._lock:
+            # The MODULE and PACKAGE fixtures are used once more by the test
+            for use in self._subtree_fixtures.get(run.name, ()):
+                self._subtree_users[use] += 1
+        
+        _pending = None
+        if self.rerun_fresh:
+            _fixtures = {x.name: x.get_object() for x in self._fixtures_under(self.test_organizer.resolve(run.get_selector()))}
+            _pending = self._teardown_all([x for x in _fixtures.values() if x.is_setup])
+        return attempts, _pending
+
+    def _run_test(self, test:TZTest) -> TZTestRun:
+        """Run a test, in process or isolated, again after every failure up to reruns times."""
+        _run_once = self._run_isolated if self.isolate else self._run_once
+        run = _run_once(test)
+        while self._can_rerun(run):
+            attempts, _ = self._prepare_rerun(run)
+            run = _run_once(test, attempts)
+        return run
+
+    def _run_once(self, test:TZTest, attempts:List[TZAttemptInfo] | None = None) -> TZTestRun:
+        run = self._create_run(test, attempts)
+        run.run()
+        return run
+
+    def _run_isolated(self, test:TZTest, attempts:List[TZAttemptInfo] | None = None) -> TZTestRun:
+        """Run a test in a forked child. The child runs the test followed only by the session, which sets up and tears
+        down its fixtures, and sends back its info through a pipe. The other subscribers are notified by the parent.
+        The child inherits the fixtures already set up by the session: their instances are shared with the parent, e.g.
+        their sockets, so the child never tears them down."""
+        run = self._create_run(test, attempts)
+        
+        _read, _write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(_read)
+            self._run_child(run, _write)
+        os.close(_write)
+        
+        run.info.start = time.time()
+        run.info.status = TZTestStatusType.RUNNING
+        run.notify(TZEventType.TEST_STARTED)
+        
+        data, error = self._wait_child(pid, _read)
+        if data is not None:
+            run.info = tz_test_info_from_dict(data)
+        else:
+            run.info.end = time.time()
+            run.info.status = TZTestStatusType.FAILED
+            run.info.error = error
+            run.record_attempt()
+            logger.error(f"{test.name}: {error}")
+        
+        run.notify(TZEventType.TEST_TERMINATED)
+        return run
+
+    def _run_child(self, run:TZTestRun, fd:int):
+        """Body of the forked child, never returns. Sends {"info": ...} or, if the child fails outside the test, {"error": ...}."""
+        _code = 0
+        try:
+            self._inherited = {x.name for x in self._unique_fixtures() if x.is_setup}
+            _handlers = [self._on_test_started, self._on_test_terminated, self._on_step_started, self._on_step_terminated]
+            run.subscribers = {event: [x for x in subscribers if x in _handlers] for event, subscribers in run.subscribers.items()}
+            run.run()
+            # The fixtures set up by the child, e.g. MODULE ones still needed by the next tests, die with it
+            self._teardown_all([x for x in self._unique_fixtures() if x.is_setup])
+            _message = {"info": tz_test_info_to_dict(run.info)}
+        except BaseException:
+            _code = 1
+            _message = {"error": traceback.format_exc()}
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(json.dumps(_message).encode())
+        except BaseException:
+            _code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            # Skip the atexit handlers and the buffers inherited from the session
+            os._exit(_code)
+
+    def _wait_child(self, pid:int, fd:int) -> Tuple[dict | None, str | None]:
+        """Read the info sent by a child and reap it. Returns the info, or the reason why the child did not send it."""
+        _deadline = time.monotonic() + self.timeout if self.timeout else None
+        _chunks = []
+        try:
+            while True:
+                _left = _deadline - time.monotonic() if _deadline is not None else None
+                if _left is not None and _left <= 0:
+                    os.kill(pid, signal.SIGKILL)
+                    os.waitpid(pid, 0)
+                    return None, f"Test process timed out after {self.timeout}s"
+                _ready, _, _ = select.select([fd], [], [], _left)
+                if not _ready:
+                    continue
+                _chunk = os.read(fd, 65536)
+                if not _chunk:
+                    break
+                _chunks.append(_chunk)
+        finally:
+            os.close(fd)
+        
+        _, status = os.waitpid(pid, 0)
+        if os.WIFSIGNALED(status):
+            return None, f"Test process killed by signal {signal.Signals(os.WTERMSIG(status)).name}"
+        code = os.WEXITSTATUS(status)
+        try:
+            _message = json.loads(b"".join(_chunks)) if _chunks else {}
+        except ValueError:
+            _message = {}
+        if code == 0 and "info" in _message:
+            return _message["info"], None
+        if "error" in _message:
+            return None, f"Test process failed:\n{_message['error']}"
+        return None, f"Test process exited with code {code}"
+
+    def _run_on_threads(self):
+        """Run the tests on a pool of threads. A test is dispatched only when none of its exclusive fixtures is in use.
+        Once the session is stopped the pending tests are dropped and the running ones are waited for."""
+        _pending = list(self.tests)
+        _running:Dict[Future, set] = {}
+        _busy = set()
+        
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="tzen-worker") as pool:
+            while _pending or _running:
+                if self._stop.is_set():
+                    _pending.clear()
+                    if not _running:
+                        break
+                for test in list(_pending):
+                    if len(_running) >= self.threads:
+                        break
+                    _exclusive = set(self._exclusive_fixtures(test))
+                    if _exclusive & _busy:
+                        continue
+                    _pending.remove(test)
+                    _busy |= _exclusive
+                    _running[pool.submit(self._run_test, test)] = _exclusive
+                
+                _done, _ = wait(list(_running), return_when=FIRST_COMPLETED)
+                for future in _done:
+                    _busy -= _running.pop(future)
+                    self._record_result(future.result().info)
+
+    async def start_async(self):
+        """Run the test session on the running event loop."""
+        self._async = True
+        try:
+            self._begin()
+            await self._setup_session_fixtures_async()
+            
+            _locks = {}
+            _slots = asyncio.Queue()
+            for i in range(self.concurrency):
+                _slots.put_nowait(i)
+            
+            await asyncio.gather(*[self._run_test_async(test, _slots, _locks) for test in self.tests])
+            
+            # Teardown all fixtures.
+            await self._teardown_session_fixtures_async()
+            
+            self._end()
+        finally:
+            self._async = False
+
+    async def _run_test_async(self, test:TZTest, slots:asyncio.Queue, locks:Dict[str, asyncio.Lock]):
+        async with contextlib.AsyncExitStack() as stack:
+            # Locks are always acquired in the same order, tests waiting for a fixture do not hold a slot
+            for name in self._exclusive_fixtures(test):
+                await stack.enter_async_context(locks.setdefault(name, asyncio.Lock()))
+            
+            slot = await slots.get()
+            if self._stop.is_set():
+                slots.put_nowait(slot)
+                return
+            token = TZ_WORKER.set(f"worker-{slot}")
+            try:
+                run = self._create_run(test)
+                await run.run_async()
+                while self._can_rerun(run):
+                    attempts, _pending = self._prepare_rerun(run)
+                    if _pending is not None:
+                        await _pending
+                    run = self._create_run(test, attempts)
+                    await run.run_async()
+            finally:
+                TZ_WORKER.reset(token)
+                slots.put_nowait(slot)
+        
+        self._record_result(run.info)
+
+    def _collect_overhead(self):
+        """Sum the overhead breakdown of all the executed tests into the session totals."""
+        self.info.overhead = {}
+        for info in self.info.details.values():
+            if info is None:
+                continue
+            for k, v in info.overhead.items():
+                self.info.overhead[k] = self.info.overhead.get(k, 0.0) + v
+
+        _split = tz_overhead_split(self.info.overhead)
+        logger.info(f"Time in user code: {_split['user']:.3f}s, in framework code: {_split['framework']:.3f}s")
 
     def build_report(self, output_path:str, backend:str = "default_html"):
         
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Author:   Lorenzo Furcas (TopFirmino)
+# License:  MIT – see the LICENSE file in the repository root for details.
+# ---------------------------------------------------------------------------
+"""This module splits a suite in N shards without any coordination between the machines running them.
+Every machine computes the same assignment: either by the hash of the test uuid, or by duration-balanced bins built
+from the durations recorded in a history store."""
+
+from __future__ import annotations
+from typing import Dict, List, Tuple
+
+from .tz_test import TZTest
+from .tz_history import TZHistoryStore
+
+
+def tz_parse_shard(shard:str) -> Tuple[int, int]:
+    """Parse a 'i/N' shard specification, with 1 <= i <= N."""
+    try:
+        index, count = (int(x) for x in shard.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{shard}', expected i/N")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{shard}', expected 1 <= i <= N")
+    return index, count
+
+def tz_history_durations(path:str) -> Dict[str, float]:
+    """Mean duration of every test recorded in a history store, by test name."""
+    totals:Dict[str, List[float]] = {}
+    for record in TZHistoryStore(path).records():
+        _total = totals.setdefault(record["name"], [0.0, 0])
+        _total[0] += record["duration"]
+        _total[1] += 1
+    return {k: v[0] / v[1] for k, v in totals.items()}
+
+def tz_shard_tests(tests:List[TZTest], index:int, count:int, durations:Dict[str, float] | None = None) -> List[TZTest]:
+    """Return the tests of the shard index (1-based) out of count, keeping their order.
+    Without durations the tests are assigned by their uuid. With durations they are packed in count bins of balanced
+    duration, longest tests first; tests missing from the history are given the mean duration."""
+    if not durations:
+        return [x for x in tests if int(x.uuid, 16) % count == index - 1]
+
+    _default = sum(durations.values()) / len(durations)
+    # Ties are broken by uuid, so that every machine computes the same bins
+    _ordered = sorted(tests, key=lambda x: (-durations.get(x.name, _default), x.uuid))
+    _bins = [0.0] * count
+    _assigned = set()
+    for test in _ordered:
+        _bin = min(range(count), key=lambda n: (_bins[n], n))
+        _bins[_bin] += durations.get(test.name, _default)
+        if _bin == index - 1:
+            _assigned.add(test.name)
+    return [x for x in tests if x.name in _assigned]
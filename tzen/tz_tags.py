@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Author:   Lorenzo Furcas (TopFirmino)
+# License:  MIT – see the LICENSE file in the repository root for details.
+# ---------------------------------------------------------------------------
+"""This module implements the tags of tests and steps, e.g. `smoke`, `slow` or `hw:boardA`.
+Tags are added to the tree as nodes of kind tag below their test or step. Every registered test owns a bit and every
+tag keeps the integer bitset of the tests having it, a test having the tags of its steps too: a tag expression such as
+`smoke and not slow` is compiled once and evaluated with a few integer operations, whatever the size of the suite."""
+
+from __future__ import annotations
+import functools
+import re
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from .tz_tree import tz_tree_register_type, TzTree
+
+_TZEN_TAGS_:Dict[str, TZTag] = {}
+
+# Bit of every registered test, by selector. Bits are never reused, a reloaded test gets its bit back
+_TZEN_TAG_BITS_:Dict[str, int] = {}
+# Bitset of the tests currently registered
+_TZEN_TAGGED_ = [0]
+# Test owning every bit, by bit index
+_TZEN_TAGGED_TESTS_:List = []
+
+_TAG_RE = re.compile(r"[\w][\w:.\-]*")
+_TOKEN_RE = re.compile(r"\s*(\(|\)|[^\s()]+)")
+_KEYWORDS = ("and", "or", "not")
+
+
+def _tag_provider(name:str, selector:str):
+    if name not in _TZEN_TAGS_:
+        raise RuntimeError(f"Tag '{name}' does not exist")
+    return _TZEN_TAGS_[name]
+
+@tz_tree_register_type("tag", provider=_tag_provider)
+class TZTag:
+    """A tag and the bitset of the tests having it."""
+
+    __slots__ = ("name", "bits", "doc")
+
+    def __init__(self, name:str) -> None:
+        self.name = name
+        self.bits = 0
+        self.doc = ""
+
+
+def _test_bit(selector:str) -> int:
+    if selector not in _TZEN_TAG_BITS_:
+        _TZEN_TAG_BITS_[selector] = 1 << len(_TZEN_TAG_BITS_)
+    return _TZEN_TAG_BITS_[selector]
+
+def tz_index_test(selector:str, test) -> None:
+    """Register a test in the index, so that it is matched by negated tags."""
+    _bit = _test_bit(selector)
+    _index = _bit.bit_length() - 1
+    if _index == len(_TZEN_TAGGED_TESTS_):
+        _TZEN_TAGGED_TESTS_.append(test)
+    else:
+        _TZEN_TAGGED_TESTS_[_index] = test
+    _TZEN_TAGGED_[0] |= _bit
+
+def tz_add_tags(selector:str, tags:List[str], test_selector:str | None = None) -> None:
+    """Tag the test or step with the given selector. Steps pass the selector of their test, which gets their tags."""
+    _bit = _test_bit(test_selector or selector)
+    for tag in tags:
+        if not _TAG_RE.fullmatch(tag) or tag in _KEYWORDS:
+            raise ValueError(f"Invalid tag '{tag}'")
+        _TZEN_TAGS_.setdefault(tag, TZTag(tag)).bits |= _bit
+        TzTree().add_object(tag, str(Path(selector) / tag), kind='tag')
+
+def tz_forget_tags(selectors:List[str]) -> None:
+    """Remove tests from the index, e.g. before reloading their module."""
+    _mask = 0
+    for selector in selectors:
+        _mask |= _TZEN_TAG_BITS_.get(selector, 0)
+    _TZEN_TAGGED_[0] &= ~_mask
+    for tag in _TZEN_TAGS_.values():
+        tag.bits &= ~_mask
+
+
+@functools.lru_cache(maxsize=64)
+def tz_compile_tags(expression:str) -> Callable[[], int]:
+    """Compile a tag expression made of tags, `and`, `or`, `not` and parentheses. The returned function evaluates it
+    to the bitset of the matching tests; unknown tags match no test."""
+    tokens = _TOKEN_RE.findall(expression)
+    pos = [0]
+
+    def _peek():
+        return tokens[pos[0]] if pos[0] < len(tokens) else None
+
+    def _next():
+        token = _peek()
+        if token is None:
+            raise ValueError(f"Unexpected end of tag expression '{expression}'")
+        pos[0] += 1
+        return token
+
+    def _or():
+        left = _and()
+        while _peek() == "or":
+            _next()
+            left = functools.partial(lambda a, b: a() | b(), left, _and())
+        return left
+
+    def _and():
+        left = _not()
+        while _peek() == "and":
+            _next()
+            left = functools.partial(lambda a, b: a() & b(), left, _not())
+        return left
+
+    def _not():
+        token = _next()
+        if token == "not":
+            return functools.partial(lambda a: _TZEN_TAGGED_[0] & ~a(), _not())
+        if token == "(":
+            inner = _or()
+            if _next() != ")":
+                raise ValueError(f"Missing ) in tag expression '{expression}'")
+            return inner
+        if token in _KEYWORDS or token == ")" or not _TAG_RE.fullmatch(token):
+            raise ValueError(f"Unexpected '{token}' in tag expression '{expression}'")
+        return lambda: _TZEN_TAGS_[token].bits & _TZEN_TAGGED_[0] if token in _TZEN_TAGS_ else 0
+
+    evaluate = _or()
+    if _peek() is not None:
+        raise ValueError(f"Unexpected '{_peek()}' in tag expression '{expression}'")
+    return evaluate
+
+def tz_select_tagged(tests:List, expression:str) -> List:
+    """The tests matching a tag expression, in their order."""
+    # Walking the binary string of the bitset finds the set bits in linear time, shifting a large integer does not
+    _digits = bin(tz_compile_tags(expression)())[:1:-1]
+    _matched = set()
+    _index = _digits.find("1")
+    while _index >= 0:
+        _matched.add(id(_TZEN_TAGGED_TESTS_[_index]))
+        _index = _digits.find("1", _index + 1)
+    return [x for x in tests if id(x) in _matched]
@@ -8,7 +8,13 @@
 
 from __future__ import annotations
 from ._tz_logging import TZTestLogger
-from .tz_types import TZEventType, TZTestInfo, TZTestStatusType
+from .tz_types import TZEventType, TZTestInfo, TZTestStatusType, TZStepInfo, TZCasesInfo, TZAttemptInfo
+from .tz_data import tz_dataset, tz_iter_dataset, tz_record_case, tz_cases_summary
+from .tz_tags import tz_index_test, tz_forget_tags
+from ._tz_resources import tz_resource_usage, tz_resource_delta, tz_resource_sum
+from ._tz_overhead import TZOverheadMeter, tz_overhead_section
+from ._tz_context import TZ_CURRENT_RUN
+from ._tz_watchdog import TZTimeoutError, tz_arm_timeout, tz_disarm_timeout, tz_wait_for
 from typing import List
 import inspect
 from pathlib import Path
@@ -26,8 +32,8 @@ def _step_provider(name:str, selector:str):
         raise RuntimeError(f"Step with selector {selector} does not exists")
     return _TZEN_STEPS_[selector]
 
-def tz_add_step(name:str, index:int, func:Callable[[object], bool | None], blocking:bool=True, repeat:int=1):
-    _step = TZStep(name, func, blocking=blocking, repeat=repeat, index = index )
+def tz_add_step(name:str, index:int, func:Callable[[object], bool | None], blocking:bool=True, repeat:int=1, timeout:float | None = None, data=None):
+    _step = TZStep(name, func, blocking=blocking, repeat=repeat, index = index, timeout=timeout, data=data )
 
     if _step.get_selector() in _TZEN_STEPS_:
         raise RuntimeError(f"Step with selector {_step.get_selector()} already exists")
@@ -41,22 +47,151 @@ def tz_add_step(name:str, index:int, func:Callable[[object], bool | None], block
 @tz_tree_register_type("step", provider=_step_provider)
 class TZStep:
     """This class provides a container for steps. It is used in order to provide abstraction and dependency injection. 
-    step parameter is a callable. It is used to store the step function."""
+    step parameter is a callable. It is used to store the step function.
+    A step running for more than timeout seconds, all its repetitions included, fails with a TZTimeoutError.
+    A step with a dataset runs once for every row, see tz_data: the row is passed as the row argument when the step
+    declares it and is set as the row attribute of the test instance. The step fails if any of its rows fails."""
     
 
-    def __init__(self, name:str, func: Callable[[object], bool | None], blocking:bool=True, repeat:int=1, index:int=-1):
+    def __init__(self, name:str, func: Callable[[object], bool | None], blocking:bool=True, repeat:int=1, index:int=-1, timeout:float | None = None, data=None):
         self.name = name
         self.index = index
         self.doc = func.__doc__ if func.__doc__ else ""
         self.func = func
         self.blocking = blocking
         self.repeat = repeat
+        self.timeout = timeout
+        self.data = tz_dataset(data, func.__module__)
+        self.takes_row = "row" in inspect.signature(inspect.unwrap(func)).parameters
+        self.is_async = inspect.iscoroutinefunction(func)
 
-    def run(self, test_instance):
-        """This method is used to run the step."""
+    def _call(self, test_instance, row):
+        return self.func(test_instance, row=row) if self.takes_row else self.func(test_instance)
+
+    def _cases(self, owner:TZTestRun | None) -> TZCasesInfo:
+        """The cases of the step. Every row of a data-driven test appends its cases to the ones of the previous rows."""
+        if owner is None:
+            return TZCasesInfo()
+        step_info = owner.info.steps[owner.info.current_step - 1]
+        if step_info.cases is None:
+            step_info.cases = TZCasesInfo()
+        return step_info.cases
+
+    def _case_done(self, cases:TZCasesInfo, index:int, row, res:bool, error:str | None, owner:TZTestRun | None) -> bool:
+        """Record the result of a row. Returns True if the remaining rows must be skipped."""
+        if tz_record_case(cases, index, row, res, error or f"Step {self.name} failed") and owner is not None:
+            owner.logger.error(f"Case {index} failed: {error or 'step returned False'}")
+        if owner is not None and owner.cancel_event is not None and owner.cancel_event.is_set():
+            owner.cancelled = True
+            return True
+        return False
+
+    def _cases_result(self, cases:TZCasesInfo, before:TZCasesInfo, owner:TZTestRun | None) -> bool:
+        """Result of the cases run since before, the cases of the previous rows of the test."""
+        _failed = cases.failed - before.failed
+        if _failed and owner is not None:
+            _first = next((x for x in cases.failures if x.index >= before.total), None)
+            _summary = TZCasesInfo(total=cases.total - before.total, failed=_failed, failures=[_first] if _first else [])
+            owner.info.error = f"Step {self.name}: {tz_cases_summary(_summary)}"
+        return _failed == 0
+
+    def run(self, test_instance, owner:TZTestRun | None = None, row=None):
+        """This method is used to run the step. When an owner run is given, it is notified about every repetition."""
+        if self.is_async:
+            raise RuntimeError(f"Step {self.name} is asynchronous, it can only be run by the asyncio session engine")
+        
+        if not self.timeout:
+            return self._run_cases(test_instance, owner, row)
+        
+        guard = tz_arm_timeout(self.timeout, f"Step {self.name}")
+        try:
+            return self._run_cases(test_instance, owner, row)
+        finally:
+            tz_disarm_timeout(guard)
+
+    def _run_cases(self, test_instance, owner:TZTestRun | None = None, row=None):
+        if self.data is None:
+            return self._run(test_instance, owner, row)
+        
+        cases = self._cases(owner)
+        # Cases are numbered across the rows of the test
+        before = TZCasesInfo(total=cases.total, failed=cases.failed)
+        for index, row in enumerate(tz_iter_dataset(self.data), start=before.total):
+            test_instance.row = row
+            res, error = False, None
+            try:
+                res = self._run(test_instance, owner, row)
+            except TZTimeoutError:
+                raise
+            except Exception as e:
+                error = str(e)
+            if self._case_done(cases, index, row, res, error, owner):
+                break
+        return self._cases_result(cases, before, owner)
+
+    def _run(self, test_instance, owner:TZTestRun | None = None, row=None):
         res = True
-        for _ in range(self.repeat):
-            _res = self.func(test_instance)
+        for i in range(self.repeat):
+            if owner is not None:
+                owner.info.current_repeat = i + 1
+                owner.notify(TZEventType.REPEAT_STARTED)
+            try:
+                _res = self._call(test_instance, row)
+            finally:
+                if owner is not None:
+                    owner.notify(TZEventType.REPEAT_TERMINATED)
+            res &= _res if _res is not None else True
+        
+        return res
+
+    async def run_async(self, test_instance, owner:TZTestRun | None = None, row=None):
+        """This method is used to run the step on the event loop. Both synchronous and asynchronous steps are supported.
+        Asynchronous steps running past their timeout are cancelled, synchronous ones are interrupted by the watchdog."""
+        if not self.timeout:
+            return await self._run_cases_async(test_instance, owner, row)
+        
+        if self.is_async:
+            return await tz_wait_for(self._run_cases_async(test_instance, owner, row), self.timeout, f"Step {self.name}")
+        
+        guard = tz_arm_timeout(self.timeout, f"Step {self.name}")
+        try:
+            return await self._run_cases_async(test_instance, owner, row)
+        finally:
+            tz_disarm_timeout(guard)
+
+    async def _run_cases_async(self, test_instance, owner:TZTestRun | None = None, row=None):
+        if self.data is None:
+            return await self._run_async(test_instance, owner, row)
+        
+        cases = self._cases(owner)
+        # Cases are numbered across the rows of the test
+        before = TZCasesInfo(total=cases.total, failed=cases.failed)
+        for index, row in enumerate(tz_iter_dataset(self.data), start=before.total):
+            test_instance.row = row
+            res, error = False, None
+            try:
+                res = await self._run_async(test_instance, owner, row)
+            except TZTimeoutError:
+                raise
+            except Exception as e:
+                error = str(e)
+            if self._case_done(cases, index, row, res, error, owner):
+                break
+        return self._cases_result(cases, before, owner)
+
+    async def _run_async(self, test_instance, owner:TZTestRun | None = None, row=None):
+        res = True
+        for i in range(self.repeat):
+            if owner is not None:
+                owner.info.current_repeat = i + 1
+                await owner.notify_async(TZEventType.REPEAT_STARTED)
+            try:
+                _res = self._call(test_instance, row)
+                if inspect.isawaitable(_res):
+                    _res = await _res
+            finally:
+                if owner is not None:
+                    await owner.notify_async(TZEventType.REPEAT_TERMINATED)
             res &= _res if _res is not None else True
         
         return res
@@ -66,15 +201,16 @@ class TZStep:
         
 _TZEN_TESTS_ = {}
 
-def tz_add_test(name:str, test_class: type):
+def tz_add_test(name:str, test_class: type, timeout:float | None = None, data=None):
     """This function is used to add a test to the test table. It is used to register the test class."""
     
     if name in _TZEN_TESTS_:
         raise ValueError(f"Test '{name}' already exists.")
 
-    _test = TZTest(name, test_class)
+    _test = TZTest(name, test_class, timeout=timeout, data=data)
     _TZEN_TESTS_[name] = _test
     TzTree().add_object(name, _test.get_selector(), 'test')
+    tz_index_test(_test.get_selector(), _test)
     tz_add_module(Path(sys.modules[test_class.__module__].__file__).name[:-3], sys.modules[test_class.__module__])
     return _test
 
@@ -87,85 +223,387 @@ def _test_provider(name:str, selector:str):
 @tz_tree_register_type("test", provider=_test_provider)
 class TZTest:
     """This class provides a container for testcases. It is used in order to provide abstraction and dependency injection. 
-    test_class parameter is a Class. It is used to store the testcases and their steps."""
+    test_class parameter is a Class. It is used to store the testcases and their steps.
+    The state of an execution is kept by a TZTestRun, so the same test can be executed several times at once.
+    A test whose construction and steps run for more than timeout seconds is interrupted and fails.
+    A test with a dataset runs all of its steps once for every row, on the same instance of the test class."""
     
-    def __init__(self, name:str, test_class: type):
+    def __init__(self, name:str, test_class: type, timeout:float | None = None, data=None):
         self.name = name
+        self.timeout = timeout
+        self.data = tz_dataset(data, test_class.__module__)
         self.doc = test_class.__doc__ if test_class.__doc__ else ""
         self.test_class = test_class
-        self.test_instance = None
         
         # This works only because step decorator is evaluated before the test decorator
-        self.steps = [x.get_object() for x in TzTree().get_by_name(self.name).get_children_of_kind('step')]
+        _node = TzTree().resolve(self.get_selector())
+        self.steps = [x.get_object() for x in _node.get_children_of_kind('step')] if _node is not None else []
 
         self.subscribers = {event:[] for event in TZEventType.__members__.values()}
-        self.info = TZTestInfo(name=self.name, total_steps=len(self.steps))
         self.uuid = hashlib.sha256(self.name.encode()).hexdigest()
-        self.current_step = self.steps[0]
 
     def attach(self, subscriber, event):
-        if event in self.subscribers:
+        """Subscribe to an event of every future run of the test. Attaching the same subscriber twice has no effect."""
+        if event in self.subscribers and subscriber not in self.subscribers[event]:
             self.subscribers[event].append(subscriber)
 
-    def notify(self, event):
-        if event in self.subscribers:
-            for subscriber in self.subscribers[event]:
-                subscriber(self)
-    
+    def detach_all(self):
+        """Remove all the subscribers, e.g. when the test outlives the session that attached them."""
+        self.subscribers = {event:[] for event in TZEventType.__members__.values()}
+
     def get_selector(self) -> str:
         """Returns the absolute path of the test class."""
         module = inspect.getmodule(self.test_class)
         if module is None:
             raise RuntimeError(f"Cannot find module of testcase {self.test_class.__name__}")
         return str(Path(module.__file__[:-3]) / self.test_class.__name__)
+
+    def create_run(self) -> TZTestRun:
+        """Create a new execution of the test."""
+        return TZTestRun(self)
+
+    def run(self) -> bool:
+        """Execute the test once. See TZTestRun.run"""
+        return self.create_run().run()
+
+
+class TZTestRun:
+    """This class holds the state of a single execution of a TZTest: the info record, the logger, the current step and
+    the subscribers. Subscribers of the test at creation time are inherited and notified with the run as argument."""
+
+    def __init__(self, test:TZTest) -> None:
+        self.test = test
+        self.name = test.name
+        self.steps = test.steps
+        self.uuid = test.uuid
+        self.info = TZTestInfo(name=test.name, total_steps=len(test.steps), selector=test.get_selector())
+        self.subscribers = {event:list(subscribers) for event, subscribers in test.subscribers.items()}
+        self.current_step = test.steps[0] if test.steps else None
+        self.logger = None
+        self.instance = None
+        # Set by the session to stop the run before its next step, see TZSession maxfail
+        self.cancel_event = None
+        self.cancelled = False
+        # Cleared by the session when tests share a thread, whose resources cannot be charged to a single test
+        self.measure_resources = True
+
+    def get_selector(self) -> str:
+        return self.test.get_selector()
+
+    def attach(self, subscriber, event):
+        """Subscribe to an event of this run only. Attaching the same subscriber twice has no effect."""
+        if event in self.subscribers and subscriber not in self.subscribers[event]:
+            self.subscribers[event].append(subscriber)
+
+    def notify(self, event):
+        if event in self.subscribers:
+            with tz_overhead_section("notify"):
+                for subscriber in self.subscribers[event]:
+                    subscriber(self)
+
+    async def notify_async(self, event):
+        """Notify the subscribers and wait for the awaitables they return, if any."""
+        if event in self.subscribers:
+            with tz_overhead_section("notify"):
+                for subscriber in self.subscribers[event]:
+                    _res = subscriber(self)
+                    if inspect.isawaitable(_res):
+                        await _res
     
+    def _begin(self) -> None:
+        self.logger = TZTestLogger(self.name, len(self.steps))
+        self.logger.info(f"Starting Testcase", show_step_info=False)
+        self.info.start = time.time()
+        self.info.status = TZTestStatusType.RUNNING
+
+    def _construct(self):
+        """Create the instance of the test class. Returns None when the constructor fails."""
+        try:
+            self.instance = self.test.test_class()
+            self.instance.logger = self.logger
+            return self.instance
+        except Exception as e:
+            self.info.error = str(e)
+            self.logger.error(e)
+            return None
+
+    def _begin_step(self, index:int, step:TZStep) -> TZStepInfo:
+        self.logger.set_test_step(index + 1)
+        self.info.current_step = index + 1
+        self.current_step = step
+        if index < len(self.info.steps):
+            # Later rows of a data-driven test share the info of the step, whose duration is the sum of the rows:
+            # the start is moved forward by the time spent between them
+            step_info = self.info.steps[index]
+            step_info.start = time.time() - (step_info.end - step_info.start)
+            step_info.end = 0
+            return step_info
+        step_info = TZStepInfo(name=step.name, index=index + 1, start=time.time())
+        self.info.steps.append(step_info)
+        return step_info
+
+    def _step_failed(self, e:Exception) -> None:
+        self.info.error = str(e)
+        self.logger.error(e)
+
+    def _end_step(self, step_info:TZStepInfo, step_res:bool, step_usage) -> None:
+        step_info.end = time.time()
+        if self.measure_resources:
+            _usage = tz_resource_delta(step_usage, tz_resource_usage())
+            step_info.resources = _usage if step_info.resources is None else tz_resource_sum(step_info.resources, _usage)
+        if step_info.status != TZTestStatusType.FAILED:
+            step_info.status = TZTestStatusType.PASSED if step_res else TZTestStatusType.FAILED
+
+    def _cancel(self, index:int) -> bool:
+        """Stop the run before the step index when the session cancelled it. Returns True if the run must stop."""
+        if self.cancel_event is None or not self.cancel_event.is_set() or index >= len(self.steps):
+            return False
+        self.cancelled = True
+        self.info.error = self.info.error or f"Cancelled before step {index + 1}/{len(self.steps)}"
+        return True
+
+    def _cancel_case(self, index:int) -> bool:
+        """Stop a data-driven run before the row index when the session cancelled it."""
+        if self.cancel_event is None or not self.cancel_event.is_set():
+            return False
+        self.cancelled = True
+        self.info.error = self.info.error or f"Cancelled before case {index}"
+        return True
+
+    def _case_done(self, index:int, row, case_res:bool) -> None:
+        if tz_record_case(self.info.cases, index, row, case_res, self.info.error or "A step failed"):
+            self.logger.error(f"Case {index} failed: {self.info.error or 'a step returned False'}")
+
+    def _cases_result(self, dataset_res:bool) -> bool:
+        cases = self.info.cases
+        if cases.failed:
+            self.info.error = tz_cases_summary(cases)
+        elif not cases.total and dataset_res:
+            self.logger.warning("The dataset is empty")
+        self.logger.info(f"{cases.passed}/{cases.total} cases passed", show_step_info=False)
+        return dataset_res and cases.failed == 0
+
+    def record_attempt(self) -> None:
+        """Record the terminated attempt of a test run again after a failure, see TZSession reruns.
+        A test passing after failed attempts is flaky."""
+        if not self.info.attempts:
+            return
+        self.info.attempts.append(TZAttemptInfo(attempt=len(self.info.attempts) + 1, status=self.info.status,
+                                                start=self.info.start, end=self.info.end, error=self.info.error))
+        if self.info.status == TZTestStatusType.PASSED:
+            self.info.status = TZTestStatusType.FLAKY
+
+    def _end(self, test_res:bool, test_usage) -> None:
+        self.info.end = time.time()
+        if self.measure_resources:
+            self.info.resources = tz_resource_delta(test_usage, tz_resource_usage())
+        if self.cancelled and test_res and not self.info.attempts:
+            self.logger.info(f"Testcase terminated: [bold yellow]SKIPPED[/bold yellow]", show_step_info=False)
+            self.info.status = TZTestStatusType.SKIPPED
+            return
+        # A cancelled rerun keeps the failure of the previous attempts
+        test_res = test_res and not self.cancelled
+        self.info.status = TZTestStatusType.PASSED if test_res else TZTestStatusType.FAILED
+        self.record_attempt()
+        _label = {TZTestStatusType.PASSED: '[bold green]PASSED[/bold green]', TZTestStatusType.FLAKY: '[bold yellow]FLAKY[/bold yellow]'}
+        self.logger.info(f"Testcase terminated: {_label.get(self.info.status, '[bold magenta]FAILED[/bold magenta]')}", show_step_info=False)
+
+    def _timed_out(self, e:TZTimeoutError) -> bool:
+        """Record a timeout raised outside of a step. Returns the result of the test."""
+        self._step_failed(e)
+        if self.info.current_step <= len(self.info.steps) and not self.info.steps[self.info.current_step - 1].end:
+            self.info.steps[self.info.current_step - 1].end = time.time()
+            self.info.steps[self.info.current_step - 1].status = TZTestStatusType.FAILED
+        return False
+
+    def _body(self, guard=None) -> bool:
+        """Construct the test class and run the steps, once for every row of the dataset if any. A fired test timeout
+        stops the remaining steps and rows."""
+        # Setup the test class
+        self.notify(TZEventType.CONSTRUCTION_STARTED)
+        try:
+            test = self._construct()
+        finally:
+            self.notify(TZEventType.CONSTRUCTION_TERMINATED)
+        
+        if test is None:
+            return False
+        if self.test.data is None:
+            return self._steps(test, guard)
+        
+        # Execute the steps for every row, only the failed rows are kept
+        self.info.cases = TZCasesInfo()
+        dataset_res = True
+        try:
+            for index, row in enumerate(tz_iter_dataset(self.test.data)):
+                if self._cancel_case(index):
+                    break
+                test.row, self.info.error = row, None
+                case_res = self._steps(test, guard, row)
+                if self.cancelled:
+                    break
+                self._case_done(index, row, case_res)
+                if guard is not None and guard.fired:
+                    break
+        except TZTimeoutError:
+            raise
+        except Exception as e:
+            self._step_failed(e)
+            dataset_res = False
+        return self._cases_result(dataset_res)
+
+    def _steps(self, test, guard=None, row=None) -> bool:
+        test_res:bool = True
+        for i, step in enumerate(self.steps):
+            step_info = self._begin_step(i, step)
+
+            self.notify(TZEventType.STEP_STARTED)
+            step_usage = tz_resource_usage()
+            step_res:bool = False
+            try:
+                step_res = step.run(test, owner=self, row=row)
+            except Exception as e:
+                self._step_failed(e)
+            
+            test_res &= step_res
+            self._end_step(step_info, step_res, step_usage)
+            self.notify(TZEventType.STEP_TERMINATED)
+            if (step.blocking and not step_res) or (guard is not None and guard.fired):
+                test_res = False
+                break
+            if self._cancel(i + 1):
+                break
+        
+        return test_res
+
     def run(self) -> bool:
         """This method is used to run the testcases. It will create an instance of the test_class and run the steps."""
         
-        # Setup the test class and test logger
-        test = self.test_class()
-        
-        test.logger = TZTestLogger(self.name, len(self.steps))
-        self.logger = test.logger
+        meter = TZOverheadMeter()
+        meter_token = meter.start()
+        run_token = TZ_CURRENT_RUN.set(self)
         
-        self.logger.info(f"Starting Testcase", show_step_info=False)
-        self.info.start = int(time.time())
-        self.info.status = TZTestStatusType.RUNNING
+        self._begin()
         self.notify(TZEventType.TEST_STARTED)
+        test_usage = tz_resource_usage()
+        
+        if self.test.timeout:
+            guard = tz_arm_timeout(self.test.timeout, f"Test {self.name}")
+            try:
+                test_res = self._body(guard)
+            except TZTimeoutError as e:
+                test_res = self._timed_out(e)
+            finally:
+                tz_disarm_timeout(guard)
+        else:
+            test_res = self._body()
+                
+        self._end(test_res, test_usage)
+        self.notify(TZEventType.TEST_TERMINATED)
+        self.info.overhead = meter.stop(meter_token)
+        TZ_CURRENT_RUN.reset(run_token)
+        
+        return test_res
+
+    async def _body_async(self) -> bool:
+        # Setup the test class
+        await self.notify_async(TZEventType.CONSTRUCTION_STARTED)
+        try:
+            test = self._construct()
+        finally:
+            await self.notify_async(TZEventType.CONSTRUCTION_TERMINATED)
         
-        # Execute test steps
-        test_res:bool = True 
+        if test is None:
+            return False
+        if self.test.data is None:
+            return await self._steps_async(test)
+        
+        # Execute the steps for every row, only the failed rows are kept
+        self.info.cases = TZCasesInfo()
+        dataset_res = True
+        try:
+            for index, row in enumerate(tz_iter_dataset(self.test.data)):
+                if self._cancel_case(index):
+                    break
+                test.row, self.info.error = row, None
+                case_res = await self._steps_async(test, row)
+                if self.cancelled:
+                    break
+                self._case_done(index, row, case_res)
+        except TZTimeoutError:
+            raise
+        except Exception as e:
+            self._step_failed(e)
+            dataset_res = False
+        return self._cases_result(dataset_res)
+
+    async def _steps_async(self, test, row=None) -> bool:
+        test_res:bool = True
         for i, step in enumerate(self.steps):
-            test.logger.set_test_step(i + 1)
-            self.info.current_step = i + 1
-            self.current_step = step
+            step_info = self._begin_step(i, step)
 
-            self.notify(TZEventType.STEP_STARTED)
+            await self.notify_async(TZEventType.STEP_STARTED)
+            step_usage = tz_resource_usage()
             step_res:bool = False
             try:
-                _res = step.run(test)
-                step_res = _res 
-                
+                step_res = await step.run_async(test, owner=self, row=row)
             except Exception as e:
-                self.info.error = str(e)
-                test.logger.error(e)
+                self._step_failed(e)
             
             test_res &= step_res
-            self.notify(TZEventType.STEP_TERMINATED)
+            self._end_step(step_info, step_res, step_usage)
+            await self.notify_async(TZEventType.STEP_TERMINATED)
             if step.blocking and not step_res:
                 test_res = False
                 break
+            if self._cancel(i + 1):
+                break
+        
+        return test_res
+
+    async def run_async(self) -> bool:
+        """This method is used to run the testcases on the event loop. Subscribers may return awaitables, e.g. to set up asynchronous fixtures."""
+        
+        meter = TZOverheadMeter()
+        meter_token = meter.start()
+        run_token = TZ_CURRENT_RUN.set(self)
+        
+        self._begin()
+        await self.notify_async(TZEventType.TEST_STARTED)
+        test_usage = tz_resource_usage()
+        
+        if self.test.timeout:
+            try:
+                test_res = await tz_wait_for(self._body_async(), self.test.timeout, f"Test {self.name}")
+            except TZTimeoutError as e:
+                test_res = self._timed_out(e)
+        else:
+            test_res = await self._body_async()
                 
-        self.info.end = int(time.time())
-        self.logger.info(f"Testcase terminated: {'[bold green]PASSED[/bold green]' if test_res else '[bold magenta]FAILED[/bold magenta]'}", show_step_info=False)
-        self.info.status = TZTestStatusType.PASSED if test_res else TZTestStatusType.FAILED
-        self.notify(TZEventType.TEST_TERMINATED)
+        self._end(test_res, test_usage)
+        await self.notify_async(TZEventType.TEST_TERMINATED)
+        self.info.overhead = meter.stop(meter_token)
+        TZ_CURRENT_RUN.reset(run_token)
         
         return test_res
 
 
 _TZEN_MODULES_ = {}
 
+def tz_forget_module(module_name:str) -> None:
+    """Remove the tests, the steps and the tree nodes registered by a module, e.g. before reloading it."""
+    _names = [k for k, v in _TZEN_TESTS_.items() if v.test_class.__module__ == module_name]
+    tz_forget_tags([_TZEN_TESTS_[x].get_selector() for x in _names])
+    for name in _names:
+        del _TZEN_TESTS_[name]
+    for selector in [k for k, v in _TZEN_STEPS_.items() if v.func.__module__ == module_name]:
+        del _TZEN_STEPS_[selector]
+    for selector in [k for k, v in _TZEN_MODULES_.items() if v.module.__name__ == module_name]:
+        del _TZEN_MODULES_[selector]
+        _node = TzTree().resolve(selector)
+        if _node is not None and _node.parent is not None:
+            TzTree().remove(_node)
+
 def _module_provider(name:str, selector:str):
     if selector not in _TZEN_MODULES_:
         raise RuntimeError("Cannot find module with name: {name} and selector: {selector}")
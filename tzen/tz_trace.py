@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ---------------------------------------------------------------------------
+# Author:   Lorenzo Furcas (TopFirmino)
+# License:  MIT – see the LICENSE file in the repository root for details.
+# ---------------------------------------------------------------------------
+"""This module exports a session timeline in the Chrome Trace Event Format.
+The produced file can be opened with chrome://tracing or https://ui.perfetto.dev and shows fixture setups,
+test construction, steps, repetitions, teardowns and log records as a flame chart. Each worker gets its own track.
+"""
+
+from __future__ import annotations
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from .tz_types import TZEventType
+from ._tz_context import TZ_WORKER
+from ._tz_logging import TZEN_ROOT_LOGGER_NAME, TZEN_ROOT_TEST_LOGGER_NAME, TZEN_ROOT_FIXTURE_LOGGER_NAME
+
+
+class TZTraceWriter:
+    """Streaming writer for the JSON Array flavour of the Chrome Trace Event Format.
+    Events are written as soon as they are produced, so a partial trace is still readable if the session dies."""
+
+    def __init__(self, path:str) -> None:
+        self.path = Path(path).absolute()
+        self.pid = os.getpid()
+        self._file = None
+        self._first = True
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def open(self) -> None:
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._file.write("[\n")
+        self._first = True
+
+    def now(self) -> float:
+        """Returns the current trace timestamp in microseconds."""
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def write(self, event:Dict[str, Any]) -> None:
+        event.setdefault("pid", self.pid)
+        _line = json.dumps(event, default=str)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(_line if self._first else ",\n" + _line)
+            self._first = False
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.write("\n]\n")
+                self._file.close()
+                self._file = None
+
+
+class _TZTraceLogHandler(logging.Handler):
+    """Logging handler that turns every log record into an instant event."""
+
+    def __init__(self, recorder:TZTraceRecorder) -> None:
+        super().__init__(logging.DEBUG)
+        self.recorder = recorder
+
+    def emit(self, record:logging.LogRecord) -> None:
+        try:
+            self.recorder.instant(record.getMessage()[:120], "log", {"logger": record.name, "level": record.levelname})
+        except Exception:
+            self.handleError(record)
+
+
+class TZTraceRecorder:
+    """Session observer that feeds a TZTraceWriter with the TZEventType notifications of a session, its tests and its fixtures."""
+
+    TRACED_LOGGERS = (TZEN_ROOT_LOGGER_NAME, TZEN_ROOT_TEST_LOGGER_NAME, TZEN_ROOT_FIXTURE_LOGGER_NAME)
+
+    def __init__(self, path:str) -> None:
+        self.writer = TZTraceWriter(path)
+        self._tracks:Dict[Any, int] = {}
+        self._tracks_lock = threading.Lock()
+        self._log_handler = _TZTraceLogHandler(self)
+
+    # ---- tracks --------------------------------------------------------------
+
+    def _track(self) -> int:
+        """Returns the track of the calling worker, registering it on first use.
+        Workers of the asyncio engine share a thread, so the worker context has precedence over the thread."""
+        worker = TZ_WORKER.get()
+        ident = worker if worker is not None else threading.get_ident()
+        tid = self._tracks.get(ident)
+        if tid is not None:
+            return tid
+        # Workers start concurrently, e.g. the threads of the session or of the parallel fixture setup
+        with self._tracks_lock:
+            tid = self._tracks.get(ident)
+            if tid is None:
+                tid = len(self._tracks) + 1
+                self._tracks[ident] = tid
+                _name = worker if worker is not None else threading.current_thread().name
+                self.writer.write({"name": "thread_name", "ph": "M", "tid": tid, "args": {"name": _name}})
+        return tid
+
+    def begin(self, name:str, cat:str, args:Dict[str, Any] | None = None) -> None:
+        self.writer.write({"name": name, "cat": cat, "ph": "B", "ts": self.writer.now(), "tid": self._track(), "args": args or {}})
+
+    def end(self, name:str, cat:str, args:Dict[str, Any] | None = None) -> None:
+        self.writer.write({"name": name, "cat": cat, "ph": "E", "ts": self.writer.now(), "tid": self._track(), "args": args or {}})
+
+    def instant(self, name:str, cat:str, args:Dict[str, Any] | None = None) -> None:
+        self.writer.write({"name": name, "cat": cat, "ph": "i", "s": "t", "ts": self.writer.now(), "tid": self._track(), "args": args or {}})
+
+    # ---- binding -------------------------------------------------------------
+
+    def bind(self, session) -> TZTraceRecorder:
+        """Subscribe the recorder to a session, to all of its tests and to the fixtures they use."""
+        session.attach(self._on_session_started, TZEventType.SESSION_STARTED)
+        session.attach(self._on_session_terminated, TZEventType.SESSION_TERMINATED)
+
+        _test_events = {
+            TZEventType.TEST_STARTED: self._on_test_started,
+            TZEventType.TEST_TERMINATED: self._on_test_terminated,
+            TZEventType.CONSTRUCTION_STARTED: self._on_construction_started,
+            TZEventType.CONSTRUCTION_TERMINATED: self._on_construction_terminated,
+            TZEventType.STEP_STARTED: self._on_step_started,
+            TZEventType.STEP_TERMINATED: self._on_step_terminated,
+            TZEventType.REPEAT_STARTED: self._on_repeat_started,
+            TZEventType.REPEAT_TERMINATED: self._on_repeat_terminated,
+        }
+        for test in session.tests:
+            for event, handler in _test_events.items():
+                test.attach(handler, event)
+
+        _fixture_events = {
+            TZEventType.FIXTURE_SETUP_STARTED: self._on_fixture_setup_started,
+            TZEventType.FIXTURE_SETUP_TERMINATED: self._on_fixture_setup_terminated,
+            TZEventType.FIXTURE_TEARDOWN_STARTED: self._on_fixture_teardown_started,
+            TZEventType.FIXTURE_TEARDOWN_TERMINATED: self._on_fixture_teardown_terminated,
+        }
+        for node in session.test_organizer.find("fixture"):
+            fixture = node.get_object()
+            for event, handler in _fixture_events.items():
+                fixture.attach(handler, event)
+
+        return self
+
+    # ---- session events ------------------------------------------------------
+
+    def _on_session_started(self, session) -> None:
+        self.writer.open()
+        self.writer.write({"name": "process_name", "ph": "M", "tid": 0, "args": {"name": f"tzen: {session.info.name}"}})
+        for name in self.TRACED_LOGGERS:
+            logging.getLogger(name).addHandler(self._log_handler)
+        self.begin(session.info.name, "session", {"total_tests": session.info.total_tests})
+
+    def _on_session_terminated(self, session) -> None:
+        self.end(session.info.name, "session", {"passed": session.info.passed_tests, "failed": session.info.failed_tests})
+        for name in self.TRACED_LOGGERS:
+            logging.getLogger(name).removeHandler(self._log_handler)
+        self.writer.close()
+
+    # ---- test events ---------------------------------------------------------
+
+    def _on_test_started(self, test) -> None:
+        self.begin(test.name, "test", {"selector": test.get_selector()})
+
+    def _on_test_terminated(self, test) -> None:
+        self.end(test.name, "test", {"status": test.info.status.name, "error": test.info.error})
+
+    def _on_construction_started(self, test) -> None:
+        self.begin(f"{test.name}.__init__", "construction")
+
+    def _on_construction_terminated(self, test) -> None:
+        self.end(f"{test.name}.__init__", "construction")
+
+    def _on_step_started(self, test) -> None:
+        self.begin(test.current_step.name, "step", {"index": test.info.current_step})
+
+    def _on_step_terminated(self, test) -> None:
+        self.end(test.current_step.name, "step")
+
+    def _on_repeat_started(self, test) -> None:
+        self.begin(f"repeat {test.info.current_repeat}", "repeat")
+
+    def _on_repeat_terminated(self, test) -> None:
+        self.end(f"repeat {test.info.current_repeat}", "repeat")
+
+    # ---- fixture events ------------------------------------------------------
+
+    def _on_fixture_setup_started(self, fixture) -> None:
+        self.begin(f"setup {fixture.name}", "fixture", {"scope": fixture.scope.value})
+
+    def _on_fixture_setup_terminated(self, fixture) -> None:
+        self.end(f"setup {fixture.name}", "fixture")
+
+    def _on_fixture_teardown_started(self, fixture) -> None:
+        self.begin(f"teardown {fixture.name}", "fixture", {"scope": fixture.scope.value})
+
+    def _on_fixture_teardown_terminated(self, fixture) -> None:
+        self.end(f"teardown {fixture.name}", "fixture")
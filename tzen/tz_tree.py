@@ -7,13 +7,18 @@
 """This module implements the tree structure of a teen project. 
 The tree is composed by TzTreeNode objects and uses the path of the object in order to identify dependencies. 
 It is possible to register different kind of nodes via tz_tree_register_type decorator providing a factory and a provider for the registered type.
+Besides paths, nodes are selected with globs such as `tests/**/TC_0*` or `*/step_init` and with `kind:<kind>`: the
+selectors are compiled once and evaluated against the name and kind indexes of the tree instead of visiting every node.
 """
 
 from __future__ import annotations
 from typing import Protocol, Dict, List, Callable, Tuple, Any
 from pathlib import Path
+import functools
 import inspect
 import os
+import re
+from ._tz_overhead import tz_overhead_wrap
 
 TZ_TREE_TYPES:Dict[str, TzTreeTypeSpec] = {}
 
@@ -160,6 +165,83 @@ class TzTreeNode:
         return ret
 
 
+_GLOB_CHARS = re.compile(r"[*?\[]")
+
+def tz_is_pattern(selector:str) -> bool:
+    """True if the selector is a glob or a kind selector rather than a path."""
+    return selector.startswith("kind:") or bool(_GLOB_CHARS.search(selector))
+
+def _segment_regex(segment:str) -> str:
+    """Regex of a glob path segment, wildcards never match a separator."""
+    _rx, i = "", 0
+    while i < len(segment):
+        c = segment[i]
+        if c == "*":
+            _rx += "[^/]*"
+        elif c == "?":
+            _rx += "[^/]"
+        elif c == "[" and segment.find("]", i + 2) > 0:
+            _end = segment.find("]", i + 2)
+            _class = segment[i + 1:_end]
+            _rx += "[" + ("^" + _class[1:] if _class.startswith("!") else _class).replace("\\", "\\\\") + "]"
+            i = _end
+        else:
+            _rx += re.escape(c)
+        i += 1
+    return _rx
+
+def _relative_parts(node:TzTreeNode, base:TzTreeNode) -> List[str] | None:
+    """Names of the nodes from base, excluded, to node. None if node is not below base."""
+    _parts = []
+    while node is not None and node is not base:
+        _parts.append(node.name)
+        node = node.parent
+    return _parts[::-1] if node is base else None
+
+@functools.lru_cache(maxsize=256)
+def tz_compile_selector(selector:str) -> Callable[[TzTree, TzTreeNode], List[TzTreeNode]]:
+    """Compile a selector into a function returning the matching nodes below a base node of the tree.
+    Selectors are paths relative to the base, globs where `*` and `?` match within a name and `**` any number of
+    nodes, or `kind:<kind>` for all the nodes of a kind. Globs match the last nodes of a path, e.g. `*/step_init` is
+    any step_init of any test, unless they start with `/` which anchors them to the base."""
+    if selector.startswith("kind:"):
+        _kind = selector[5:]
+        return lambda tree, base: [x for x in tree._kinds.get(_kind, ()) if _relative_parts(x, base) is not None]
+    
+    if not tz_is_pattern(selector):
+        def _path(tree, base):
+            _node = base.resolve(selector.lstrip("/"))
+            return [_node] if _node is not None else []
+        return _path
+    
+    _segments = selector.replace("\\", "/").strip("/").split("/")
+    _rx = "" if selector.startswith("/") else "(?:[^/]+/)*"
+    for n, segment in enumerate(_segments):
+        if segment == "**":
+            _rx += "(?:[^/]+/)*[^/]+" if n == len(_segments) - 1 else "(?:[^/]+/)*"
+        else:
+            _rx += _segment_regex(segment) + ("/" if n < len(_segments) - 1 else "")
+    _path_rx = re.compile(_rx)
+    _last = _segments[-1]
+    _last_rx = re.compile(_segment_regex(_last)) if _last != "**" else None
+    
+    def _glob(tree, base):
+        # The last segment selects the candidates from the name index, the whole path is checked on them only
+        if _last_rx is None:
+            _candidates = [x for nodes in tree._kinds.values() for x in nodes]
+        elif not _GLOB_CHARS.search(_last):
+            _candidates = list(tree._names.get(_last, ()))
+        else:
+            _candidates = [x for name, nodes in tree._names.items() if _last_rx.fullmatch(name) for x in nodes]
+        _res = []
+        for node in _candidates:
+            _parts = _relative_parts(node, base)
+            if _parts and _path_rx.fullmatch("/".join(_parts)):
+                _res.append(node)
+        return _res
+    return _glob
+
+
 _TZEN_CONTAINERS_ = {}
 
 def _container_provider(name:str, selector:str):
@@ -189,21 +271,63 @@ class TzSimpleSingletonMeta(type):
 
 class TzTree(TzTreeNode, metaclass=TzSimpleSingletonMeta):
 
+    # Overhead category charged to the user code of every kind of consumer
+    OVERHEAD_CATEGORIES = {"step": "step", "test": "construction", "fixture": "fixture"}
+
     def __init__(self) -> None:
         _anchor = Path().cwd().anchor.upper() if os.name == 'nt' else Path().cwd().anchor
         super().__init__(_anchor, 'container')
+        # Nodes by name and by kind, dicts are used as ordered sets
+        self._names:Dict[str, Dict[TzTreeNode, None]] = {}
+        self._kinds:Dict[str, Dict[TzTreeNode, None]] = {}
+
+    def _index(self, node:TzTreeNode) -> None:
+        self._names.setdefault(node.name, {})[node] = None
+        self._kinds.setdefault(node.kind, {})[node] = None
+
+    def _unindex(self, node:TzTreeNode) -> None:
+        self._names.get(node.name, {}).pop(node, None)
+        self._kinds.get(node.kind, {}).pop(node, None)
+
+    def remove(self, node:TzTreeNode) -> None:
+        """Detach a node and its subtree from the tree."""
+        if node.parent is not None:
+            node.parent.children.remove(node)
+            node.parent = None
+        node.visit(self._unindex)
+
+    def select(self, selector:str, base:TzTreeNode | None = None) -> List[TzTreeNode]:
+        """Nodes below base, the whole tree by default, matching a selector. See tz_compile_selector."""
+        return tz_compile_selector(selector)(self, base or self)
+
+    def select_tests(self, selectors:List[str], base:TzTreeNode | None = None) -> List[TzTreeNode]:
+        """Union of the test nodes selected by several selectors: the selected tests, the tests of the selected steps,
+        fixtures and other nodes below a test, and the tests below the selected containers and modules."""
+        _tests:Dict[TzTreeNode, None] = {}
+        for selector in selectors:
+            for node in self.select(selector, base):
+                _test = node
+                while _test is not None and _test.kind != "test":
+                    _test = _test.parent
+                for x in [_test] if _test is not None else node.find("test"):
+                    _tests[x] = None
+        return list(_tests)
 
     def inject(self, func, consumer):
        
-        if not self.resolve(consumer):
+        _consumer = self.resolve(consumer)
+        if not _consumer:
             raise RuntimeError("Cannot find a valid consumer with selector {consumer}")
         
+        # The user code and the injection wrappers are accounted separately
+        func = tz_overhead_wrap(func, self.OVERHEAD_CATEGORIES.get(_consumer.kind, "step"))
+        
         # Inject the function 
         for k, v in TZ_TREE_TYPES.items():
             if v.injector:
                 func = v.injector(func, consumer=consumer)
         
-        return func
+        return tz_overhead_wrap(func, "inject")
     
     def load(self, path: Path) -> None:
         """Loads the tree by calling the loader hook for every node types"""
@@ -235,6 +359,7 @@ class TzTree(TzTreeNode, metaclass=TzSimpleSingletonMeta):
             if _new_node is None:
                 _new_node = TzTreeNode(p, "container")
                 _node.add( _new_node )
+                self._index(_new_node)
 
             _node = _new_node
         
@@ -249,7 +374,9 @@ class TzTree(TzTreeNode, metaclass=TzSimpleSingletonMeta):
         _obj = self.create_containers(str(_p))
         
         if _obj:
+            self._unindex(_obj)
             _obj.kind = kind
             _obj.name = name
+            self._index(_obj)
         
         return _obj
\ No newline at end of file
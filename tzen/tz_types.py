@@ -8,7 +8,7 @@
 
 from __future__ import annotations
 from enum import Enum, auto
-from typing import Dict    
+from typing import Dict, List
 from dataclasses import dataclass, field
 
 class TZTestStatusType(Enum):
@@ -17,7 +17,73 @@ class TZTestStatusType(Enum):
     RUNNING = auto()
     PASSED = auto()
     FAILED = auto()
+    SKIPPED = auto()
+    FLAKY = auto()
     
+@dataclass
+class TZMemoryInfo:
+    """Dataclass that collects the memory usage of a test or of a step. Sizes are expressed in bytes.
+    rss_delta is the growth of the current resident set size; gc_growth is only recorded for tests."""
+    peak: int = 0
+    retained: int = 0
+    rss_delta: int = 0
+    gc_growth: Dict[str, int] = field(default_factory=dict)
+    top_allocations: List[str] = field(default_factory=list)
+    leak: bool = False
+
+@dataclass
+class TZResourceUsage:
+    """Dataclass that collects the resources consumed by a test or by a step. CPU times are expressed in seconds, max RSS in bytes."""
+    user_time: float = 0.0
+    system_time: float = 0.0
+    max_rss: int = 0
+    voluntary_switches: int = 0
+    involuntary_switches: int = 0
+    block_input: int = 0
+    block_output: int = 0
+
+    @property
+    def cpu_time(self) -> float:
+        return self.user_time + self.system_time
+
+@dataclass
+class TZCaseFailure:
+    """Dataclass to represent a failed sub-case of a data-driven test or step."""
+    index: int
+    row: object
+    error: str | None = None
+
+@dataclass
+class TZCasesInfo:
+    """Dataclass that aggregates the sub-cases of a data-driven test or step while they run.
+    Only the failures are kept in full, up to a limit: `dropped` counts the failures that were not kept."""
+    total: int = 0
+    passed: int = 0
+    failed: int = 0
+    dropped: int = 0
+    failures: List[TZCaseFailure] = field(default_factory=list)
+
+@dataclass
+class TZStepInfo:
+    """Dataclass to represent the execution of a single step of a test."""
+    name: str
+    index: int
+    status: TZTestStatusType = TZTestStatusType.RUNNING
+    start: float = 0
+    end: float = 0
+    memory: TZMemoryInfo | None = None
+    resources: TZResourceUsage | None = None
+    cases: TZCasesInfo | None = None
+
+@dataclass
+class TZAttemptInfo:
+    """Dataclass to represent an attempt of a test run again after a failure."""
+    attempt: int
+    status: TZTestStatusType
+    start: float = 0
+    end: float = 0
+    error: str | None = None
+
 @dataclass
 class TZTestInfo:
     """Dataclass to represent the status of a test. It contains all the informations regarding testcases."""
@@ -26,8 +92,16 @@ class TZTestInfo:
     current_step: int = 1
     status: TZTestStatusType = TZTestStatusType.IDLE
     error:str = None
-    start:int = 0
-    end:int = 0
+    start:float = 0
+    end:float = 0
+    current_repeat: int = 0
+    selector: str = ""
+    steps: List[TZStepInfo] = field(default_factory=list)
+    memory: TZMemoryInfo | None = None
+    resources: TZResourceUsage | None = None
+    overhead: Dict[str, float] = field(default_factory=dict)
+    cases: TZCasesInfo | None = None
+    attempts: List[TZAttemptInfo] = field(default_factory=list)
 
 class TZEventType(Enum):
     """Enumeration of event types in the testing system."""
@@ -37,6 +111,16 @@ class TZEventType(Enum):
     STEP_TERMINATED = auto()
     SESSION_STARTED = auto()
     SESSION_TERMINATED = auto()
+    CONSTRUCTION_STARTED = auto()
+    CONSTRUCTION_TERMINATED = auto()
+    REPEAT_STARTED = auto()
+    REPEAT_TERMINATED = auto()
+    FIXTURE_SETUP_STARTED = auto()
+    FIXTURE_SETUP_TERMINATED = auto()
+    FIXTURE_TEARDOWN_STARTED = auto()
+    FIXTURE_TEARDOWN_TERMINATED = auto()
+    # Notified by the session with the final info of a test, after its reruns
+    TEST_RECORDED = auto()
     
 class TZSessionStatusType(Enum):
 
@@ -55,10 +139,14 @@ class TZSessionInfo:
     current_test: str = ""
     passed_tests:int = 0
     failed_tests:int = 0
+    skipped_tests:int = 0
+    flaky_tests:int = 0
     start:int = 0
     end:int = 0
     status:TZSessionStatusType = TZSessionStatusType.IDLE
     details: Dict[str, TZTestInfo | None] = None
+    overhead: Dict[str, float] = field(default_factory=dict)
+    saved_setups: int = 0
 
 @dataclass
 class TZDocRecord:
@@ -67,4 +155,38 @@ class TZDocRecord:
     kind: str
     selector:str
     summary:str = ""
-    details:Dict[str, str] = field(default_factory=dict)
\ No newline at end of file
+    details:Dict[str, str] = field(default_factory=dict)
+@dataclass
+class TZLatencyInfo:
+    """Dataclass that collects the latencies of a step, or of a whole iteration, in a load test. Times are in seconds."""
+    count: int = 0
+    errors: int = 0
+    mean: float = 0.0
+    p50: float = 0.0
+    p90: float = 0.0
+    p99: float = 0.0
+    max: float = 0.0
+
+@dataclass
+class TZLoadWindowInfo:
+    """Dataclass to represent a time window of a load test. Iterations and steps are counted in the window they end in."""
+    start: float
+    end: float
+    users: int = 0
+    throughput: float = 0.0
+    iterations: TZLatencyInfo = field(default_factory=TZLatencyInfo)
+    steps: Dict[str, TZLatencyInfo] = field(default_factory=dict)
+
+@dataclass
+class TZLoadInfo:
+    """Dataclass to represent the results of a load test: the totals and the time windows."""
+    name: str
+    users: int
+    duration: float
+    ramp_up: float = 0.0
+    start: float = 0
+    end: float = 0
+    throughput: float = 0.0
+    iterations: TZLatencyInfo = field(default_factory=TZLatencyInfo)
+    steps: Dict[str, TZLatencyInfo] = field(default_factory=dict)
+    windows: List[TZLoadWindowInfo] = field(default_factory=list)